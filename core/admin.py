@@ -1,8 +1,32 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import Lesson, Expression, Comment, ForumPost, SiteSettings, Practice, UserProfile, BlogPost
+from .search import fts_available, get_search_index, matching_ids
+from .text import normalized_prefix_q
+
+
+class FullTextSearchAdminMixin:
+    """
+    Búsqueda del admin sobre el índice FTS5 del modelo. Los campos de
+    search_fields que no están en el índice (p. ej. author__username) se
+    siguen buscando con icontains.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        index = get_search_index(queryset.model)
+        if not search_term or index is None or not fts_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        query = Q(pk__in=matching_ids(queryset.model, search_term))
+        # Columnas normalizadas: prefijo sin tildes ni puntuación sobre su índice
+        for target in getattr(queryset.model, 'normalized_fields', {}):
+            query |= normalized_prefix_q(target, search_term)
+        for field in self.search_fields:
+            if field not in index.fields:
+                query |= Q(**{f'{field}__icontains': search_term})
+        return queryset.filter(query), False
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'title', 'level', 'category', 'created_at')
     list_filter = ('level', 'category', 'created_at')
     search_fields = ('title', 'content')
@@ -20,7 +44,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'bio', 'learning_goals')
 
 @admin.register(BlogPost)
-class BlogPostAdmin(admin.ModelAdmin):
+class BlogPostAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'category', 'is_published', 'views', 'created_at')
     list_filter = ('category', 'is_published', 'created_at')
     search_fields = ('title', 'content', 'excerpt', 'author__username')
@@ -44,7 +68,7 @@ class BlogPostAdmin(admin.ModelAdmin):
         }),
     )
 
-class ExpressionAdmin(admin.ModelAdmin):
+class ExpressionAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('text', 'lesson', 'meaning', 'created_at')
     search_fields = ('text', 'meaning', 'lesson__title')
     list_filter = ('lesson',)
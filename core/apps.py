@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Registrar los receptores de señales (contadores, caché, etc.)
+        from . import signals  # noqa: F401
+        # Tablas FTS5 y triggers de búsqueda (se recrean tras cada migrate)
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(install_search_indexes_after_migrate, sender=self)
+
+
+def install_search_indexes_after_migrate(sender, using='default', **kwargs):
+    from .search import install_search_indexes
+    install_search_indexes(using=using)
@@ -0,0 +1,109 @@
+"""
+Autocompletado de expresiones con un índice de prefijos en memoria.
+
+Cada proceso guarda una lista ordenada de los textos normalizados de las
+expresiones activas; una búsqueda por prefijo son dos bisect sobre esa lista,
+sin consultas a la base de datos. Las sugerencias se ordenan por coincidencia
+exacta, luego por popularidad (Expression.views) y luego alfabéticamente.
+
+El índice se reconstruye de forma perezosa en la primera búsqueda después de
+que cambie la versión de contenido de Expression (core.content_version), o al
+pasar AUTOCOMPLETE_INDEX_TTL segundos: el volcado de visitas usa
+queryset.update() y no cambia la versión, así que la popularidad se refresca
+con ese intervalo.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from django.conf import settings
+from .content_version import get_version
+from .text import PREFIX_UPPER_BOUND, normalize_text
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Resultados memorizados por índice (prefijos cortos como "a" recorren muchas entradas)
+MAX_CACHED_PREFIXES = 1024
+
+Suggestion = namedtuple('Suggestion', ['normalized', 'popularity', 'id', 'text', 'lesson_id'])
+
+
+class PrefixIndex:
+    """Lista ordenada de sugerencias con búsqueda por prefijo"""
+
+    def __init__(self, suggestions, version=None):
+        self.suggestions = sorted(suggestions, key=lambda s: (s.normalized, s.id))
+        self.keys = [s.normalized for s in self.suggestions]
+        self.version = version
+        self.built_at = time.monotonic()
+        self._results = {}
+
+    def __len__(self):
+        return len(self.suggestions)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Las limit mejores sugerencias cuyo texto normalizado empieza por query"""
+        prefix = normalize_text(query)
+        if not prefix or limit <= 0:
+            return []
+        cache_key = (prefix, limit)
+        if cache_key in self._results:
+            return self._results[cache_key]
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + PREFIX_UPPER_BOUND, lo=start)
+        results = heapq.nsmallest(
+            limit,
+            self.suggestions[start:end],
+            key=lambda s: (s.normalized != prefix, -s.popularity, s.normalized, s.id),
+        )
+        if len(self._results) >= MAX_CACHED_PREFIXES:
+            self._results.clear()
+        self._results[cache_key] = results
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, 'AUTOCOMPLETE_INDEX_TTL', 300)
+
+
+def build_index(version=None):
+    """Construye el índice con una sola consulta sobre las expresiones activas"""
+    from .models import Expression
+    rows = Expression.objects.filter(is_active=True).exclude(text_normalized='').values_list(
+        'text_normalized', 'views', 'id', 'text', 'lesson_id'
+    )
+    return PrefixIndex((Suggestion(*row) for row in rows.iterator()), version=version)
+
+
+def _is_current(index, version):
+    return (
+        index is not None
+        and index.version == version
+        and time.monotonic() - index.built_at < _ttl()
+    )
+
+
+def get_index():
+    """Índice del proceso, reconstruido si la versión de contenido cambió o expiró"""
+    global _index
+    from .models import Expression
+    version = get_version(Expression)
+    index = _index
+    if _is_current(index, version):
+        return index
+    with _index_lock:
+        # Otro hilo pudo reconstruirlo mientras esperábamos
+        if not _is_current(_index, version):
+            _index = build_index(version)
+        return _index
+
+
+def autocomplete_expressions(query, limit=DEFAULT_LIMIT):
+    """Sugerencias para query; limit se acota a MAX_LIMIT"""
+    return get_index().search(query, max(0, min(limit, MAX_LIMIT)))
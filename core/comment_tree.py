@@ -0,0 +1,54 @@
+"""
+Carga del árbol de comentarios de una publicación del foro.
+
+Todos los comentarios activos se obtienen con una sola consulta (autor incluido
+y marca de "me gusta" del usuario actual) y el árbol de respuestas se arma en
+Python en O(n). La plantilla recibe los nodos ya construidos, de modo que el
+número de consultas no depende de la cantidad de comentarios ni de su anidación.
+"""
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from .models import Comment
+
+
+def comment_tree_queryset(post, user=None):
+    """Comentarios activos de post con autor y marca user_liked, en orden cronológico"""
+    comments = Comment.objects.filter(post=post, is_active=True).select_related('author')
+    if user is not None and user.is_authenticated:
+        comments = comments.annotate(user_liked=Exists(
+            Comment.likes.through.objects.filter(comment=OuterRef('pk'), user=user.pk)
+        ))
+    else:
+        comments = comments.annotate(user_liked=Value(False, output_field=BooleanField()))
+    return comments.order_by('created_at', 'pk')
+
+
+def load_comment_tree(post, user=None):
+    """
+    Devuelve los comentarios de primer nivel de post (más recientes primero).
+    Cada comentario trae:
+      - children: respuestas activas en orden cronológico
+      - depth: nivel de anidación (0 para los de primer nivel)
+      - user_liked: si user le dio "me gusta"
+    Las respuestas a un comentario inactivo pasan al primer nivel: se muestran
+    todos los comentarios activos, como cuenta ForumPost.comments_count.
+    """
+    comments = list(comment_tree_queryset(post, user))
+    active_ids = {comment.pk for comment in comments}
+    children = {}
+    roots = []
+    for comment in comments:
+        comment.children = []
+        if comment.parent_id in active_ids:
+            children.setdefault(comment.parent_id, []).append(comment)
+        else:
+            roots.append(comment)
+
+    stack = [(root, 0) for root in roots]
+    while stack:
+        comment, depth = stack.pop()
+        comment.depth = depth
+        comment.children = children.get(comment.pk, [])
+        stack.extend((child, depth + 1) for child in comment.children)
+
+    roots.reverse()
+    return roots
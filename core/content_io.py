@@ -0,0 +1,327 @@
+"""
+Importación y exportación masiva de lecciones y expresiones.
+
+Un registro por línea (JSONL) o por fila (CSV) con las columnas de FIELDS.
+type es "lesson" o "expression". Las lecciones se identifican por país y
+título (clave natural); las expresiones, por su lección (las mismas columnas
+country y title) y su texto. La exportación escribe primero las lecciones y
+después las expresiones, así que al importar el mismo archivo cada expresión
+encuentra su lección.
+
+Las dos direcciones usan memoria constante. La exportación lee con iterator().
+La importación procesa lotes de batch_size registros, cada uno en su propia
+transacción y con bulk_create / bulk_update. Estas operaciones no llaman a
+save() ni emiten señales, así que aquí se actualizan por lote:
+  - las columnas normalizadas,
+  - los trigramas,
+  - las versiones de contenido.
+El índice FTS5 se mantiene con triggers.
+
+Si un registro no es válido, la importación se detiene. Los lotes anteriores
+quedan guardados y el error indica la línea desde la que reanudar (start_line).
+"""
+import csv
+import json
+from collections import Counter
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from .content_version import bump_version
+from .fuzzy import index_objects
+from .text import normalize_text
+
+FORMATS = ['jsonl', 'csv']
+FIELDS = [
+    'type', 'country', 'title', 'level', 'category', 'content', 'video_url',
+    'cultural_notes', 'user', 'text', 'meaning', 'example', 'is_active',
+]
+LESSON_FIELDS = ['level', 'category', 'content', 'video_url', 'cultural_notes', 'is_active']
+EXPRESSION_FIELDS = ['meaning', 'example', 'is_active']
+# Campos opcionales: una celda vacía del CSV se guarda como NULL
+NULLABLE_FIELDS = {'video_url', 'cultural_notes', 'meaning', 'example'}
+TRUE_VALUES = {'1', 'true', 'yes', 'si', 'sí'}
+FALSE_VALUES = {'0', 'false', 'no'}
+
+
+class ContentImportError(Exception):
+    """Registro no válido o error al guardar un lote; resume_line es la línea desde la que reanudar"""
+
+    def __init__(self, line, message, resume_line=None):
+        super().__init__(f'Línea {line}: {message}')
+        self.line = line
+        self.message = message
+        self.resume_line = resume_line or line
+
+
+def detect_format(path, fmt=None):
+    """Formato indicado o, si no, el de la extensión del archivo (JSONL por defecto)"""
+    if fmt:
+        return fmt
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+# ----------------------------------------
+# Exportación
+# ----------------------------------------
+
+def export_records(batch_size=1000):
+    """Registros de todas las lecciones y después de todas las expresiones, en orden de id"""
+    from .models import Expression, Lesson
+    lessons = Lesson.objects.order_by('pk').values('country', 'title', *LESSON_FIELDS, 'user__username')
+    for row in lessons.iterator(chunk_size=batch_size):
+        yield {'type': 'lesson', 'user': row.pop('user__username'), **row}
+
+    expressions = Expression.objects.order_by('pk').values(
+        'lesson__country', 'lesson__title', 'text', *EXPRESSION_FIELDS
+    )
+    for row in expressions.iterator(chunk_size=batch_size):
+        yield {
+            'type': 'expression',
+            'country': row.pop('lesson__country') or '',
+            'title': row.pop('lesson__title') or '',
+            **row,
+        }
+
+
+def write_records(records, stream, fmt='jsonl'):
+    """Escribe records en stream; devuelve cuántos escribió"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow({field: '' if value is None else value for field, value in record.items()})
+            count += 1
+    else:
+        for record in records:
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+# ----------------------------------------
+# Importación
+# ----------------------------------------
+
+def read_records(stream, fmt='jsonl', start_line=1):
+    """(línea, registro) de stream, desde start_line (número de línea del archivo)"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # line_num es la última línea física de la fila (las celdas pueden ocupar varias)
+            if reader.line_num >= start_line:
+                yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if line_number < start_line or not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ContentImportError(line_number, 'JSON no válido')
+        if not isinstance(record, dict):
+            raise ContentImportError(line_number, 'se esperaba un objeto JSON')
+        yield line_number, record
+
+
+def _text(record, field):
+    value = record.get(field)
+    if value is None:
+        return None
+    value = str(value)
+    if value == '' and field in NULLABLE_FIELDS:
+        return None
+    return value
+
+
+def _bool(line, value):
+    if isinstance(value, bool):
+        return value
+    if value is None or value == '':
+        return True
+    normalized = str(value).strip().lower()
+    if normalized in TRUE_VALUES:
+        return True
+    if normalized in FALSE_VALUES:
+        return False
+    raise ContentImportError(line, f'is_active no válido: {value!r}')
+
+
+class ContentImporter:
+    """
+    Importa registros por lotes. Con upsert=True actualiza las lecciones y
+    expresiones que ya existen (misma clave natural); si no, las deja como están.
+    default_user es el autor de las lecciones nuevas sin columna user.
+    """
+
+    def __init__(self, batch_size=500, upsert=False, default_user=None):
+        self.batch_size = batch_size
+        self.upsert = upsert
+        self.default_user = default_user
+        self.stats = Counter()
+
+    def run(self, records, progress=None):
+        """Importa records ((línea, registro)); progress(última_línea, stats) tras cada lote"""
+        batch = []
+        for line, record in records:
+            batch.append((line, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                if progress:
+                    progress(line, self.stats)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+            if progress:
+                progress(batch[-1][0], self.stats)
+        return self.stats
+
+    def import_batch(self, batch):
+        """Importa un lote en una transacción; si falla, no queda nada del lote"""
+        first_line = batch[0][0]
+        try:
+            lessons, expressions = self._split(batch)
+            with transaction.atomic():
+                lesson_ids = self._import_lessons(lessons)
+                expression_lesson_ids = self._import_expressions(expressions)
+        except ContentImportError as error:
+            error.resume_line = first_line
+            raise
+        except DatabaseError as error:
+            raise ContentImportError(first_line, f'error al guardar el lote: {error}') from error
+        self.stats['records'] += len(batch)
+        self._bump_versions(lesson_ids, expression_lesson_ids, bool(expressions))
+
+    def _split(self, batch):
+        # Por clave natural: si se repite dentro del lote, gana el último registro
+        lessons, expressions = {}, {}
+        for line, record in batch:
+            kind = record.get('type')
+            country, title = _text(record, 'country') or '', _text(record, 'title') or ''
+            if kind == 'lesson':
+                if not country or not title:
+                    raise ContentImportError(line, 'una lección necesita country y title')
+                lessons[(country, title)] = (line, record)
+            elif kind == 'expression':
+                text = _text(record, 'text')
+                if not text:
+                    raise ContentImportError(line, 'una expresión necesita text')
+                expressions[(country, title, text)] = (line, record)
+            else:
+                raise ContentImportError(line, f'tipo desconocido: {kind!r}')
+        return lessons, expressions
+
+    def _lesson_values(self, line, record):
+        from .models import Lesson
+        values = {field: _text(record, field) for field in LESSON_FIELDS if field != 'is_active'}
+        values['level'] = values['level'] or 'beginner'
+        values['category'] = values['category'] or 'slang'
+        values['is_active'] = _bool(line, record.get('is_active'))
+        for field, choices in [('level', Lesson.LEVEL_CHOICES), ('category', Lesson.CATEGORY_CHOICES)]:
+            if values[field] not in dict(choices):
+                raise ContentImportError(line, f'{field} no válido: {values[field]!r}')
+        if not values['content'] or not values['content'].strip():
+            raise ContentImportError(line, 'el contenido de la lección no puede estar vacío')
+        # bulk_create / bulk_update no llaman a save()
+        values['level_rank'] = Lesson.LEVEL_RANKS[values['level']]
+        return values
+
+    def _import_lessons(self, lessons):
+        from .models import Lesson
+        if not lessons:
+            return set()
+        countries = dict(Lesson.COUNTRY_CHOICES)
+        existing = {
+            (lesson.country, lesson.title): lesson
+            for lesson in Lesson.objects.filter(title__in={title for _, title in lessons})
+        }
+        usernames = {record.get('user') for _, record in lessons.values() if record.get('user')}
+        users = {user.username: user for user in User.objects.filter(username__in=usernames)}
+        now = timezone.now()
+        to_create, to_update = [], []
+
+        for (country, title), (line, record) in lessons.items():
+            if country not in countries:
+                raise ContentImportError(line, f'country no válido: {country!r}')
+            values = self._lesson_values(line, record)
+            lesson = existing.get((country, title))
+            if lesson is None:
+                user = users.get(record.get('user')) if record.get('user') else self.default_user
+                if user is None:
+                    raise ContentImportError(line, f"usuario desconocido: {record.get('user')!r}")
+                to_create.append(Lesson(
+                    country=country, title=title, title_normalized=normalize_text(title), user=user, **values
+                ))
+            elif self.upsert:
+                for field, value in values.items():
+                    setattr(lesson, field, value)
+                lesson.updated_at = now
+                to_update.append(lesson)
+            else:
+                self.stats['skipped'] += 1
+
+        Lesson.objects.bulk_create(to_create, batch_size=self.batch_size)
+        Lesson.objects.bulk_update(to_update, [*LESSON_FIELDS, 'level_rank', 'updated_at'], batch_size=self.batch_size)
+        self.stats['lessons_created'] += len(to_create)
+        self.stats['lessons_updated'] += len(to_update)
+        return {lesson.pk for lesson in [*to_create, *to_update]}
+
+    def _import_expressions(self, expressions):
+        from .models import Expression, Lesson
+        if not expressions:
+            return set()
+        lesson_keys = {(country, title) for country, title, _ in expressions if country or title}
+        lessons = {
+            (lesson.country, lesson.title): lesson
+            for lesson in Lesson.objects.filter(title__in={title for _, title in lesson_keys})
+        }
+        # Búsqueda por la columna normalizada (indexada); la clave es el texto exacto
+        existing = {
+            (expression.lesson_id, expression.text): expression
+            for expression in Expression.objects.filter(
+                text_normalized__in={normalize_text(text) for _, _, text in expressions}
+            )
+        }
+        now = timezone.now()
+        to_create, to_update = [], []
+
+        for (country, title, text), (line, record) in expressions.items():
+            lesson = None
+            if country or title:
+                lesson = lessons.get((country, title))
+                if lesson is None:
+                    raise ContentImportError(line, f'lección desconocida: {country} / {title}')
+            values = {field: _text(record, field) for field in EXPRESSION_FIELDS if field != 'is_active'}
+            values['is_active'] = _bool(line, record.get('is_active'))
+            if not values['meaning'] and not values['example']:
+                raise ContentImportError(line, 'una expresión necesita meaning o example')
+
+            expression = existing.get((lesson.pk if lesson else None, text))
+            if expression is None:
+                to_create.append(Expression(lesson=lesson, text=text, text_normalized=normalize_text(text), **values))
+            elif self.upsert:
+                for field, value in values.items():
+                    setattr(expression, field, value)
+                expression.updated_at = now
+                to_update.append(expression)
+            else:
+                self.stats['skipped'] += 1
+
+        Expression.objects.bulk_create(to_create, batch_size=self.batch_size)
+        Expression.objects.bulk_update(to_update, [*EXPRESSION_FIELDS, 'updated_at'], batch_size=self.batch_size)
+        # El texto es parte de la clave: solo las expresiones nuevas cambian de trigramas
+        index_objects(to_create)
+        self.stats['expressions_created'] += len(to_create)
+        self.stats['expressions_updated'] += len(to_update)
+        return {expression.lesson_id for expression in [*to_create, *to_update]} - {None}
+
+    def _bump_versions(self, lesson_ids, expression_lesson_ids, expressions_changed):
+        # Lo que harían las señales de save(): invalidar cachés, índices y páginas
+        from .models import Expression, Lesson
+        if lesson_ids:
+            bump_version(Lesson)
+        if expressions_changed:
+            bump_version(Expression)
+        for lesson_id in lesson_ids | expression_lesson_ids:
+            bump_version(Lesson, lesson_id)
@@ -0,0 +1,65 @@
+"""
+Versión de contenido por modelo.
+
+Cada modelo tiene un número de versión en caché que cambia cada vez que se
+guarda o se borra una de sus filas (ver core.signals). Las estructuras que se
+calculan a partir del contenido (índices en memoria, resultados en caché) guardan
+la versión con la que se construyeron y se invalidan cuando ya no coincide.
+
+También hay versiones por objeto (get_version(Lesson, pk)): la de una lección
+cambia al editarla o al cambiar sus expresiones, e invalida su página en caché.
+
+Las actualizaciones masivas con queryset.update() no emiten señales: quien las
+haga debe llamar a bump_version.
+
+Las versiones viven en la caché CONTENT_VERSION_CACHE (alias content_versions,
+configurable con CONTENT_VERSION_CACHE_BACKEND / _LOCATION). Con varios workers
+debe ser compartida: con LocMemCache cada proceso tiene su propia versión y las
+cachés que dependen de ella se limitan a minutos (CONTENT_VERSION_SHARED).
+"""
+import time
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'content_version:{label}'
+OBJECT_VERSION_KEY = 'content_version:{label}:{pk}'
+
+
+def get_cache():
+    """Caché de las versiones (CONTENT_VERSION_CACHE)"""
+    return caches[getattr(settings, 'CONTENT_VERSION_CACHE', 'content_versions')]
+
+
+def _version_key(model, pk=None):
+    if pk is None:
+        return VERSION_KEY.format(label=model._meta.label_lower)
+    return OBJECT_VERSION_KEY.format(label=model._meta.label_lower, pk=pk)
+
+
+def _initial_version():
+    # Un valor nuevo tras vaciar la caché nunca coincide con una versión anterior
+    return time.time_ns()
+
+
+def get_version(model, pk=None):
+    """Versión actual del contenido de model (o del objeto pk)"""
+    cache = get_cache()
+    key = _version_key(model, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model, pk=None):
+    """Marca como modificado el contenido de model (o del objeto pk) y devuelve la nueva versión"""
+    cache = get_cache()
+    key = _version_key(model, pk)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # La clave no existía o fue desalojada
+        version = _initial_version()
+        cache.set(key, version, timeout=None)
+        return version
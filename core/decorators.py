@@ -1,6 +1,9 @@
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from functools import wraps
+import hashlib
 from .permissions import (
     can_edit_lesson, can_delete_lesson,
     can_edit_expression, can_delete_expression,
@@ -95,4 +98,57 @@ def post_delete_required(view_func):
             messages.error(request, 'No tienes permiso para eliminar esta publicación.')
             return redirect('forum_post_detail', post_id=post.id)
         return view_func(request, *args, **kwargs)
-    return _wrapped_view 
\ No newline at end of file
+    return _wrapped_view
+
+def conditional_page(get_validators, on_not_modified=None):
+    """
+    GET condicional: si el cliente ya tiene la versión actual (If-None-Match o
+    If-Modified-Since) responde 304 sin ejecutar la vista ni renderizar la plantilla.
+    get_validators(request, *args, **kwargs) devuelve (partes, last_modified),
+    calculados con una sola consulta, o None para que responda la vista (p. ej. 404).
+    El ETag combina las partes con el usuario y su cookie CSRF, que la página incluye;
+    por eso las respuestas son privadas y el navegador revalida en cada visita
+    (private, max-age=0) en vez de reutilizarlas de una caché compartida.
+    Los contadores de visitas no forman parte del ETag: una página revalidada
+    puede mostrar un número de visitas antiguo, como una página en caché. La
+    visita sí se cuenta: on_not_modified(request, partes, *args, **kwargs) se
+    llama con cada 304, p. ej. para registrarla con record_view.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            # Con mensajes pendientes la página debe renderizarse para mostrarlos
+            if request.method not in ('GET', 'HEAD') or len(messages.get_messages(request)):
+                return view_func(request, *args, **kwargs)
+            validators = get_validators(request, *args, **kwargs)
+            if validators is None:
+                return view_func(request, *args, **kwargs)
+            parts, last_modified = validators
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            def make_etag():
+                # Débil: CompressionMiddleware puede cambiar los bytes de la respuesta
+                etag_parts = [*parts, request.user.pk, request.META.get('CSRF_COOKIE')]
+                return 'W/"%s"' % hashlib.md5(repr(etag_parts).encode()).hexdigest()
+
+            def set_validators(response):
+                if response.status_code == 200:
+                    # Después de renderizar: la primera visita recibe ahí su cookie CSRF
+                    response.headers['ETag'] = make_etag()
+                    if last_modified:
+                        response.headers['Last-Modified'] = http_date(last_modified)
+
+            response = get_conditional_response(request, etag=make_etag(), last_modified=last_modified)
+            if response is not None and on_not_modified is not None:
+                on_not_modified(request, parts, *args, **kwargs)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if getattr(response, 'is_rendered', True):
+                    set_validators(response)
+                else:
+                    # TemplateResponse de las vistas genéricas: se renderiza más tarde
+                    response.add_post_render_callback(set_validators)
+            patch_cache_control(response, private=True, max_age=0)
+            return response
+        return _wrapped_view
+    return decorator
@@ -0,0 +1,194 @@
+"""
+Conteo de publicaciones visibles por categoría para el foro y el blog.
+
+Los conteos viven en caché, una clave por categoría, y se ajustan con
+cache.incr/decr al crear, ocultar, borrar o cambiar de categoría una
+publicación (ver core.signals). Las páginas de índice los leen con un solo
+get_many sin tocar la tabla de publicaciones.
+
+Si faltan las claves (caché vacía, desalojo o expiración de FACET_COUNTS_TIMEOUT)
+se reconstruyen con un GROUP BY; así también se corrigen las desviaciones por
+actualizaciones masivas con queryset.update(), que no emiten señales.
+
+Las lecciones se filtran por país, dificultad y categoría a la vez, así que sus
+conteos dependen de los filtros actuales (get_lesson_facets): se calculan con un
+GROUP BY por dimensión y se guardan en caché con la versión de contenido de
+Lesson (core.content_version), que cambia al guardar o borrar una lección.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from .content_version import get_version
+from .text import normalize_text
+
+READY_KEY = 'facets:{label}:ready'
+COUNT_KEY = 'facets:{label}:{category}'
+LESSON_FACETS_KEY = 'facets:core.lesson:{digest}'
+
+# Filtros de LessonListView: (parámetro GET, campo, opciones)
+LESSON_FACETS = [
+    ('country', 'country', 'COUNTRY_CHOICES'),
+    ('difficulty', 'level', 'LEVEL_CHOICES'),
+    ('category', 'category', 'CATEGORY_CHOICES'),
+]
+
+
+def _faceted_models():
+    from .models import BlogPost, ForumPost
+    return {
+        ForumPost: {'is_active': True},
+        BlogPost: {'is_active': True, 'is_published': True},
+    }
+
+
+def _visibility(model):
+    return _faceted_models().get(model)
+
+
+def _ready_key(model):
+    return READY_KEY.format(label=model._meta.label_lower)
+
+
+def _count_key(model, category):
+    return COUNT_KEY.format(label=model._meta.label_lower, category=category)
+
+
+def _timeout():
+    return getattr(settings, 'FACET_COUNTS_TIMEOUT', 6 * 60 * 60)
+
+
+def is_visible(instance, values=None):
+    """
+    Indica si instance cuenta en las facetas. values permite evaluar otros
+    valores de los campos (p. ej. los cargados de la base de datos).
+    """
+    values = values or {}
+    return all(
+        values.get(field, getattr(instance, field)) == expected
+        for field, expected in _visibility(type(instance)).items()
+    )
+
+
+def facet_count_queryset(model):
+    """GROUP BY category sobre las publicaciones visibles de model"""
+    return model.objects.filter(**_visibility(model)).order_by().values('category').annotate(
+        total=Count('pk')
+    )
+
+
+def rebuild_facet_counts(model):
+    """Recalcula los conteos de model con un GROUP BY y los guarda en caché"""
+    rows = facet_count_queryset(model)
+    counts = {category: 0 for category, _ in model.CATEGORY_CHOICES}
+    counts.update({row['category']: row['total'] for row in rows})
+    # Las claves por categoría no expiran; la marca "ready" fuerza la reconstrucción periódica
+    cache.set_many({_count_key(model, category): total for category, total in counts.items()}, timeout=None)
+    cache.set(_ready_key(model), True, timeout=_timeout())
+    return counts
+
+
+def get_facet_counts(model):
+    """Devuelve {categoría: publicaciones visibles} para todas las categorías de model"""
+    keys = {_count_key(model, category): category for category, _ in model.CATEGORY_CHOICES}
+    cached = cache.get_many([_ready_key(model), *keys])
+    if not cached.pop(_ready_key(model), False) or len(cached) != len(keys):
+        return rebuild_facet_counts(model)
+    return {keys[key]: max(total, 0) for key, total in cached.items()}
+
+
+def get_category_facets(model):
+    """Lista de (valor, nombre, conteo) en el orden de CATEGORY_CHOICES, para las plantillas"""
+    counts = get_facet_counts(model)
+    return [(value, name, counts.get(value, 0)) for value, name in model.CATEGORY_CHOICES]
+
+
+def adjust_facet(model, category, delta):
+    """Suma delta al conteo de una categoría. Sin conteos en caché no hace nada"""
+    if not delta or not cache.get(_ready_key(model)):
+        return
+    try:
+        cache.incr(_count_key(model, category), delta)
+    except ValueError:
+        # La clave fue desalojada: forzar la reconstrucción en la próxima lectura
+        cache.delete(_ready_key(model))
+
+
+def track_change(instance, created=False, deleted=False):
+    """Ajusta las facetas según la transición de visibilidad o categoría de instance"""
+    model = type(instance)
+    if _visibility(model) is None:
+        return
+    loaded = {
+        field: instance.get_loaded_value(field, getattr(instance, field))
+        for field in [*_visibility(model), 'category']
+    }
+    was_visible = not created and is_visible(instance, loaded)
+    now_visible = not deleted and is_visible(instance)
+    old_category, new_category = loaded['category'], instance.category
+
+    if was_visible and now_visible and old_category != new_category:
+        adjust_facet(model, old_category, -1)
+        adjust_facet(model, new_category, 1)
+    elif was_visible != now_visible:
+        if now_visible:
+            adjust_facet(model, new_category, 1)
+        else:
+            adjust_facet(model, old_category, -1)
+
+
+def lesson_facet_queryset(field, queryset):
+    """GROUP BY field sobre las lecciones de queryset"""
+    return queryset.order_by().values(field).annotate(total=Count('pk'))
+
+
+def _lesson_facet_base(query):
+    """Lecciones visibles que coinciden con la búsqueda query (todas si está vacía)"""
+    from .models import Lesson
+    from .search import search_queryset
+    from .search_cache import filter_by_hits, get_search_hits
+    queryset = Lesson.objects.filter(is_active=True)
+    if not normalize_text(query):
+        return queryset
+    hits = get_search_hits(queryset, query, fields=['title', 'content'])
+    if hits is None:
+        return search_queryset(queryset, query, fields=['title', 'content'])
+    return filter_by_hits(queryset, hits)
+
+
+def count_lesson_facets(filters, query=''):
+    """
+    {parámetro: {valor: lecciones}}. Cada dimensión se cuenta con los demás
+    filtros aplicados, no con el suyo: así se ve cuántas lecciones quedarían al
+    cambiar ese filtro.
+    """
+    base = _lesson_facet_base(query)
+    counts = {}
+    for param, field, _ in LESSON_FACETS:
+        queryset = base.filter(**{
+            other_field: filters[other_param]
+            for other_param, other_field, _ in LESSON_FACETS
+            if other_param != param and filters.get(other_param)
+        })
+        counts[param] = {row[field]: row['total'] for row in lesson_facet_queryset(field, queryset)}
+    return counts
+
+
+def get_lesson_facets(params):
+    """
+    {parámetro: [(valor, nombre, conteo)]} para los filtros de lecciones según
+    la búsqueda y los filtros de params (request.GET), desde la caché si es posible
+    """
+    from .models import Lesson
+    filters = {param: params.get(param, '') for param, _, _ in LESSON_FACETS}
+    query = params.get('q', '')
+    parts = [get_version(Lesson), normalize_text(query), sorted(filters.items())]
+    key = LESSON_FACETS_KEY.format(digest=hashlib.md5(repr(parts).encode()).hexdigest())
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_lesson_facets(filters, query)
+        cache.set(key, counts, timeout=_timeout())
+    return {
+        param: [(value, name, counts[param].get(value, 0)) for value, name in getattr(Lesson, choices)]
+        for param, _, choices in LESSON_FACETS
+    }
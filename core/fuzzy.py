@@ -0,0 +1,179 @@
+"""
+Búsqueda aproximada de jerga con un índice de trigramas.
+
+La jerga regional se escribe de muchas formas ("chévere", "chebere", "chevre")
+y se escribe mal a menudo. Cada expresión y cada etiqueta guarda los trigramas
+de su texto normalizado en la tabla SearchTrigram (como pg_trgm: cada palabra
+se rellena con dos espacios delante y uno detrás). Una búsqueda cuenta, con un
+GROUP BY sobre el índice (source, trigram), cuántos trigramas comparte cada
+objeto con la consulta; solo se leen los candidatos, nunca la tabla completa.
+
+La similitud es la de pg_trgm: compartidos / (trigramas de la consulta +
+trigramas del candidato - compartidos). Los trigramas se mantienen con señales
+(ver core.signals) y se reconstruyen con rebuild_trigram_index.
+"""
+import math
+from collections import namedtuple
+from django.db import transaction
+from django.db.models import Count
+from .text import normalize_text
+
+SIMILARITY_THRESHOLD = 0.3
+# Candidatos con más trigramas compartidos que se comparan en Python
+MAX_CANDIDATES = 50
+MAX_QUERY_LENGTH = 100
+
+TrigramSource = namedtuple('TrigramSource', ['name', 'model_label', 'field', 'display_field'])
+
+TRIGRAM_SOURCES = [
+    TrigramSource('expression', 'core.Expression', 'text_normalized', 'text'),
+    TrigramSource('tag', 'core.Tag', 'name_normalized', 'name'),
+]
+
+
+def trigrams(text):
+    """Conjunto de trigramas de text normalizado"""
+    grams = set()
+    for word in normalize_text(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(first, second):
+    """Similitud de trigramas entre dos textos, de 0 a 1"""
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def get_trigram_source(model):
+    for source in TRIGRAM_SOURCES:
+        if source.model_label.lower() == model._meta.label_lower:
+            return source
+    return None
+
+
+def _source_model(source):
+    from django.apps import apps
+    return apps.get_model(source.model_label)
+
+
+def index_object(obj):
+    """Reemplaza los trigramas de obj"""
+    from .models import SearchTrigram
+    source = get_trigram_source(type(obj))
+    with transaction.atomic():
+        SearchTrigram.objects.filter(source=source.name, object_id=obj.pk).delete()
+        SearchTrigram.objects.bulk_create([
+            SearchTrigram(source=source.name, object_id=obj.pk, trigram=gram)
+            for gram in trigrams(getattr(obj, source.field))
+        ])
+
+
+def index_objects(objects):
+    """Reemplaza los trigramas de varios objetos del mismo modelo (importaciones en lote)"""
+    from .models import SearchTrigram
+    objects = list(objects)
+    if not objects:
+        return
+    source = get_trigram_source(type(objects[0]))
+    with transaction.atomic():
+        SearchTrigram.objects.filter(source=source.name, object_id__in=[obj.pk for obj in objects]).delete()
+        SearchTrigram.objects.bulk_create([
+            SearchTrigram(source=source.name, object_id=obj.pk, trigram=gram)
+            for obj in objects
+            for gram in trigrams(getattr(obj, source.field))
+        ])
+
+
+def unindex_object(obj):
+    """Borra los trigramas de obj"""
+    from .models import SearchTrigram
+    source = get_trigram_source(type(obj))
+    SearchTrigram.objects.filter(source=source.name, object_id=obj.pk).delete()
+
+
+def rebuild_trigram_index(batch_size=1000):
+    """Recalcula todos los trigramas. Devuelve {source: objetos indexados}"""
+    from .models import SearchTrigram
+    indexed = {}
+    for source in TRIGRAM_SOURCES:
+        model = _source_model(source)
+        with transaction.atomic():
+            SearchTrigram.objects.filter(source=source.name).delete()
+            rows = []
+            count = 0
+            for pk, text in model.objects.values_list('pk', source.field).iterator(chunk_size=batch_size):
+                rows.extend(
+                    SearchTrigram(source=source.name, object_id=pk, trigram=gram)
+                    for gram in trigrams(text)
+                )
+                count += 1
+                if len(rows) >= batch_size:
+                    SearchTrigram.objects.bulk_create(rows)
+                    rows = []
+            SearchTrigram.objects.bulk_create(rows)
+        indexed[source.name] = count
+    return indexed
+
+
+def candidate_queryset(model, query, threshold=SIMILARITY_THRESHOLD):
+    """
+    Filas {object_id, shared} de los objetos de model que comparten con query
+    suficientes trigramas para alcanzar threshold, los que más comparten primero.
+    """
+    from .models import SearchTrigram
+    source = get_trigram_source(model)
+    grams = trigrams((query or '')[:MAX_QUERY_LENGTH])
+    if source is None or not grams:
+        return SearchTrigram.objects.none()
+    # similarity >= threshold exige al menos threshold * |consulta| trigramas compartidos
+    min_shared = max(1, math.ceil(threshold * len(grams)))
+    return SearchTrigram.objects.filter(
+        source=source.name, trigram__in=grams
+    ).values('object_id').annotate(shared=Count('pk')).filter(
+        shared__gte=min_shared
+    ).order_by('-shared', 'object_id')[:MAX_CANDIDATES]
+
+
+def fuzzy_search(model, query, limit=10, threshold=SIMILARITY_THRESHOLD):
+    """
+    Objetos activos de model parecidos a query, del más al menos parecido.
+    Cada objeto trae el atributo similarity.
+    """
+    if limit <= 0:
+        return []
+    shared = {row['object_id']: row['shared'] for row in candidate_queryset(model, query, threshold)}
+    if not shared:
+        return []
+
+    source = get_trigram_source(model)
+    query_size = len(trigrams((query or '')[:MAX_QUERY_LENGTH]))
+    results = []
+    for obj in model.objects.filter(pk__in=shared, is_active=True):
+        total = query_size + len(trigrams(getattr(obj, source.field))) - shared[obj.pk]
+        obj.similarity = shared[obj.pk] / total if total else 0.0
+        if obj.similarity >= threshold:
+            results.append(obj)
+    results.sort(key=lambda obj: (-obj.similarity, getattr(obj, source.field), obj.pk))
+    return results[:limit]
+
+
+def did_you_mean(query, threshold=SIMILARITY_THRESHOLD):
+    """
+    Texto de la expresión o etiqueta más parecida a query, o None si no hay
+    ninguna suficientemente parecida o si coincide con la consulta.
+    """
+    normalized = normalize_text(query)
+    best = None
+    for source in TRIGRAM_SOURCES:
+        for obj in fuzzy_search(_source_model(source), query, limit=5, threshold=threshold):
+            if getattr(obj, source.field) == normalized:
+                continue
+            if best is None or obj.similarity > best[0]:
+                best = (obj.similarity, getattr(obj, source.display_field))
+            break
+    return best[1] if best else None
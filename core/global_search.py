@@ -0,0 +1,150 @@
+"""
+Búsqueda unificada en lecciones, expresiones, foro y blog.
+
+Cada tipo de contenido es una sección con su propia consulta FTS5 (ver
+core.search) y su propio límite de resultados. Las secciones se ejecutan en
+paralelo en un pool de hilos, de modo que la página tarda lo que la consulta
+más lenta y no la suma de todas. SEARCH_TIME_BUDGET limita el tiempo total: las
+secciones que no terminan a tiempo se devuelven vacías y marcadas timed_out.
+
+El pool es compartido por todas las peticiones del proceso. Una sección solo se
+envía al pool si hay un hilo libre (semáforo con tantas plazas como hilos), así
+que nunca espera en cola; si el pool está ocupado, la sección se ejecuta en el
+hilo de la petición. Una sección que agota el presupuesto sigue ocupando su hilo
+hasta terminar (las consultas no se interrumpen), pero no retrasa a las demás.
+
+Cada hilo usa su propia conexión a la base de datos, que cierra al terminar la
+sección, y que no ve una transacción abierta en el hilo de la petición
+(ATOMIC_REQUESTS, tests); en ese caso las secciones se ejecutan en secuencia
+dentro de la petición.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from django.conf import settings
+from django.db import close_old_connections, connection
+from .search import search_queryset
+from .search_cache import SearchResultList, get_search_hits
+
+logger = logging.getLogger(__name__)
+
+SearchSection = namedtuple('SearchSection', ['name', 'label', 'limit', 'queryset', 'fields'])
+SectionResult = namedtuple('SectionResult', ['name', 'label', 'results', 'timed_out'])
+
+
+def _lessons():
+    from .models import Lesson
+    return Lesson.objects.filter(is_active=True).select_related('user')
+
+
+def _expressions():
+    from .models import Expression
+    return Expression.objects.filter(is_active=True).select_related('lesson')
+
+
+def _forum_posts():
+    from .models import ForumPost
+    return ForumPost.objects.filter(is_active=True).select_related('author')
+
+
+def _blog_posts():
+    from .models import BlogPost
+    return BlogPost.objects.filter(is_active=True, is_published=True).select_related('author')
+
+
+SEARCH_SECTIONS = [
+    SearchSection('lessons', 'Lecciones', 6, _lessons, ['title', 'content']),
+    SearchSection('expressions', 'Expresiones', 8, _expressions, ['text', 'meaning', 'example']),
+    SearchSection('posts', 'Posts del Foro', 6, _forum_posts, ['title', 'content']),
+    SearchSection('blog_posts', 'Artículos del Blog', 4, _blog_posts, ['title', 'excerpt', 'content']),
+]
+
+_executor = None
+# Hilos libres del pool
+_free_workers = None
+_executor_lock = threading.Lock()
+
+
+def _time_budget():
+    return getattr(settings, 'SEARCH_TIME_BUDGET', 2.0)
+
+
+def _get_executor():
+    """(pool, semáforo de hilos libres)"""
+    global _executor, _free_workers
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = getattr(settings, 'SEARCH_MAX_WORKERS', len(SEARCH_SECTIONS) * 2)
+                _free_workers = threading.BoundedSemaphore(max_workers)
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search')
+    return _executor, _free_workers
+
+
+def search_section(section, query):
+    """Resultados de una sección, ordenados por relevancia (coincidencias en caché, ver core.search_cache)"""
+    queryset = section.queryset()
+    hits = get_search_hits(queryset, query, fields=section.fields)
+    if hits is None:
+        return list(search_queryset(queryset, query, fields=section.fields)[:section.limit])
+    return SearchResultList(queryset, hits)[:section.limit]
+
+
+def _search_section_in_thread(section, query, free_workers):
+    close_old_connections()
+    try:
+        return search_section(section, query)
+    finally:
+        # El hilo puede tardar en volver a usarse: no dejar la conexión abierta
+        connection.close()
+        free_workers.release()
+
+
+def _run_sequential(sections, query, deadline):
+    results = {}
+    for section in sections:
+        if time.monotonic() >= deadline:
+            break
+        results[section.name] = search_section(section, query)
+    return results
+
+
+def _run_concurrent(sections, query, deadline):
+    executor, free_workers = _get_executor()
+    futures, inline = {}, []
+    for section in sections:
+        if free_workers.acquire(blocking=False):
+            futures[executor.submit(_search_section_in_thread, section, query, free_workers)] = section
+        else:
+            inline.append(section)
+    # Pool ocupado por otras peticiones: el resto de secciones, en este hilo
+    results = _run_sequential(inline, query, deadline)
+    # Las secciones que no terminan a tiempo siguen en su hilo; su resultado se descarta
+    done, _ = wait(futures, timeout=max(0, deadline - time.monotonic()))
+    for future in done:
+        section = futures[future]
+        try:
+            results[section.name] = future.result()
+        except Exception:
+            logger.exception('Error en la búsqueda de %s', section.name)
+            results[section.name] = []
+    return results
+
+
+def search_all(query, sections=None, budget=None):
+    """
+    Busca query en todas las secciones y devuelve una lista de SectionResult
+    en el orden de SEARCH_SECTIONS.
+    """
+    sections = SEARCH_SECTIONS if sections is None else sections
+    deadline = time.monotonic() + (_time_budget() if budget is None else budget)
+    if connection.in_atomic_block:
+        results = _run_sequential(sections, query, deadline)
+    else:
+        results = _run_concurrent(sections, query, deadline)
+    return [
+        SectionResult(section.name, section.label, results.get(section.name, []), section.name not in results)
+        for section in sections
+    ]
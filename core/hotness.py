@@ -0,0 +1,63 @@
+"""
+Puntuación de popularidad ("hot") de las publicaciones del foro.
+
+Se usa la fórmula de Reddit: log10(interacciones) + antigüedad / HOT_DECAY_SECONDS.
+La parte temporal hace que una publicación necesite 10 veces más interacciones
+para igualar a otra publicada HOT_DECAY_SECONDS después, lo que equivale a un
+decaimiento con el tiempo, pero sin que la puntuación de una publicación cambie
+mientras no reciba interacciones. Por eso puede guardarse en ForumPost.hot_score
+con un índice y el top N es un recorrido de rango sobre ese índice.
+
+La puntuación se recalcula al cambiar likes o comentarios (ver core.signals y
+core.likes) y el comando rebuild_hot_scores la recalcula por completo.
+"""
+import datetime
+import math
+from django.db.models import Case, FloatField, Value, When
+
+HOT_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+HOT_DECAY_SECONDS = 45000  # 12,5 horas
+
+
+def hot_score(likes_count, comments_count, created_at):
+    """Calcula la puntuación hot a partir de los contadores y la fecha de creación"""
+    interactions = max(likes_count + comments_count, 1)
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(interactions) + age / HOT_DECAY_SECONDS, 7)
+
+
+def update_hot_scores(*post_ids):
+    """
+    Recalcula hot_score de las publicaciones indicadas: una consulta para leer
+    los contadores y un único UPDATE para todas.
+    """
+    from .models import ForumPost
+    rows = ForumPost.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'likes_count', 'comments_count', 'created_at'
+    )
+    scores = {pk: hot_score(likes, comments, created_at) for pk, likes, comments, created_at in rows}
+    if not scores:
+        return 0
+    return ForumPost.objects.filter(pk__in=scores).update(hot_score=Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        output_field=FloatField(),
+    ))
+
+
+def rebuild_hot_scores(batch_size=1000):
+    """Recalcula hot_score de todas las publicaciones por lotes. Devuelve cuántas cambiaron"""
+    from .models import ForumPost
+    changed = []
+    updated = 0
+    posts = ForumPost.objects.only('pk', 'likes_count', 'comments_count', 'created_at', 'hot_score')
+    for post in posts.iterator(chunk_size=batch_size):
+        score = hot_score(post.likes_count, post.comments_count, post.created_at)
+        if score != post.hot_score:
+            post.hot_score = score
+            changed.append(post)
+        if len(changed) >= batch_size:
+            updated += ForumPost.objects.bulk_update(changed, ['hot_score'])
+            changed = []
+    if changed:
+        updated += ForumPost.objects.bulk_update(changed, ['hot_score'])
+    return updated
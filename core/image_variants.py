@@ -0,0 +1,224 @@
+"""
+Variantes redimensionadas de las imágenes subidas (portadas de lecciones,
+imágenes del blog y avatares).
+
+Cuando cambia la imagen de un objeto (ver core.signals), Pillow genera
+versiones JPEG y WebP a los anchos de IMAGE_VARIANT_WIDTHS que no superan el
+ancho del original (nunca se amplía). Se guardan junto a las demás subidas, en
+variants/<ruta original>_<ancho>w.<formato>, y se borran las de la imagen
+anterior. El nombre se deduce del original, así que la plantilla construye el
+srcset sin consultar la base de datos (etiqueta responsive_image en
+custom_filters); los anchos que existen se guardan en caché por imagen.
+
+La generación se ejecuta tras el commit en un hilo aparte (IMAGE_VARIANTS_ASYNC),
+fuera de la petición que sube la imagen; hasta que termina, la plantilla usa el
+original. El comando generate_image_variants genera las variantes de las
+imágenes subidas antes de que existieran (o las regenera con --force).
+"""
+import io
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+VARIANTS_DIR = 'variants'
+WIDTHS_CACHE_KEY = 'image_variants:{name}'
+# (formato de Pillow, extensión, tipo MIME, opciones de guardado). El JPEG de cada
+# ancho se escribe el último: su existencia indica que el ancho está completo
+VARIANT_FORMATS = [
+    ('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 4}),
+    ('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+# Campo de imagen de cada modelo con variantes
+IMAGE_FIELDS = {
+    'core.lesson': 'cover_image',
+    'core.blogpost': 'featured_image',
+    'core.userprofile': 'avatar',
+}
+# Orientaciones EXIF que giran la foto 90°: el ancho visible es la altura guardada
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 960]))
+
+
+def image_field_name(model):
+    """Nombre del campo con variantes de model, o None"""
+    return IMAGE_FIELDS.get(model._meta.label_lower)
+
+
+def variant_name(name, width, extension):
+    """Ruta de la variante de name a width píxeles con la extensión dada"""
+    root, _ = posixpath.splitext(name)
+    return f'{VARIANTS_DIR}/{root}_{width}w.{extension}'
+
+
+def _widths_cache_key(name):
+    return WIDTHS_CACHE_KEY.format(name=name)
+
+
+def available_widths(storage, name):
+    """Anchos con variantes completas de name (en caché una vez que existen)"""
+    key = _widths_cache_key(name)
+    widths = cache.get(key)
+    if widths is None:
+        widths = [width for width in variant_widths() if storage.exists(variant_name(name, width, 'jpg'))]
+        if widths:
+            # Sin variantes todavía no se guarda: pueden estar generándose
+            cache.set(key, widths, 24 * 60 * 60)
+    return widths
+
+
+def _oriented_width(image):
+    if image.getexif().get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS:
+        return image.height
+    return image.width
+
+
+def _to_rgb(image):
+    # Primer fotograma de los GIF animados; orientación de la foto según EXIF
+    image.seek(0)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG no tiene transparencia: fondo blanco
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(storage, name, force=False):
+    """
+    Genera las variantes de name que falten (todas con force), a los anchos que
+    no superan el original. Devuelve cuántas escribió; una imagen que no se puede
+    leer no genera ninguna.
+    """
+    try:
+        with storage.open(name, 'rb') as file:
+            # Image.open solo lee la cabecera: si no falta nada no se decodifica
+            image = Image.open(file)
+            original_width = _oriented_width(image)
+            pending = [
+                (width, pillow_format, options, variant_name(name, width, extension))
+                for width in variant_widths() if width <= original_width
+                for pillow_format, extension, _, options in VARIANT_FORMATS
+            ]
+            if not force:
+                pending = [variant for variant in pending if not storage.exists(variant[3])]
+            if not pending:
+                return 0
+            image = _to_rgb(image)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning('No se pudieron generar variantes de %s', name, exc_info=True)
+        return 0
+
+    resized = {}
+    for width, pillow_format, options, path in pending:
+        if width not in resized:
+            height = max(1, round(image.height * width / image.width))
+            resized[width] = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized[width].save(buffer, pillow_format, **options)
+        if storage.exists(path):
+            storage.delete(path)
+        storage.save(path, ContentFile(buffer.getvalue()))
+    cache.delete(_widths_cache_key(name))
+    return len(pending)
+
+
+def delete_variants(storage, name):
+    """Borra las variantes de name (p. ej. al reemplazar la imagen)"""
+    for width in variant_widths():
+        for _, extension, _, _ in VARIANT_FORMATS:
+            path = variant_name(name, width, extension)
+            if storage.exists(path):
+                storage.delete(path)
+    cache.delete(_widths_cache_key(name))
+
+
+def generate_instance_variants(instance, force=False):
+    """Genera ahora las variantes de la imagen de instance si su modelo las tiene"""
+    field_name = image_field_name(type(instance))
+    if field_name is None:
+        return 0
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return 0
+    return generate_variants(field_file.storage, field_file.name, force=force)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Un solo hilo: las imágenes se procesan de una en una, sin competir con las peticiones
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-variants')
+    return _executor
+
+
+def _replace_variants(storage, old_name, new_name):
+    try:
+        if old_name:
+            delete_variants(storage, old_name)
+        if new_name:
+            generate_variants(storage, new_name)
+    except Exception:
+        logger.exception('Error al actualizar las variantes de %s', new_name or old_name)
+
+
+def update_instance_variants(instance):
+    """
+    Si cambió la imagen de instance, borra las variantes de la anterior y genera
+    las de la nueva tras el commit, en segundo plano (o en el momento si
+    IMAGE_VARIANTS_ASYNC es False)
+    """
+    field_name = image_field_name(type(instance))
+    if field_name is None:
+        return
+    field_file = getattr(instance, field_name)
+    # Tras guardar, el valor cargado es el FieldFile; al leer de la base de datos, su nombre
+    old_name = str(instance.get_loaded_value(field_name) or '')
+    new_name = field_file.name or ''
+    if old_name == new_name:
+        return
+    storage = field_file.storage
+    if not getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+        _replace_variants(storage, old_name, new_name)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_replace_variants, storage, old_name, new_name))
+
+
+def wait_for_variants():
+    """Espera a que terminen las variantes en segundo plano (comandos y tests)"""
+    _get_executor().submit(lambda: None).result()
+
+
+def srcsets(field_file):
+    """
+    {tipo MIME: srcset} de las variantes de field_file, o {} si aún no existen
+    (la plantilla usa entonces la imagen original)
+    """
+    if not field_file:
+        return {}
+    storage = field_file.storage
+    widths = available_widths(storage, field_file.name)
+    return {
+        mime_type: ', '.join(
+            f'{storage.url(variant_name(field_file.name, width, extension))} {width}w'
+            for width in widths
+        )
+        for _, extension, mime_type, _ in VARIANT_FORMATS
+    } if widths else {}
@@ -0,0 +1,87 @@
+"""
+Alternar "me gusta" sobre ForumPost, BlogPost y Comment con costo constante.
+
+En vez de cargar la relación completa (request.user in post.likes.all()) se
+trabaja directamente sobre la tabla intermedia, cuyo índice único
+(objeto, usuario) resuelve el borrado y la inserción. El contador
+desnormalizado likes_count se ajusta en la misma transacción y es el que se
+devuelve, así que alternar un like cuesta lo mismo con 5 o con 50.000 likes.
+"""
+from django.db import IntegrityError, transaction
+from .hotness import update_hot_scores
+from .models import ForumPost
+from .signals import adjust_counter
+
+
+def _through_filter(obj, user):
+    through = type(obj).likes.through
+    source_field = through._meta.get_field(type(obj)._meta.model_name).attname
+    return through, {source_field: obj.pk, 'user_id': user.pk}
+
+
+def toggle_like(obj, user):
+    """
+    Da o quita el "me gusta" de user sobre obj.
+    Devuelve (liked, likes_count) tras el cambio.
+    """
+    model = type(obj)
+    through, filters = _through_filter(obj, user)
+
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**filters).delete()
+        if deleted:
+            liked = False
+            adjust_counter(model, 'likes_count', -1, pk=obj.pk)
+        else:
+            liked = True
+            try:
+                with transaction.atomic():
+                    through.objects.create(**filters)
+            except IntegrityError:
+                # Otra petición concurrente ya insertó el mismo like
+                pass
+            else:
+                adjust_counter(model, 'likes_count', 1, pk=obj.pk)
+
+        # Las operaciones directas sobre la tabla intermedia no disparan
+        # m2m_changed: el contador se ajustó arriba y se lee aquí
+        likes_count = model.objects.filter(pk=obj.pk).values_list('likes_count', flat=True).get()
+        if model is ForumPost:
+            update_hot_scores(obj.pk)
+
+    obj.likes_count = likes_count
+    return liked, likes_count
+
+
+def liked_ids(user, model, ids):
+    """
+    Devuelve el conjunto de ids de model (entre ids) a los que user dio "me gusta",
+    con una sola consulta sobre la tabla intermedia.
+    """
+    ids = [pk for pk in ids if pk is not None]
+    if not ids or not user.is_authenticated:
+        return set()
+    through = model.likes.through
+    source_field = through._meta.get_field(model._meta.model_name).attname
+    return set(through.objects.filter(
+        user_id=user.pk, **{f'{source_field}__in': ids}
+    ).values_list(source_field, flat=True))
+
+
+def mark_liked(user, objects):
+    """
+    Asigna user_liked a cada objeto de la lista (todos del mismo modelo) con
+    una sola consulta, para que la plantilla no consulte la relación por objeto.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    liked = liked_ids(user, type(objects[0]), [obj.pk for obj in objects])
+    for obj in objects:
+        obj.user_liked = obj.pk in liked
+    return objects
+
+
+def user_has_liked(obj, user):
+    """Comprueba el like de user sobre obj con una búsqueda por índice"""
+    return obj.pk in liked_ids(user, type(obj), [obj.pk])
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from core.content_io import FORMATS, detect_format, export_records, write_records
+
+
+class Command(BaseCommand):
+    help = 'Exporta lecciones y expresiones a JSONL o CSV (en flujo, con memoria constante)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Archivo de salida ("-" para la salida estándar)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Formato (por defecto, según la extensión del archivo; JSONL si no es .csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Filas leídas por consulta',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output']
+        fmt = detect_format(path, options['format'])
+        records = export_records(options['batch_size'])
+        if path == '-':
+            write_records(records, self.stdout, fmt)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            count = write_records(records, stream, fmt)
+        self.stdout.write(self.style.SUCCESS(f'✅ {count} registros exportados a {path}'))
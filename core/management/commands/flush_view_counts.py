@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.view_counts import flush_view_counts
+
+
+class Command(BaseCommand):
+    help = 'Vuelca a la base de datos las visitas acumuladas en caché (ejecutar periódicamente)'
+
+    def handle(self, *args, **options):
+        total = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} visitas volcadas a la base de datos'))
@@ -0,0 +1,37 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core.image_variants import IMAGE_FIELDS, generate_instance_variants
+
+
+class Command(BaseCommand):
+    help = 'Genera las variantes redimensionadas (JPEG y WebP) de las imágenes ya subidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=[label.split('.')[1] for label in IMAGE_FIELDS],
+            help='Solo las imágenes de este modelo',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenera también las variantes que ya existen (p. ej. tras cambiar IMAGE_VARIANT_WIDTHS)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🖼️ Generando variantes de imágenes...')
+        for label, field_name in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            if options['model'] and model._meta.model_name != options['model']:
+                continue
+            images = written = 0
+            queryset = (
+                model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .only('pk', field_name).order_by('pk')
+            )
+            for instance in queryset.iterator(chunk_size=500):
+                count = generate_instance_variants(instance, force=options['force'])
+                images += bool(count)
+                written += count
+            self.stdout.write(f'   - {model.__name__}: {images} imágenes, {written} variantes escritas')
+        self.stdout.write(self.style.SUCCESS('✅ Variantes de imágenes generadas'))
@@ -0,0 +1,80 @@
+import sys
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from core.content_io import FORMATS, ContentImporter, ContentImportError, detect_format, read_records
+
+
+class Command(BaseCommand):
+    help = 'Importa lecciones y expresiones desde JSONL o CSV en lotes (ver core/content_io.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Archivo a importar ("-" para la entrada estándar)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Formato (por defecto, según la extensión del archivo; JSONL si no es .csv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Registros por lote (cada lote es una transacción)',
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Actualizar las lecciones y expresiones existentes (misma clave natural) en vez de omitirlas',
+        )
+        parser.add_argument(
+            '--user',
+            help='Usuario autor de las lecciones nuevas sin columna user',
+        )
+        parser.add_argument(
+            '--start-line',
+            type=int,
+            default=1,
+            help='Línea del archivo desde la que empezar (para reanudar tras un error)',
+        )
+
+    def handle(self, *args, **options):
+        default_user = None
+        if options['user']:
+            try:
+                default_user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"El usuario {options['user']} no existe")
+
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        importer = ContentImporter(options['batch_size'], options['upsert'], default_user)
+        self.stdout.write(f'📥 Importando {path} ({fmt})...')
+        try:
+            if path == '-':
+                self.import_stream(importer, sys.stdin, fmt, options['start_line'])
+            else:
+                with open(path, encoding='utf-8', newline='') as stream:
+                    self.import_stream(importer, stream, fmt, options['start_line'])
+        except ContentImportError as error:
+            self.write_stats(importer.stats)
+            raise CommandError(
+                f'{error}. Los lotes anteriores se guardaron; '
+                f'reanuda con --start-line {error.resume_line}'
+            )
+        self.write_stats(importer.stats)
+        self.stdout.write(self.style.SUCCESS('✅ Importación completada'))
+
+    def import_stream(self, importer, stream, fmt, start_line):
+        importer.run(read_records(stream, fmt, start_line), progress=self.write_progress)
+
+    def write_progress(self, line, stats):
+        self.stdout.write(f"   - línea {line}: {stats['records']} registros procesados")
+
+    def write_stats(self, stats):
+        self.stdout.write(
+            f"   Lecciones: {stats['lessons_created']} creadas, {stats['lessons_updated']} actualizadas; "
+            f"expresiones: {stats['expressions_created']} creadas, {stats['expressions_updated']} actualizadas; "
+            f"{stats['skipped']} omitidas"
+        )
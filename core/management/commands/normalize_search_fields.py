@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core.text import normalize_text
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las columnas normalizadas de búsqueda (sin tildes ni puntuación)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Filas por lote de actualización',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔤 Normalizando campos de búsqueda...')
+        batch_size = options['batch_size']
+
+        for model in apps.get_app_config('core').get_models():
+            normalized_fields = getattr(model, 'normalized_fields', None)
+            if not normalized_fields:
+                continue
+            fields = ['pk', *normalized_fields, *normalized_fields.values()]
+            changed = []
+            updated = 0
+            for obj in model.objects.only(*fields).iterator(chunk_size=batch_size):
+                stale = False
+                for target, source in normalized_fields.items():
+                    value = normalize_text(getattr(obj, source))
+                    if getattr(obj, target) != value:
+                        setattr(obj, target, value)
+                        stale = True
+                if stale:
+                    changed.append(obj)
+                if len(changed) >= batch_size:
+                    updated += model.objects.bulk_update(changed, list(normalized_fields))
+                    changed = []
+            if changed:
+                updated += model.objects.bulk_update(changed, list(normalized_fields))
+            self.stdout.write(f'   - {model._meta.verbose_name_plural}: {updated} filas actualizadas')
+
+        self.stdout.write(self.style.SUCCESS('✅ Campos normalizados actualizados'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from core.models import ForumPost, Comment, BlogPost
+
+
+def count_subquery(queryset, field_name):
+    """Subconsulta correlacionada que cuenta las filas relacionadas con OuterRef('pk')"""
+    counts = queryset.filter(**{field_name: OuterRef('pk')}).order_by().values(field_name)
+    counts = counts.annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores desnormalizados de comentarios y likes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar cuántas filas tienen contadores desactualizados',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔢 Recalculando contadores...')
+
+        targets = [
+            (ForumPost, {
+                'comments_count': count_subquery(Comment.objects.filter(is_active=True), 'post'),
+                'likes_count': count_subquery(ForumPost.likes.through.objects.all(), 'forumpost'),
+            }),
+            (Comment, {
+                'likes_count': count_subquery(Comment.likes.through.objects.all(), 'comment'),
+            }),
+            (BlogPost, {
+                'likes_count': count_subquery(BlogPost.likes.through.objects.all(), 'blogpost'),
+            }),
+        ]
+
+        for model, counters in targets:
+            name = model._meta.verbose_name_plural
+            if options['dry_run']:
+                rows = model.objects.annotate(
+                    **{f'real_{field}': expression for field, expression in counters.items()}
+                ).values('pk', *counters, *[f'real_{field}' for field in counters])
+                stale = sum(
+                    1 for row in rows.iterator()
+                    if any(row[field] != row[f'real_{field}'] for field in counters)
+                )
+                self.stdout.write(f'   - {name}: {stale} filas desactualizadas')
+            else:
+                # Un único UPDATE por modelo, sin cargar filas en Python
+                updated = model.objects.update(**counters)
+                self.stdout.write(f'   - {name}: {updated} filas recalculadas')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('✅ Revisión completada (sin cambios)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Contadores actualizados'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core.hotness import rebuild_hot_scores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la puntuación de popularidad (hot_score) de todas las publicaciones del foro'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Publicaciones por lote de actualización',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔥 Recalculando popularidad de publicaciones...')
+        updated = rebuild_hot_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {updated} publicaciones actualizadas'))
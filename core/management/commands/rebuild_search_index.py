@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.search import fts_available, install_search_indexes
+
+
+class Command(BaseCommand):
+    help = 'Crea (si faltan) y reconstruye los índices de búsqueda FTS5 con los datos existentes'
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING('⚠️ La base de datos no soporta FTS5; la búsqueda usa icontains'))
+            return
+        self.stdout.write('🔎 Reconstruyendo índices de búsqueda...')
+        for index in install_search_indexes(rebuild=True):
+            self.stdout.write(f'   - {index.table}')
+        self.stdout.write(self.style.SUCCESS('✅ Índices de búsqueda reconstruidos'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from core.fuzzy import rebuild_trigram_index
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el índice de trigramas de expresiones y etiquetas (búsqueda aproximada)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Trigramas por lote de inserción',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔡 Reconstruyendo índice de trigramas...')
+        for source, count in rebuild_trigram_index(options['batch_size']).items():
+            self.stdout.write(f'   - {source}: {count} objetos indexados')
+        self.stdout.write(self.style.SUCCESS('✅ Índice de trigramas reconstruido'))
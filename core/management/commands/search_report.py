@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import SearchLog
+from core.search_log import flush_search_log, latency_percentiles, search_log_queryset, top_queries
+
+
+class Command(BaseCommand):
+    help = 'Informe de búsquedas: percentiles de latencia, búsquedas frecuentes y sin resultados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Días hacia atrás a incluir',
+        )
+        parser.add_argument(
+            '--source',
+            help='Solo búsquedas de este origen (lesson, forumpost, search, search_posts)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Búsquedas a mostrar en cada lista',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Borrar los registros anteriores al periodo del informe',
+        )
+
+    def handle(self, *args, **options):
+        days, limit = options['days'], options['limit']
+        # Las búsquedas de este proceso (p. ej. desde call_command) aún en el buffer
+        flush_search_log()
+        queryset = search_log_queryset(days, options['source'])
+        self.stdout.write(f'🔎 Búsquedas de los últimos {days} días: {queryset.count()}')
+
+        percentiles = latency_percentiles(queryset)
+        if percentiles:
+            self.stdout.write('\n⏱️ Latencia:')
+            for percentile, elapsed_ms in percentiles.items():
+                self.stdout.write(f'   - p{percentile}: {elapsed_ms:.1f} ms')
+
+        self.stdout.write('\n🔥 Búsquedas más frecuentes:')
+        for row in top_queries(queryset, limit):
+            self.stdout.write(
+                f"   - {row['query']}: {row['total']} veces, "
+                f"{row['avg_hits']:.0f} resultados, {row['avg_ms']:.1f} ms de media"
+            )
+
+        self.stdout.write('\n🚫 Búsquedas sin resultados:')
+        for row in top_queries(queryset.filter(hits=0), limit):
+            self.stdout.write(f"   - {row['query']}: {row['total']} veces")
+
+        if options['prune']:
+            deleted, _ = SearchLog.objects.filter(
+                created_at__lt=timezone.now() - timezone.timedelta(days=days)
+            ).delete()
+            self.stdout.write(f'\n🧹 Registros antiguos borrados: {deleted}')
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Informe completado'))
@@ -0,0 +1,138 @@
+"""
+Servir archivos de MEDIA_ROOT con soporte de peticiones Range.
+
+Los reproductores de audio piden trozos del archivo (Range: bytes=...) al
+avanzar o retroceder; sin respuesta 206 vuelven a descargar el archivo entero.
+
+Tipos de respuesta:
+  - Un solo rango: RangeFile limita la lectura al rango. Con wsgi.file_wrapper,
+    el servidor WSGI puede enviarlo con sendfile (gunicorn usa Content-Length
+    como número de bytes).
+  - Varios rangos: cuerpo multipart/byteranges generado por partes.
+  - Con MEDIA_SENDFILE ('x-sendfile' o 'x-accel-redirect'): la vista solo
+    comprueba el archivo y delega el envío (y los rangos) en Apache o nginx.
+"""
+import os
+import re
+from django.conf import settings
+from django.utils.crypto import get_random_string
+
+RANGE_PATTERN = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+BLOCK_SIZE = 64 * 1024
+# Más rangos que esto no es un reproductor sino un intento de fragmentar la respuesta
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """Ningún rango de la cabecera Range cabe en el archivo (respuesta 416)"""
+
+
+def file_etag(stat):
+    """ETag fuerte a partir del tamaño y la fecha de modificación del archivo"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range_header(header, size):
+    """
+    Rangos (inicio, fin) inclusivos de una cabecera "bytes=0-99,200-", o None
+    si la cabecera no es válida (se ignora y se envía el archivo completo).
+    Lanza RangeNotSatisfiable si ningún rango cabe en size bytes.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        match = RANGE_PATTERN.match(spec)
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':
+            # Sufijo: los últimos N bytes
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(0, size - length), size - 1))
+            continue
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable
+    return ranges
+
+
+class RangeFile:
+    """
+    Vista de solo lectura de length bytes de file desde start. Expone fileno()
+    para que el servidor WSGI pueda usar sendfile desde la posición actual.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def multipart_boundary():
+    return get_random_string(24)
+
+
+def _part_header(boundary, content_type, start, end, size):
+    return (
+        f'\r\n--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+    ).encode()
+
+
+def iter_byteranges(file, ranges, size, content_type, boundary):
+    """Cuerpo multipart/byteranges con cada rango como una parte"""
+    try:
+        for start, end in ranges:
+            yield _part_header(boundary, content_type, start, end, size)
+            part = RangeFile(file, start, end - start + 1)
+            for block in iter(lambda: part.read(BLOCK_SIZE), b''):
+                yield block
+        yield f'\r\n--{boundary}--\r\n'.encode()
+    finally:
+        file.close()
+
+
+def byteranges_length(ranges, size, content_type, boundary):
+    """Content-Length del cuerpo de iter_byteranges sin generarlo"""
+    total = len(f'\r\n--{boundary}--\r\n')
+    for start, end in ranges:
+        total += len(_part_header(boundary, content_type, start, end, size)) + end - start + 1
+    return total
+
+
+def sendfile_mode():
+    """None, 'x-sendfile' o 'x-accel-redirect' según MEDIA_SENDFILE"""
+    return getattr(settings, 'MEDIA_SENDFILE', None)
+
+
+def accel_redirect_location(path):
+    """URL interna de nginx para path (location internal con alias a MEDIA_ROOT)"""
+    prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+    return prefix.rstrip('/') + '/' + path.replace(os.sep, '/').lstrip('/')
@@ -11,6 +11,10 @@ class CompressionMiddleware(MiddlewareMixin):
     """
     
     def process_response(self, request, response):
+        # Las respuestas en flujo (archivos, rangos) no tienen .content
+        if response.streaming:
+            return response
+        
         # Solo comprimir respuestas de texto
         content_types = [
             'text/html',
@@ -52,10 +56,11 @@ class CacheHeadersMiddleware(MiddlewareMixin):
             response['Cache-Control'] = 'public, max-age=86400'  # 24 horas
         # Cache para imágenes de media
         elif request.path.startswith('/media/'):
-            response['Cache-Control'] = 'public, max-age=3600'   # 1 hora
-        # Cache para páginas de contenido
+            # serve_media ya fija MEDIA_CACHE_MAX_AGE
+            response.headers.setdefault('Cache-Control', 'public, max-age=3600')   # 1 hora
+        # Cache para páginas de contenido (salvo que la vista fije otra, p. ej. private)
         elif response.status_code == 200 and not request.path.startswith('/admin/'):
-            response['Cache-Control'] = 'public, max-age=300'    # 5 minutos
+            response.headers.setdefault('Cache-Control', 'public, max-age=300')    # 5 minutos
         
         return response
 
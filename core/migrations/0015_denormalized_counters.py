@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:34
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    ForumPost = apps.get_model('core', 'ForumPost')
+    Comment = apps.get_model('core', 'Comment')
+    BlogPost = apps.get_model('core', 'BlogPost')
+
+    def count_of(queryset, field_name):
+        counts = queryset.filter(**{field_name: OuterRef('pk')}).order_by().values(field_name)
+        counts = counts.annotate(total=Count('pk')).values('total')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    ForumPost.objects.update(
+        comments_count=count_of(Comment.objects.filter(is_active=True), 'post'),
+        likes_count=count_of(ForumPost.likes.through.objects.all(), 'forumpost'),
+    )
+    Comment.objects.update(likes_count=count_of(Comment.likes.through.objects.all(), 'comment'))
+    BlogPost.objects.update(likes_count=count_of(BlogPost.likes.through.objects.all(), 'blogpost'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_update_lesson_category_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='forumpost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
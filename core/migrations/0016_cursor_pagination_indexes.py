@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True)), fields=['-created_at', '-id'], name='blogpost_published_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-is_pinned', '-created_at', '-id'], name='forumpost_active_cursor_idx'),
+        ),
+    ]
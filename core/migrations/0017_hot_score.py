@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:49
+
+import datetime
+import math
+from django.conf import settings
+from django.db import migrations, models
+
+# Copia fija de core.hotness.hot_score: la migración no depende del código de la app
+HOT_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_score(likes_count, comments_count, created_at):
+    interactions = max(likes_count + comments_count, 1)
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(interactions) + age / HOT_DECAY_SECONDS, 7)
+
+
+def backfill_hot_scores(apps, schema_editor):
+    ForumPost = apps.get_model('core', 'ForumPost')
+    posts = list(ForumPost.objects.only('pk', 'likes_count', 'comments_count', 'created_at'))
+    for post in posts:
+        post.hot_score = hot_score(post.likes_count, post.comments_count, post.created_at)
+    ForumPost.objects.bulk_update(posts, ['hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forumpost',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-hot_score'], name='forumpost_active_hot_idx'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
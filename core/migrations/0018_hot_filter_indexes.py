@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_hot_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True)), fields=['category', '-created_at', '-id'], name='blogpost_category_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['post', 'created_at', 'id'], name='comment_active_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='forumpost',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-is_pinned', '-created_at', '-id'], name='forumpost_category_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:03
+
+from django.db import migrations, models
+from core.text import normalize_text
+
+
+def backfill_normalized_fields(apps, schema_editor):
+    targets = [
+        ('Expression', 'text_normalized', 'text'),
+        ('Lesson', 'title_normalized', 'title'),
+        ('Tag', 'name_normalized', 'name'),
+    ]
+    for model_name, target, source in targets:
+        model = apps.get_model('core', model_name)
+        objects = list(model.objects.only('pk', source))
+        for obj in objects:
+            setattr(obj, target, normalize_text(getattr(obj, source)))
+        model.objects.bulk_update(objects, [target], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expression',
+            name='text_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='title_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='name_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50),
+        ),
+        migrations.RunPython(backfill_normalized_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_normalized_search_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expression',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
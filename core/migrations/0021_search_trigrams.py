@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:11
+
+from django.db import migrations, models
+from core.fuzzy import trigrams
+
+
+def backfill_trigrams(apps, schema_editor):
+    SearchTrigram = apps.get_model('core', 'SearchTrigram')
+    sources = [
+        ('expression', 'Expression', 'text_normalized'),
+        ('tag', 'Tag', 'name_normalized'),
+    ]
+    for source, model_name, field in sources:
+        model = apps.get_model('core', model_name)
+        SearchTrigram.objects.bulk_create([
+            SearchTrigram(source=source, object_id=pk, trigram=gram)
+            for pk, text in model.objects.values_list('pk', field)
+            for gram in trigrams(text)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_expression_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['object_id', 'source'], name='searchtrigram_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'trigram', 'object_id'), name='searchtrigram_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_trigrams, migrations.RunPython.noop),
+    ]
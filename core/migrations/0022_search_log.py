@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_search_trigrams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('query', models.CharField(max_length=200)),
+                ('filters', models.CharField(blank=True, max_length=200)),
+                ('hits', models.PositiveIntegerField()),
+                ('elapsed_ms', models.FloatField()),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'elapsed_ms'], name='searchlog_latency_idx'), models.Index(fields=['created_at', 'query'], name='searchlog_query_idx')],
+            },
+        ),
+    ]
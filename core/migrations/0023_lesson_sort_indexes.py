@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_search_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='lesson_active_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['title', 'id'], name='lesson_active_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['country', '-created_at', '-id'], name='lesson_active_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['level', '-created_at', '-id'], name='lesson_active_level_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Copia fija de Lesson.LEVEL_RANKS: la migración no depende del código de la app
+LEVEL_RANKS = {'beginner': 0, 'intermediate': 1, 'advanced': 2}
+
+
+def backfill_level_ranks(apps, schema_editor):
+    Lesson = apps.get_model('core', 'Lesson')
+    for level, rank in LEVEL_RANKS.items():
+        Lesson.objects.filter(level=level).update(level_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_lesson_sort_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='lesson',
+            name='lesson_active_level_idx',
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='level_rank',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_level_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['level_rank', '-created_at', '-id'], name='lesson_active_level_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from .validators import validate_file_size, validate_image_extension, validate_audio_extension
+from .text import normalize_text
 import uuid
 from django.urls import reverse
 from django.utils.text import slugify
@@ -10,7 +11,31 @@ from django.core.exceptions import ValidationError
 
 # Create your models here.
 
-class BaseModel(models.Model):
+class LoadedValuesModel(models.Model):
+    """Recuerda los valores leídos de la base de datos para detectar cambios al guardar"""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guardar los valores cargados para detectar transiciones al guardar
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, field_name, default=None):
+        """Devuelve el valor que tenía el campo cuando se cargó de la base de datos"""
+        return getattr(self, '_loaded_values', {}).get(field_name, default)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+class BaseModel(LoadedValuesModel):
     id = models.AutoField(primary_key=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -20,6 +45,17 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+    # Columnas normalizadas para búsqueda: {columna_sombra: campo_origen} (ver core.text)
+    normalized_fields = {}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for target, source in self.normalized_fields.items():
+            setattr(self, target, normalize_text(getattr(self, source)))
+            if update_fields is not None and source in update_fields and target not in update_fields:
+                kwargs['update_fields'] = update_fields = [*update_fields, target]
+        super().save(*args, **kwargs)
+
     def soft_delete(self):
         self.is_active = False
         self.deleted_at = timezone.now()
@@ -31,6 +67,11 @@ class Expression(BaseModel):
     meaning = models.TextField(null=True, blank=True)
     example = models.TextField(null=True, blank=True)
     audio = models.FileField(upload_to='expression_audio/', null=True, blank=True)
+    text_normalized = models.CharField(max_length=200, blank=True, editable=False, db_index=True)
+    # Veces que se eligió en el autocompletado; popularidad para ordenar sugerencias
+    views = models.PositiveIntegerField(default=0, editable=False)
+
+    normalized_fields = {'text_normalized': 'text'}
 
     def __str__(self):
         return f"{self.text} - {self.lesson.title if self.lesson else ''}"
@@ -54,6 +95,8 @@ class Lesson(BaseModel):
         ('intermediate', _('Intermedio')),
         ('advanced', _('Avanzado')),
     ]
+    # Orden de dificultad de cada nivel (level_rank): el orden alfabético de level no lo es
+    LEVEL_RANKS = {value: rank for rank, (value, _label) in enumerate(LEVEL_CHOICES)}
 
     CATEGORY_CHOICES = [
         ('slang', _('Jerga y Slang')),
@@ -87,8 +130,10 @@ class Lesson(BaseModel):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
+    title_normalized = models.CharField(max_length=200, blank=True, editable=False, db_index=True)
     content = models.TextField(default='Contenido pendiente')
     level = models.CharField(max_length=20, choices=LEVEL_CHOICES, default='beginner')
+    level_rank = models.PositiveSmallIntegerField(default=0, editable=False)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='slang')
     country = models.CharField(max_length=50, choices=COUNTRY_CHOICES)
     video_url = models.URLField(blank=True, null=True)
@@ -102,6 +147,15 @@ class Lesson(BaseModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    normalized_fields = {'title_normalized': 'title'}
+
+    def save(self, *args, **kwargs):
+        self.level_rank = self.LEVEL_RANKS.get(self.level, 0)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'level' in update_fields and 'level_rank' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'level_rank']
+        super().save(*args, **kwargs)
+
     def get_difficulty_display(self):
         return dict(self.LEVEL_CHOICES).get(self.level, self.level)
     
@@ -160,6 +214,33 @@ class Lesson(BaseModel):
             models.Index(fields=['category']),
             models.Index(fields=['country']),
             models.Index(fields=['created_at']),
+            # Modos de orden del listado (LessonListView.sort_modes). Parciales como
+            # los del foro: el listado siempre filtra "WHERE is_active".
+            # Más recientes / más antiguas (recorrido inverso)
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='lesson_active_newest_idx',
+            ),
+            # Título A-Z / Z-A
+            models.Index(
+                fields=['title', 'id'],
+                condition=models.Q(is_active=True),
+                name='lesson_active_title_idx',
+            ),
+            # Por país; también sirve al filtro por país con orden por fecha
+            models.Index(
+                fields=['country', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='lesson_active_country_idx',
+            ),
+            # Por dificultad (de principiante a avanzado); también sirve al filtro
+            # por dificultad con orden por fecha
+            models.Index(
+                fields=['level_rank', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='lesson_active_level_idx',
+            ),
         ]
 
 class ForumPost(BaseModel):
@@ -184,6 +265,11 @@ class ForumPost(BaseModel):
     tags = models.ManyToManyField('Tag', blank=True)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='general')
     likes = models.ManyToManyField(User, related_name='liked_posts', blank=True)
+    # Contadores desnormalizados (ver core.signals y el comando rebuild_counters)
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    # Popularidad con decaimiento temporal (ver core.hotness)
+    hot_score = models.FloatField(default=0)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -212,6 +298,27 @@ class ForumPost(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Publicación del Foro'
         verbose_name_plural = 'Publicaciones del Foro'
+        indexes = [
+            # Paginación por cursor del foro (ForumPostListView.cursor_ordering).
+            # Parcial: Django genera "WHERE is_active" y SQLite solo usa el índice si coincide
+            models.Index(
+                fields=['-is_pinned', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='forumpost_active_cursor_idx',
+            ),
+            # Misma paginación filtrando por categoría
+            models.Index(
+                fields=['category', '-is_pinned', '-created_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='forumpost_category_cursor_idx',
+            ),
+            # Top N de publicaciones populares (core.utils.get_popular_posts)
+            models.Index(
+                fields=['-hot_score'],
+                condition=models.Q(is_active=True),
+                name='forumpost_active_hot_idx',
+            ),
+        ]
 
 class Comment(BaseModel):
     post = models.ForeignKey(ForumPost, on_delete=models.CASCADE, related_name='comments')
@@ -219,9 +326,18 @@ class Comment(BaseModel):
     content = models.TextField()
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
     likes = models.ManyToManyField(User, related_name='liked_comments', blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Árbol de comentarios activos de una publicación (core.comment_tree)
+            models.Index(
+                fields=['post', 'created_at', 'id'],
+                condition=models.Q(is_active=True),
+                name='comment_active_post_idx',
+            ),
+        ]
 
     def __str__(self):
         if not self.author or not self.post:
@@ -231,7 +347,7 @@ class Comment(BaseModel):
     def get_replies(self):
         return self.replies.filter(is_active=True).order_by('created_at')
 
-class UserProfile(models.Model):
+class UserProfile(LoadedValuesModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(blank=True)
     preferred_language = models.CharField(max_length=50, default='es')
@@ -250,6 +366,9 @@ class Tag(BaseModel):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField(blank=True)
+    name_normalized = models.CharField(max_length=50, blank=True, editable=False, db_index=True)
+
+    normalized_fields = {'name_normalized': 'name'}
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -259,6 +378,45 @@ class Tag(BaseModel):
     def __str__(self):
         return self.name
 
+class SearchTrigram(models.Model):
+    """Trigramas del texto normalizado de expresiones y etiquetas (ver core.fuzzy)"""
+    source = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    trigram = models.CharField(max_length=3)
+
+    def __str__(self):
+        return f"{self.source}:{self.object_id} '{self.trigram}'"
+
+    class Meta:
+        constraints = [
+            # También es el índice de búsqueda: (source, trigram) -> object_id sin leer la tabla
+            models.UniqueConstraint(fields=['source', 'trigram', 'object_id'], name='searchtrigram_unique'),
+        ]
+        indexes = [
+            # Para reindexar un objeto; no empieza por source para que el planificador
+            # no lo prefiera al de trigramas (evitaría el GROUP BY recorriendo todo source)
+            models.Index(fields=['object_id', 'source'], name='searchtrigram_object_idx'),
+        ]
+
+class SearchLog(models.Model):
+    """Búsqueda registrada por la telemetría (ver core.search_log)"""
+    source = models.CharField(max_length=20)
+    query = models.CharField(max_length=200)
+    filters = models.CharField(max_length=200, blank=True)
+    # Cota inferior cuando la búsqueda supera SEARCH_CACHE_MAX_HITS
+    hits = models.PositiveIntegerField()
+    elapsed_ms = models.FloatField()
+    created_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.source}: '{self.query}' ({self.hits} resultados, {self.elapsed_ms:.1f} ms)"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'elapsed_ms'], name='searchlog_latency_idx'),
+            models.Index(fields=['created_at', 'query'], name='searchlog_query_idx'),
+        ]
+
 class Category(BaseModel):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True, blank=True)
@@ -378,6 +536,7 @@ class BlogPost(BaseModel):
     is_published = models.BooleanField(default=False)
     views = models.PositiveIntegerField(default=0)
     likes = models.ManyToManyField(User, related_name='liked_blog_posts', blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -399,6 +558,20 @@ class BlogPost(BaseModel):
         ordering = ['-created_at']
         verbose_name = 'Artículo del Blog'
         verbose_name_plural = 'Artículos del Blog'
+        indexes = [
+            # Paginación por cursor del blog (BlogListView.cursor_ordering)
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(is_published=True, is_active=True),
+                name='blogpost_published_cursor_idx',
+            ),
+            # Misma paginación filtrando por categoría, y artículos relacionados
+            models.Index(
+                fields=['category', '-created_at', '-id'],
+                condition=models.Q(is_published=True, is_active=True),
+                name='blogpost_category_cursor_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage:
+    """
+    Página de resultados para paginación por cursor (keyset).
+    Expone la misma interfaz básica que django.core.paginator.Page para las plantillas,
+    pero sin número de página ni total de resultados.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage ({len(self.object_list)} objetos)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def parse_ordering(ordering):
+    """Convierte ('-created_at', 'id') en [('created_at', True), ('id', False)]"""
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _json_default(value):
+    # isoformat() completo: DjangoJSONEncoder trunca a milisegundos y el cursor
+    # debe conservar la precisión exacta de la columna para no saltarse filas
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f'Tipo no serializable en cursor: {type(value).__name__}')
+
+
+def encode_cursor(direction, values):
+    """Codifica la dirección y los valores de la fila frontera en un token opaco"""
+    payload = json.dumps({'d': direction, 'v': values}, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """
+    Decodifica un token de cursor. Devuelve (dirección, valores) o None si el token
+    no es válido, en cuyo caso se muestra la primera página.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, raw_values = payload['d'], payload['v']
+        fields = parse_ordering(ordering)
+        if direction not in ('next', 'prev') or len(raw_values) != len(fields):
+            return None
+        values = [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(fields, raw_values)
+        ]
+    except (ValueError, TypeError, KeyError, binascii.Error, ValidationError):
+        return None
+    return direction, values
+
+
+def _equals(name, value):
+    # Django convierte bool_field=False en "NOT bool_field", que SQLite no puede usar
+    # como igualdad sobre el índice; "IN (0)" sí se trata como igualdad
+    if isinstance(value, bool):
+        return Q(**{f'{name}__in': [value]})
+    return Q(**{name: value})
+
+
+def keyset_filter(ordering, values, forward=True):
+    """
+    Construye la condición "fila posterior a values" para el orden dado:
+    (a < A) OR (a = A AND b < B) OR (a = A AND b = B AND c < C) ...
+    Además acota por separado la primera columna con rango para que el
+    planificador pueda buscar directamente en el índice en vez de recorrerlo.
+    """
+    condition = Q()
+    equal_prefix = Q()
+    bound = None
+    for (name, descending), value in zip(parse_ordering(ordering), values):
+        lookup = 'lt' if descending == forward else 'gt'
+        if isinstance(value, bool) and value == (lookup == 'gt'):
+            # "< False" o "> True" no tienen filas: la columna actúa como igualdad
+            # (p. ej. is_pinned=False en casi todas las páginas del foro)
+            equal_prefix &= _equals(name, value)
+            continue
+        condition |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+        if bound is None:
+            bound = equal_prefix & Q(**{f'{name}__{lookup}e': value})
+        equal_prefix &= _equals(name, value)
+    if bound is None:
+        # Solo columnas booleanas en su extremo: no hay filas posteriores
+        return Q(pk__in=[])
+    return bound & condition
+
+
+def keyset_queryset(queryset, ordering, cursor=None):
+    """
+    Aplica a queryset el filtro y el orden de la página indicada por cursor.
+    Al retroceder el orden se invierte (las filas se devuelven al revés).
+    """
+    forward = cursor is None or cursor[0] == 'next'
+    if cursor is not None:
+        queryset = queryset.filter(keyset_filter(ordering, cursor[1], forward=forward))
+    if forward:
+        return queryset.order_by(*ordering)
+    return queryset.order_by(*[
+        name if descending else f'-{name}' for name, descending in parse_ordering(ordering)
+    ])
+
+
+def paginate_by_cursor(queryset, ordering, page_size, cursor=None):
+    """
+    Pagina queryset por keyset. El costo de cada página es el mismo sin importar
+    su profundidad: no hay OFFSET ni COUNT(*).
+    """
+    fields = parse_ordering(ordering)
+    forward = cursor is None or cursor[0] == 'next'
+
+    page_queryset = keyset_queryset(queryset, ordering, cursor)
+    rows = list(page_queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if forward:
+        has_next, has_previous = has_more, cursor is not None
+    elif not has_more:
+        # Retrocediendo se llegó al inicio: mostrar la primera página completa
+        return paginate_by_cursor(queryset, ordering, page_size)
+    else:
+        rows.reverse()
+        has_next, has_previous = True, True
+
+    def boundary(direction, row):
+        return encode_cursor(direction, [getattr(row, name) for name, _ in fields])
+
+    return CursorPage(
+        rows,
+        next_cursor=boundary('next', rows[-1]) if rows and has_next else None,
+        previous_cursor=boundary('prev', rows[0]) if rows and has_previous else None,
+    )
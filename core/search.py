@@ -0,0 +1,206 @@
+"""
+Búsqueda de texto completo con SQLite FTS5.
+
+Cada tipo de contenido tiene una tabla virtual FTS5 de contenido externo
+(content='core_<modelo>'), así que el índice no duplica el texto: solo guarda
+los términos. Triggers AFTER INSERT / DELETE / UPDATE OF <campos> la mantienen
+sincronizada; las actualizaciones de contadores o visitas no la tocan.
+
+Las tablas y los triggers se instalan con post_migrate (ver CoreConfig.ready) y
+no con una migración: en SQLite, Django recrea la tabla en muchas operaciones
+de esquema (_remake_table) y eso borra sus triggers. Con CREATE ... IF NOT
+EXISTS tras cada migrate vuelven a existir. El comando rebuild_search_index
+reconstruye los índices a partir de los datos existentes.
+
+En bases de datos sin FTS5 la búsqueda vuelve a icontains.
+"""
+import re
+from django.db import connections
+from django.db.models import Case, FloatField, IntegerField, Q, TextField, Value, When
+from django.db.models.expressions import RawSQL
+from .content_version import bump_version
+from .text import normalize_text, normalized_prefix_q
+
+# Marcadores del fragmento resaltado; el filtro search_highlight los
+# convierte en <mark> después de escapar el texto
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 24
+MAX_QUERY_TERMS = 10
+
+TERM_PATTERN = re.compile(r'\w+')
+
+
+class SearchIndex:
+    """Índice FTS5 de un modelo sobre los campos de texto indicados"""
+
+    def __init__(self, model_label, fields):
+        self.model_label = model_label
+        self.fields = fields
+
+    @property
+    def model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_label)
+
+    @property
+    def content_table(self):
+        return self.model._meta.db_table
+
+    @property
+    def table(self):
+        return f'{self.content_table}_fts'
+
+    def create_sql(self):
+        columns = ', '.join(self.fields)
+        new_values = ', '.join(f'new.{field}' for field in self.fields)
+        old_values = ', '.join(f'old.{field}' for field in self.fields)
+        table, content = self.table, self.content_table
+        delete_old = (
+            f"INSERT INTO {table}({table}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        insert_new = f'INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});'
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"{columns}, content='{content}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')",
+            f'CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content} BEGIN {insert_new} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content} BEGIN {delete_old} END',
+            f'CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {content} '
+            f'BEGIN {delete_old} {insert_new} END',
+        ]
+
+    def rebuild_sql(self):
+        return f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"
+
+
+SEARCH_INDEXES = [
+    SearchIndex('core.Lesson', ['title', 'content', 'cultural_notes']),
+    SearchIndex('core.Expression', ['text', 'meaning', 'example']),
+    SearchIndex('core.ForumPost', ['title', 'content']),
+    SearchIndex('core.BlogPost', ['title', 'excerpt', 'content']),
+]
+
+
+def get_search_index(model):
+    for index in SEARCH_INDEXES:
+        if index.model_label.lower() == model._meta.label_lower:
+            return index
+    return None
+
+
+def fts_available(using='default'):
+    """Indica si la base de datos soporta FTS5"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    if not hasattr(connection, '_fts5_available'):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            connection._fts5_available = bool(cursor.fetchone()[0])
+    return connection._fts5_available
+
+
+def install_search_indexes(using='default', rebuild=False):
+    """
+    Crea las tablas FTS5 y sus triggers si no existen. Las tablas nuevas (o
+    todas, con rebuild=True) se llenan con los datos existentes.
+    """
+    if not fts_available(using):
+        return []
+    connection = connections[using]
+    existing = set(connection.introspection.table_names())
+    installed = []
+    with connection.cursor() as cursor:
+        for index in SEARCH_INDEXES:
+            if index.content_table not in existing:
+                continue
+            created = index.table not in existing
+            for statement in index.create_sql():
+                cursor.execute(statement)
+            if created or rebuild:
+                cursor.execute(index.rebuild_sql())
+                installed.append(index)
+    # Las búsquedas en caché (core.search_cache) dependen del índice reconstruido
+    for index in installed:
+        bump_version(index.model)
+    return installed
+
+
+def match_expression(text):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    entre comillas y como prefijo ("palabra"*), todas obligatorias.
+    Devuelve None si el texto no tiene palabras.
+    """
+    terms = TERM_PATTERN.findall(text or '')[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _fallback_search(queryset, text, fields):
+    query = Q()
+    for field in fields:
+        query |= Q(**{f'{field}__icontains': text})
+    return queryset.filter(query).annotate(
+        search_rank=Value(0.0, output_field=FloatField()),
+        search_snippet=Value('', output_field=TextField()),
+    )
+
+
+def search_queryset(queryset, text, fields=None):
+    """
+    Filtra queryset por texto completo y añade search_rank (bm25: menor es más
+    relevante) y search_snippet (fragmento con los términos marcados).
+    El resultado queda ordenado por relevancia; quien lo use puede reordenarlo.
+    fields son los campos para icontains cuando no hay FTS5.
+    """
+    model = queryset.model
+    index = get_search_index(model)
+    if index is None or not fts_available(queryset.db):
+        return _fallback_search(queryset, text, fields or (index.fields if index else []))
+
+    expression = match_expression(text)
+    if expression is None:
+        return queryset.none()
+
+    # bm25() y snippet() solo existen dentro de una consulta MATCH: cada uno es una
+    # subconsulta correlacionada que FTS5 resuelve por rowid
+    table = index.table
+    row_match = f'FROM {table} WHERE {table} MATCH %s AND {table}.rowid = {model._meta.db_table}.id'
+    return queryset.filter(pk__in=matching_ids(model, text)).annotate(
+        search_rank=RawSQL(f'SELECT bm25({table}) {row_match}', [expression], output_field=FloatField()),
+        search_snippet=RawSQL(
+            f"SELECT snippet({table}, -1, %s, %s, '…', {SNIPPET_TOKENS}) {row_match}",
+            [HIGHLIGHT_START, HIGHLIGHT_END, expression],
+            output_field=TextField(),
+        ),
+    ).order_by('search_rank')
+
+
+def matching_ids(model, text):
+    """Subconsulta con los ids de model que coinciden con text (para pk__in)"""
+    index = get_search_index(model)
+    expression = match_expression(text)
+    if expression is None:
+        return RawSQL('SELECT NULL WHERE 0', [])
+    return RawSQL(f'SELECT rowid FROM {index.table} WHERE {index.table} MATCH %s', [expression])
+
+
+def lookup_expressions(query, limit=10):
+    """
+    Expresiones cuyo texto normalizado coincide con query o empieza por ella
+    ("que onda" encuentra "¿Qué onda?"). Las coincidencias exactas van primero.
+    Búsqueda por rango sobre el índice de text_normalized.
+    """
+    from .models import Expression
+    normalized = normalize_text(query)
+    if not normalized:
+        return Expression.objects.none()
+    return Expression.objects.filter(
+        normalized_prefix_q('text_normalized', normalized), is_active=True
+    ).select_related('lesson').annotate(
+        is_exact=Case(When(text_normalized=normalized, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by('is_exact', 'text_normalized')[:limit]
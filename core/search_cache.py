@@ -0,0 +1,125 @@
+"""
+Caché de resultados de búsqueda.
+
+Una búsqueda se guarda como la lista ordenada de sus coincidencias
+(pk, search_rank, search_snippet). La clave combina:
+  - el texto normalizado ("Chévere!" y "chevere" comparten entrada),
+  - los filtros del queryset base (su SQL sin columnas ni orden),
+  - la versión de contenido del modelo (core.content_version), que cambia al
+    guardar o borrar cualquier fila.
+Así una entrada deja de usarse en cuanto el contenido cambia. Las entradas de
+versiones anteriores quedan huérfanas: SEARCH_CACHE_TIMEOUT (6 horas por
+defecto) las elimina para que la caché no crezca sin límite en Redis.
+
+Solo se guardan las coincidencias; las filas de cada página se leen por pk, de
+modo que los contadores (visitas, likes, comentarios) siempre están al día.
+Las búsquedas con más de SEARCH_CACHE_MAX_HITS coincidencias no se guardan.
+"""
+import hashlib
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from .content_version import get_version
+from .search import search_queryset
+from .text import normalize_text
+
+CACHE_KEY = 'search:{label}:{digest}'
+# Marca de búsquedas demasiado amplias para guardarlas
+TOO_MANY_HITS = 'too-many'
+
+SearchHit = namedtuple('SearchHit', ['pk', 'rank', 'snippet'])
+
+
+def _max_hits():
+    return getattr(settings, 'SEARCH_CACHE_MAX_HITS', 500)
+
+
+def _timeout():
+    return getattr(settings, 'SEARCH_CACHE_TIMEOUT', 6 * 60 * 60)
+
+
+def search_cache_key(queryset, text):
+    """Clave de la búsqueda de text sobre queryset en la versión actual del modelo"""
+    model = queryset.model
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    parts = [str(get_version(model)), normalize_text(text), sql, repr(params)]
+    digest = hashlib.md5('\n'.join(parts).encode()).hexdigest()
+    return CACHE_KEY.format(label=model._meta.label_lower, digest=digest)
+
+
+def get_search_hits(queryset, text, fields=None):
+    """
+    Coincidencias de search_queryset(queryset, text, fields) en orden de
+    relevancia, desde la caché si es posible. Devuelve None si son demasiadas
+    para guardarlas: quien llama debe usar search_queryset directamente.
+    """
+    if not normalize_text(text):
+        return []
+    try:
+        key = search_cache_key(queryset, text)
+    except EmptyResultSet:
+        return []
+    hits = cache.get(key)
+    if hits is None:
+        # A igual relevancia, las más recientes primero (orden estable entre páginas)
+        rows = search_queryset(queryset, text, fields).order_by('search_rank', '-pk').values_list(
+            'pk', 'search_rank', 'search_snippet'
+        )[:_max_hits() + 1]
+        hits = [SearchHit(*row) for row in rows]
+        if len(hits) > _max_hits():
+            hits = TOO_MANY_HITS
+        cache.set(key, hits, timeout=_timeout())
+    return None if hits == TOO_MANY_HITS else hits
+
+
+def count_hits(hits):
+    """Número de coincidencias; una cota inferior si eran demasiadas para la caché"""
+    return _max_hits() + 1 if hits is None else len(hits)
+
+
+def filter_by_hits(queryset, hits):
+    """queryset restringido a las coincidencias"""
+    return queryset.filter(pk__in=[hit.pk for hit in hits])
+
+
+def annotate_hits(objects, hits):
+    """Asigna search_rank y search_snippet a los objetos que están en hits"""
+    by_pk = {hit.pk: hit for hit in hits}
+    for obj in objects:
+        hit = by_pk.get(obj.pk)
+        if hit is not None:
+            obj.search_rank, obj.search_snippet = hit.rank, hit.snippet
+    return objects
+
+
+class SearchResultList:
+    """
+    Coincidencias en orden de relevancia para Paginator: el total es len(hits)
+    y cada página lee solo sus filas con una consulta por pk.
+    """
+
+    def __init__(self, queryset, hits):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.hits = hits
+
+    def count(self):
+        return len(self.hits)
+
+    def __len__(self):
+        return len(self.hits)
+
+    def __bool__(self):
+        return bool(self.hits)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1 or None][0]
+        page_hits = self.hits[index]
+        objects = self.queryset.in_bulk([hit.pk for hit in page_hits])
+        # Una fila borrada después de guardar la búsqueda simplemente no aparece
+        return annotate_hits([objects[hit.pk] for hit in page_hits if hit.pk in objects], page_hits)
@@ -0,0 +1,163 @@
+"""
+Telemetría de búsquedas.
+
+Cada búsqueda (foro, lecciones, búsqueda unificada, search_posts) registra el
+texto normalizado, los filtros, el número de coincidencias y el tiempo en ms en
+un buffer circular en memoria del proceso (como máximo SEARCH_LOG_BUFFER_SIZE
+eventos). El buffer se vuelca a la tabla SearchLog con un solo bulk_create al terminar
+una petición (señal request_finished, ver core.signals), cuando ya se envió la
+respuesta, así que ninguna búsqueda espera a la escritura:
+  - como máximo una vez cada SEARCH_LOG_FLUSH_INTERVAL segundos (0 para no
+    hacerlo por tiempo),
+  - en cuanto el buffer llega a la mitad, antes de que se descarten los eventos
+    más antiguos.
+El buffer es de cada proceso, así que solo ese proceso puede volcarlo: un
+comando aparte no vería sus eventos. Al reiniciar un worker se pierden los
+eventos de su último intervalo.
+
+El comando search_report vuelca el buffer de su propio proceso y calcula los
+percentiles de latencia y las búsquedas más frecuentes y sin resultados a
+partir de la tabla.
+"""
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.models import Avg, Count
+from django.utils import timezone
+from django.utils.http import urlencode
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+SearchEvent = namedtuple('SearchEvent', ['source', 'query', 'filters', 'hits', 'elapsed_ms', 'created_at'])
+
+# Parámetros de paginación: no cambian la búsqueda
+IGNORED_PARAMS = {'q', 'page', 'cursor'}
+MAX_QUERY_LENGTH = 200
+MAX_FILTERS_LENGTH = 200
+
+_buffer = deque(maxlen=getattr(settings, 'SEARCH_LOG_BUFFER_SIZE', 1000))
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+class SearchTracker:
+    """Datos de una búsqueda en curso; quien busca completa hits"""
+
+    def __init__(self, source, query, filters=''):
+        self.source = source
+        self.query = query
+        self.filters = filters
+        self.hits = 0
+
+
+def format_filters(params):
+    """Filtros de una búsqueda en formato compacto ("country=MX&sort=title")"""
+    items = sorted(
+        (key, value) for key, value in params.items()
+        if key not in IGNORED_PARAMS and value
+    )
+    return urlencode(items)[:MAX_FILTERS_LENGTH]
+
+
+@contextmanager
+def track_search(source, query, filters=''):
+    """
+    Mide el bloque y registra la búsqueda al terminar:
+
+        with track_search('lesson', q, format_filters(request.GET)) as search:
+            search.hits = len(resultados)
+    """
+    tracker = SearchTracker(source, query, filters)
+    start = time.perf_counter()
+    yield tracker
+    record_search(
+        tracker.source, tracker.query, tracker.filters, tracker.hits,
+        (time.perf_counter() - start) * 1000,
+    )
+
+
+def record_search(source, query, filters, hits, elapsed_ms):
+    """Añade una búsqueda al buffer (se vuelca al terminar la petición, ver flush_if_due)"""
+    if not getattr(settings, 'SEARCH_LOG_ENABLED', True):
+        return
+    normalized = normalize_text(query)[:MAX_QUERY_LENGTH]
+    if not normalized:
+        return
+    _buffer.append(SearchEvent(source, normalized, filters, hits, elapsed_ms, timezone.now()))
+
+
+def pending_events():
+    """Búsquedas registradas que aún no se han volcado"""
+    return list(_buffer)
+
+
+def flush_if_due():
+    """Vuelca el buffer si llegó a la mitad o si pasó el intervalo configurado desde el último volcado"""
+    if not _buffer:
+        return
+    interval = getattr(settings, 'SEARCH_LOG_FLUSH_INTERVAL', 60)
+    if len(_buffer) >= _buffer.maxlen // 2 or (interval and time.monotonic() - _last_flush >= interval):
+        try:
+            flush_search_log()
+        except Exception:
+            logger.exception('Error al volcar el registro de búsquedas')
+
+
+def flush_search_log():
+    """Escribe las búsquedas del buffer con un bulk_create. Devuelve cuántas escribió"""
+    global _last_flush
+    from .models import SearchLog
+    with _buffer_lock:
+        _last_flush = time.monotonic()
+        events = []
+        while _buffer:
+            events.append(_buffer.popleft())
+    if not events:
+        return 0
+    try:
+        SearchLog.objects.bulk_create([SearchLog(**event._asdict()) for event in events])
+    except Exception:
+        # Devolver los eventos al buffer; si no caben se pierden los más antiguos
+        with _buffer_lock:
+            restored = events + list(_buffer)
+            _buffer.clear()
+            _buffer.extend(restored)
+        raise
+    return len(events)
+
+
+def search_log_queryset(days=7, source=None):
+    """Búsquedas registradas en los últimos days días (de source, si se indica)"""
+    from .models import SearchLog
+    queryset = SearchLog.objects.filter(created_at__gte=timezone.now() - timezone.timedelta(days=days))
+    if source:
+        queryset = queryset.filter(source=source)
+    return queryset
+
+
+def latency_percentiles(queryset, percentiles=(50, 95, 99)):
+    """
+    {percentil: ms} de queryset. Cada percentil es una consulta ORDER BY
+    elapsed_ms LIMIT 1 OFFSET n, sin cargar todas las filas.
+    """
+    total = queryset.count()
+    if not total:
+        return {}
+    ordered = queryset.order_by('elapsed_ms').values_list('elapsed_ms', flat=True)
+    return {
+        percentile: ordered[min(total - 1, max(0, -(-percentile * total // 100) - 1))]
+        for percentile in percentiles
+    }
+
+
+def top_queries(queryset, limit=10):
+    """Búsquedas más frecuentes con su número, latencia media y coincidencias medias"""
+    return list(
+        queryset.values('query').annotate(
+            total=Count('pk'), avg_ms=Avg('elapsed_ms'), avg_hits=Avg('hits')
+        ).order_by('-total', 'query')[:limit]
+    )
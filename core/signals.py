@@ -0,0 +1,213 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.core.signals import request_finished
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import ForumPost, Comment, BlogPost, Expression, Lesson, Tag, UserProfile
+from .content_version import bump_version
+from .hotness import update_hot_scores
+from .facets import track_change
+from .fuzzy import get_trigram_source, index_object, unindex_object
+from .image_variants import update_instance_variants
+from .search_log import flush_if_due
+
+
+def adjust_counter(model, field_name, delta, **filters):
+    """
+    Suma (o resta) delta a un contador desnormalizado con una expresión F,
+    sin cargar la fila ni tocar updated_at. Nunca baja de cero.
+    """
+    if not delta:
+        return 0
+    return model.objects.filter(**filters).update(
+        **{field_name: Greatest(F(field_name) + delta, 0)}
+    )
+
+
+# ----------------------------------------
+# Comentarios: ForumPost.comments_count
+# ----------------------------------------
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        delta = 1 if instance.is_active else 0
+    else:
+        was_active = instance.get_loaded_value('is_active', instance.is_active)
+        delta = int(instance.is_active) - int(was_active)
+    if adjust_counter(ForumPost, 'comments_count', delta, pk=instance.post_id):
+        update_hot_scores(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    if instance.is_active and adjust_counter(ForumPost, 'comments_count', -1, pk=instance.post_id):
+        update_hot_scores(instance.post_id)
+
+
+# ----------------------------------------
+# Popularidad: ForumPost.hot_score
+# ----------------------------------------
+
+@receiver(post_save, sender=ForumPost)
+def set_initial_hot_score(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        update_hot_scores(instance.pk)
+
+
+# ----------------------------------------
+# Facetas: publicaciones visibles por categoría (core.facets)
+# ----------------------------------------
+
+@receiver(post_save, sender=ForumPost)
+@receiver(post_save, sender=BlogPost)
+def update_facets_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        track_change(instance, created=created)
+
+
+@receiver(post_delete, sender=ForumPost)
+@receiver(post_delete, sender=BlogPost)
+def update_facets_on_delete(sender, instance, **kwargs):
+    track_change(instance, deleted=True)
+
+
+# ----------------------------------------
+# Versión de contenido: autocompletado (core.autocomplete) y caché de búsquedas (core.search_cache)
+# ----------------------------------------
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Expression)
+@receiver(post_save, sender=ForumPost)
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Expression)
+@receiver(post_delete, sender=ForumPost)
+@receiver(post_delete, sender=BlogPost)
+def bump_content_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_version(sender)
+
+
+# Páginas de lección en caché (LessonDetailView): versión por lección
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def bump_lesson_page_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_version(Lesson, instance.pk)
+
+
+@receiver(post_save, sender=Expression)
+@receiver(post_delete, sender=Expression)
+def bump_expression_lesson_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Si la expresión cambió de lección, ambas páginas quedan desactualizadas
+    lesson_ids = {instance.lesson_id, instance.get_loaded_value('lesson_id', instance.lesson_id)}
+    for lesson_id in lesson_ids - {None}:
+        bump_version(Lesson, lesson_id)
+
+
+# ----------------------------------------
+# Trigramas: búsqueda aproximada de expresiones y etiquetas (core.fuzzy)
+# ----------------------------------------
+
+@receiver(post_save, sender=Expression)
+@receiver(post_save, sender=Tag)
+def update_trigrams_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    field = get_trigram_source(sender).field
+    if created or instance.get_loaded_value(field) != getattr(instance, field):
+        index_object(instance)
+
+
+@receiver(post_delete, sender=Expression)
+@receiver(post_delete, sender=Tag)
+def delete_trigrams(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+# ----------------------------------------
+# Variantes redimensionadas de las imágenes subidas (core.image_variants)
+# ----------------------------------------
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=UserProfile)
+def update_image_variants(sender, instance, raw=False, **kwargs):
+    # Solo si cambió la imagen; se generan tras el commit, fuera de la petición
+    if not raw:
+        update_instance_variants(instance)
+
+
+# ----------------------------------------
+# Likes: likes_count en ForumPost, Comment y BlogPost
+# ----------------------------------------
+
+def update_likes_count(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Mantiene likes_count sincronizado cuando se modifican las relaciones de likes,
+    tanto desde el objeto (post.likes.add) como desde el usuario (user.liked_posts.add).
+    """
+    liked_model = model if reverse else type(instance)
+    source_field = sender._meta.get_field(liked_model._meta.model_name).attname
+    user_field = sender._meta.get_field('user').attname
+
+    if action in ('pre_remove', 'pre_clear'):
+        # Solo cuentan las filas que existen realmente en la tabla intermedia
+        rows = sender.objects.all()
+        if reverse:
+            rows = rows.filter(**{user_field: instance.pk})
+            if pk_set is not None:
+                rows = rows.filter(**{f'{source_field}__in': pk_set})
+            instance._likes_removed = list(rows.values_list(source_field, flat=True))
+        else:
+            rows = rows.filter(**{source_field: instance.pk})
+            if pk_set is not None:
+                rows = rows.filter(**{f'{user_field}__in': pk_set})
+            instance._likes_removed = rows.count()
+        return
+
+    changed = []
+    if action == 'post_add' and pk_set:
+        if reverse:
+            adjust_counter(liked_model, 'likes_count', 1, pk__in=pk_set)
+            changed = list(pk_set)
+        else:
+            adjust_counter(liked_model, 'likes_count', len(pk_set), pk=instance.pk)
+            changed = [instance.pk]
+    elif action in ('post_remove', 'post_clear'):
+        removed = getattr(instance, '_likes_removed', None)
+        if not removed:
+            return
+        if reverse:
+            adjust_counter(liked_model, 'likes_count', -1, pk__in=removed)
+            changed = removed
+        else:
+            adjust_counter(liked_model, 'likes_count', -removed, pk=instance.pk)
+            changed = [instance.pk]
+        del instance._likes_removed
+
+    if changed and liked_model is ForumPost:
+        update_hot_scores(*changed)
+
+for liked_model in (ForumPost, Comment, BlogPost):
+    m2m_changed.connect(
+        update_likes_count,
+        sender=liked_model.likes.through,
+        dispatch_uid=f'update_likes_count_{liked_model._meta.model_name}',
+    )
+
+
+# ----------------------------------------
+# Telemetría de búsquedas (core.search_log)
+# ----------------------------------------
+
+@receiver(request_finished)
+def flush_search_log_after_request(sender, **kwargs):
+    # Ya se envió la respuesta: el bulk_create no retrasa a quien buscó
+    flush_if_due()
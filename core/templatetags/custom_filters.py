@@ -1,4 +1,6 @@
 from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 import re
 
 register = template.Library()
@@ -21,4 +23,32 @@ def youtube_embed_url(url):
             video_id = match.group(1)
             return f'https://www.youtube.com/embed/{video_id}'
     
-    return url 
\ No newline at end of file
+    return url 
+
+@register.filter
+def search_highlight(snippet):
+    """Escapa un fragmento de búsqueda y convierte sus marcadores en <mark>"""
+    from ..search import HIGHLIGHT_START, HIGHLIGHT_END
+    if not snippet:
+        return ''
+    html = escape(snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
+    return mark_safe(html)
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw'):
+    """
+    <picture> con las variantes WebP y JPEG de image (srcset y sizes), o un <img>
+    con la imagen original si aún no se generaron (ver core.image_variants)
+    """
+    from django.utils.html import format_html
+    from ..image_variants import srcsets
+    if not image:
+        return ''
+    variants = srcsets(image)
+    if not variants:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', image.url, alt)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        variants['image/webp'], sizes, image.url, variants['image/jpeg'], sizes, alt,
+    )
@@ -295,4 +295,480 @@ class UserProfileModelTest(TestCase):
         self.assertEqual(profile.preferred_language, 'es')
         self.assertEqual(profile.reputation, 0)
         self.assertEqual(profile.bio, '')
-        self.assertEqual(profile.learning_goals, '') 
\ No newline at end of file
+        self.assertEqual(profile.learning_goals, '') 
+
+class DenormalizedCountersTest(TestCase):
+    """Tests para los contadores desnormalizados de comentarios y likes"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='otherpass123'
+        )
+        self.post = ForumPost.objects.create(
+            title='Test Post',
+            content='Test content',
+            author=self.user
+        )
+    
+    def test_comment_creation_increments_counter(self):
+        """Test: Crear un comentario incrementa comments_count"""
+        Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        Comment.objects.create(post=self.post, author=self.user, content='Dos')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+    
+    def test_comment_soft_delete_decrements_counter(self):
+        """Test: El borrado suave de un comentario decrementa comments_count una sola vez"""
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.soft_delete()
+        comment.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+    
+    def test_counter_does_not_touch_updated_at(self):
+        """Test: Actualizar los contadores no modifica updated_at del post"""
+        updated_at = self.post.updated_at
+        Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        self.post.likes.add(self.other_user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, updated_at)
+    
+    def test_likes_counter_follows_add_and_remove(self):
+        """Test: Agregar y quitar likes mantiene likes_count"""
+        self.post.likes.add(self.user, self.other_user)
+        self.post.likes.add(self.user)  # Like repetido: no cuenta dos veces
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        
+        self.post.likes.remove(self.user)
+        self.post.likes.remove(self.user)  # Quitar un like inexistente no resta
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+    
+    def test_likes_counter_from_user_side(self):
+        """Test: Los likes agregados desde el usuario también se cuentan"""
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        self.other_user.liked_comments.add(comment)
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 1)
+        
+        self.other_user.liked_comments.clear()
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 0)
+    
+    def test_rebuild_counters_command_repairs_drift(self):
+        """Test: El comando rebuild_counters corrige contadores desactualizados"""
+        from django.core.management import call_command
+        from io import StringIO
+        Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        self.post.likes.add(self.user)
+        ForumPost.objects.filter(pk=self.post.pk).update(comments_count=7, likes_count=9)
+        
+        call_command('rebuild_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.post.likes_count, 1)
+
+
+class HotScoreTest(TestCase):
+    """Tests para la puntuación de popularidad almacenada en ForumPost"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = ForumPost.objects.create(
+            title='Test Post',
+            content='Test content',
+            author=self.user
+        )
+    
+    def test_score_follows_interactions(self):
+        """Test: Likes y comentarios recalculan hot_score al instante"""
+        from core.hotness import hot_score
+        from core.likes import toggle_like
+        self.post.refresh_from_db()
+        initial = self.post.hot_score
+        self.assertEqual(initial, hot_score(0, 0, self.post.created_at))
+        
+        Comment.objects.create(post=self.post, author=self.user, content='Uno')
+        self.post.likes.add(User.objects.create_user(username='fan', password='x'))
+        toggle_like(self.post, self.user)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.hot_score, hot_score(2, 1, self.post.created_at))
+        self.assertGreater(self.post.hot_score, initial)
+    
+    def test_popular_posts_use_stored_score(self):
+        """Test: get_popular_posts ordena por hot_score sin inflar con el producto likes×comentarios"""
+        from core.utils import get_popular_posts
+        busy = ForumPost.objects.create(title='Con likes', content='Contenido', author=self.user)
+        fans = [User.objects.create_user(username=f'fan{i}', password='x') for i in range(3)]
+        busy.likes.add(*fans)
+        for i in range(3):
+            Comment.objects.create(post=busy, author=self.user, content=f'Comentario {i}')
+        
+        with self.assertNumQueries(1):
+            popular = list(get_popular_posts())
+        self.assertEqual(popular, [busy, self.post])
+    
+    def test_rebuild_hot_scores(self):
+        """Test: El comando rebuild_hot_scores repara puntuaciones desactualizadas"""
+        from io import StringIO
+        from django.core.management import call_command
+        from core.hotness import hot_score
+        ForumPost.objects.filter(pk=self.post.pk).update(hot_score=0, likes_count=5)
+        call_command('rebuild_hot_scores', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.hot_score, hot_score(5, 0, self.post.created_at))
+
+
+class NormalizedFieldsTest(TestCase):
+    """Tests para las columnas normalizadas de búsqueda (sin tildes ni puntuación)"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.lesson = Lesson.objects.create(
+            user=self.user,
+            title='Jerga de Colombia: ¡Qué chévere!',
+            content='Test content',
+            country='CO'
+        )
+    
+    def test_normalize_text(self):
+        """Test: Se eliminan tildes, diéresis, signos y mayúsculas"""
+        from core.text import normalize_text
+        self.assertEqual(normalize_text('¿Qué onda?'), 'que onda')
+        self.assertEqual(normalize_text('Chévere'), 'chevere')
+        self.assertEqual(normalize_text('GÜEY'), 'guey')
+        self.assertEqual(normalize_text('  ¡No   manches...!  '), 'no manches')
+        self.assertEqual(normalize_text(None), '')
+    
+    def test_fields_filled_on_save(self):
+        """Test: Las columnas normalizadas se rellenan al guardar, también con update_fields"""
+        from core.models import Tag
+        self.assertEqual(self.lesson.title_normalized, 'jerga de colombia que chevere')
+        expression = Expression.objects.create(lesson=self.lesson, text='¿Qué onda?', meaning='Saludo')
+        self.assertEqual(expression.text_normalized, 'que onda')
+        tag = Tag.objects.create(name='Chilenismos')
+        self.assertEqual(tag.name_normalized, 'chilenismos')
+        
+        expression.text = '¡Órale!'
+        expression.save(update_fields=['text'])
+        expression.refresh_from_db()
+        self.assertEqual(expression.text_normalized, 'orale')
+    
+    def test_lookup_expressions(self):
+        """Test: La búsqueda de expresiones ignora tildes, acepta prefijos y pone primero las exactas"""
+        from core.search import lookup_expressions
+        onda = Expression.objects.create(lesson=self.lesson, text='¿Qué onda?', meaning='Saludo')
+        ondas = Expression.objects.create(lesson=self.lesson, text='Qué ondas, güey', meaning='Saludo')
+        Expression.objects.create(lesson=self.lesson, text='Chévere', meaning='Genial')
+        self.assertEqual(list(lookup_expressions('que onda')), [onda, ondas])
+        self.assertEqual(list(lookup_expressions('QUE')), [onda, ondas])
+        self.assertEqual(list(lookup_expressions('¿?')), [])
+    
+    def test_backfill_command(self):
+        """Test: normalize_search_fields repara columnas desactualizadas"""
+        from io import StringIO
+        from django.core.management import call_command
+        Lesson.objects.filter(pk=self.lesson.pk).update(title_normalized='')
+        call_command('normalize_search_fields', stdout=StringIO())
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.title_normalized, 'jerga de colombia que chevere')
+
+
+class ContentImportExportTest(TestCase):
+    """Tests para la importación y exportación masiva de lecciones y expresiones"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        import tempfile
+        self.user = User.objects.create_user(username='editor', password='testpass123')
+        self.lesson = Lesson.objects.create(
+            user=self.user, title='Jerga chilena', content='Contenido', country='CL', level='intermediate'
+        )
+        Expression.objects.create(lesson=self.lesson, text='¿Cachai?', meaning='¿Entiendes?')
+        Expression.objects.create(lesson=self.lesson, text='Pololo', meaning='Novio', example='Mi pololo')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def path(self, name):
+        """Ruta de un archivo temporal"""
+        import os
+        return os.path.join(self.tmpdir.name, name)
+    
+    def call(self, *args, **kwargs):
+        """Ejecuta un comando y devuelve su salida"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command(*args, stdout=out, **kwargs)
+        return out.getvalue()
+    
+    def write_jsonl(self, name, records):
+        """Escribe registros JSONL y devuelve la ruta"""
+        import json
+        path = self.path(name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+        return path
+    
+    def test_round_trip(self):
+        """Test: Lo exportado se importa igual en JSONL y CSV, con búsqueda y trigramas"""
+        from core.fuzzy import fuzzy_search
+        from core.search import search_queryset
+        for name in ['export.jsonl', 'export.csv']:
+            with self.subTest(name=name):
+                path = self.path(name)
+                self.assertIn('3 registros', self.call('export_lessons', output=path))
+                Lesson.objects.all().delete()
+                Expression.objects.all().delete()
+                
+                output = self.call('import_lessons', path, batch_size=2)
+                self.assertIn('Lecciones: 1 creadas', output)
+                lesson = Lesson.objects.get()
+                self.assertEqual(
+                    (lesson.title, lesson.title_normalized, lesson.level, lesson.user, lesson.video_url),
+                    ('Jerga chilena', 'jerga chilena', 'intermediate', self.user, None),
+                )
+                self.assertEqual(
+                    list(lesson.expressions.order_by('text').values_list('text', 'text_normalized', 'example')),
+                    [('Pololo', 'pololo', 'Mi pololo'), ('¿Cachai?', 'cachai', None)],
+                )
+                self.assertEqual([e.text for e in fuzzy_search(Expression, 'cachay')], ['¿Cachai?'])
+                self.assertTrue(search_queryset(Lesson.objects.all(), 'chilena').exists())
+    
+    def test_upsert_by_natural_key(self):
+        """Test: Con --upsert se actualizan las filas existentes; sin él se omiten"""
+        from core.content_version import get_version
+        records = [
+            {'type': 'lesson', 'country': 'CL', 'title': 'Jerga chilena', 'content': 'Nuevo contenido'},
+            {'type': 'expression', 'country': 'CL', 'title': 'Jerga chilena', 'text': 'Pololo', 'meaning': 'Pareja'},
+            {'type': 'expression', 'country': 'CL', 'title': 'Jerga chilena', 'text': 'Fome', 'meaning': 'Aburrido'},
+        ]
+        path = self.write_jsonl('upsert.jsonl', records)
+        self.assertIn('2 omitidas', self.call('import_lessons', path))
+        self.assertEqual(Expression.objects.get(text='Pololo').meaning, 'Novio')
+        
+        version = get_version(Lesson, self.lesson.pk)
+        self.call('import_lessons', path, upsert=True)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.content, 'Nuevo contenido')
+        self.assertEqual(Expression.objects.get(text='Pololo').meaning, 'Pareja')
+        self.assertEqual(Expression.objects.filter(text='Fome').count(), 1)
+        self.assertNotEqual(get_version(Lesson, self.lesson.pk), version)
+    
+    def test_resume_after_failure(self):
+        """Test: Un registro no válido detiene la importación y se reanuda desde su lote"""
+        from django.core.management.base import CommandError
+        records = [
+            {'type': 'lesson', 'country': 'MX', 'title': 'Jerga mexicana', 'content': 'Contenido', 'user': 'editor'},
+            {'type': 'expression', 'country': 'MX', 'title': 'Jerga mexicana', 'text': 'Chido', 'meaning': 'Bueno'},
+            {'type': 'expression', 'country': 'MX', 'title': 'Jerga mexicana', 'text': 'Güey', 'meaning': 'Amigo'},
+            {'type': 'expression', 'country': 'MX', 'title': 'Jerga mexicana', 'text': 'Neta'},
+        ]
+        path = self.write_jsonl('broken.jsonl', records)
+        with self.assertRaises(CommandError) as context:
+            self.call('import_lessons', path, batch_size=2)
+        self.assertIn('Línea 4: una expresión necesita meaning o example', str(context.exception))
+        self.assertIn('--start-line 3', str(context.exception))
+        # El primer lote quedó guardado; el segundo, no
+        self.assertTrue(Expression.objects.filter(text='Chido').exists())
+        self.assertFalse(Expression.objects.filter(text='Güey').exists())
+        
+        records[3]['meaning'] = 'Verdad'
+        path = self.write_jsonl('fixed.jsonl', records)
+        self.call('import_lessons', path, batch_size=2, start_line=3)
+        self.assertEqual(Lesson.objects.get(title='Jerga mexicana').expressions.count(), 3)
+
+class ImageVariantsTest(TestCase):
+    """Tests para las variantes redimensionadas de las imágenes subidas"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        import tempfile
+        from django.core.cache import cache
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        settings_override = self.settings(
+            MEDIA_ROOT=self.tmpdir.name, IMAGE_VARIANT_WIDTHS=[320, 640], IMAGE_VARIANTS_ASYNC=False
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Los anchos disponibles se guardan en caché por nombre de archivo
+        cache.clear()
+        self.user = User.objects.create_user(username='fotografo', password='testpass123')
+    
+    def upload(self, name, size, mode='RGB', fmt='PNG'):
+        """Imagen generada con Pillow como archivo subido"""
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        buffer = BytesIO()
+        Image.new(mode, size, 'red').save(buffer, fmt)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+    
+    def create_lesson(self, image):
+        """Crea una lección con portada"""
+        return Lesson.objects.create(
+            user=self.user, title='Jerga cubana', content='Contenido', country='CU', cover_image=image
+        )
+    
+    def open_variant(self, field_file, width, extension):
+        """Abre una variante con Pillow"""
+        from PIL import Image
+        from django.core.files.storage import default_storage
+        from core.image_variants import variant_name
+        with default_storage.open(variant_name(field_file.name, width, extension)) as file:
+            image = Image.open(file)
+            image.load()
+        return image
+    
+    def variant_paths(self, field_file):
+        """Rutas de todas las variantes posibles de field_file"""
+        from core.image_variants import variant_name
+        return [variant_name(field_file.name, width, extension) for width in [320, 640] for extension in ['webp', 'jpg']]
+    
+    def test_variants_generated_on_upload(self):
+        """Test: Al subir una portada se generan sus variantes WebP y JPEG a cada ancho"""
+        lesson = self.create_lesson(self.upload('portada.png', (1200, 600), mode='RGBA'))
+        for width in [320, 640]:
+            webp = self.open_variant(lesson.cover_image, width, 'webp')
+            jpeg = self.open_variant(lesson.cover_image, width, 'jpg')
+            self.assertEqual((webp.format, webp.size), ('WEBP', (width, width // 2)))
+            self.assertEqual((jpeg.format, jpeg.size, jpeg.mode), ('JPEG', (width, width // 2), 'RGB'))
+    
+    def test_small_images_not_upscaled(self):
+        """Test: Solo se generan y se anuncian en el srcset los anchos que no superan el original"""
+        from django.core.files.storage import default_storage
+        from core.image_variants import available_widths, srcsets, variant_name
+        lesson = self.create_lesson(self.upload('mini.png', (400, 200)))
+        self.assertEqual(self.open_variant(lesson.cover_image, 320, 'jpg').size, (320, 160))
+        self.assertFalse(default_storage.exists(variant_name(lesson.cover_image.name, 640, 'jpg')))
+        self.assertEqual(available_widths(default_storage, lesson.cover_image.name), [320])
+        self.assertNotIn('640w', srcsets(lesson.cover_image)['image/jpeg'])
+        
+        tiny = self.create_lesson(self.upload('icono.png', (100, 100)))
+        self.assertEqual(srcsets(tiny.cover_image), {})
+    
+    def test_blog_and_avatar_variants(self):
+        """Test: También se generan variantes de las imágenes del blog y de los avatares"""
+        from django.core.files.storage import default_storage
+        from core.image_variants import available_widths
+        from core.models import BlogPost
+        post = BlogPost.objects.create(
+            title='Viaje a Lima', content='Contenido', author=self.user,
+            featured_image=self.upload('lima.jpg', (800, 600), fmt='JPEG'),
+        )
+        profile = UserProfile.objects.create(user=self.user, avatar=self.upload('yo.gif', (400, 400), mode='P', fmt='GIF'))
+        self.assertEqual(available_widths(default_storage, post.featured_image.name), [320, 640])
+        self.assertEqual(available_widths(default_storage, profile.avatar.name), [320])
+    
+    def test_replacing_image_deletes_old_variants(self):
+        """Test: Al reemplazar la imagen se borran las variantes de la anterior y se generan las de la nueva"""
+        from django.core.files.storage import default_storage
+        from core.models import BlogPost
+        post = BlogPost.objects.create(
+            title='Viaje a Lima', content='Contenido', author=self.user,
+            featured_image=self.upload('lima.jpg', (800, 600), fmt='JPEG'),
+        )
+        post = BlogPost.objects.get(pk=post.pk)
+        old_paths = self.variant_paths(post.featured_image)
+        self.assertTrue(all(default_storage.exists(path) for path in old_paths))
+        
+        post.title = 'Viaje a Cusco'
+        post.save()
+        self.assertTrue(all(default_storage.exists(path) for path in old_paths))
+        
+        post.featured_image = self.upload('cusco.jpg', (800, 600), fmt='JPEG')
+        post.save()
+        self.assertFalse(any(default_storage.exists(path) for path in old_paths))
+        self.assertTrue(all(default_storage.exists(path) for path in self.variant_paths(post.featured_image)))
+        
+        profile = UserProfile.objects.create(user=self.user, avatar=self.upload('yo.png', (400, 400)))
+        profile = UserProfile.objects.get(pk=profile.pk)
+        old_paths = self.variant_paths(profile.avatar)[:2]
+        profile.avatar = self.upload('yo_nuevo.png', (400, 400))
+        profile.save()
+        self.assertFalse(any(default_storage.exists(path) for path in old_paths))
+    
+    def test_generated_after_commit_in_background(self):
+        """Test: Con IMAGE_VARIANTS_ASYNC las variantes se generan tras el commit, fuera de la petición"""
+        from django.core.files.storage import default_storage
+        from core.image_variants import wait_for_variants
+        with self.settings(IMAGE_VARIANTS_ASYNC=True):
+            with self.captureOnCommitCallbacks() as callbacks:
+                lesson = self.create_lesson(self.upload('portada.png', (700, 350)))
+            paths = self.variant_paths(lesson.cover_image)
+            self.assertFalse(any(default_storage.exists(path) for path in paths))
+            for callback in callbacks:
+                callback()
+            wait_for_variants()
+        self.assertTrue(all(default_storage.exists(path) for path in paths))
+    
+    def test_invalid_image_does_not_break_save(self):
+        """Test: Un archivo que no es una imagen no genera variantes ni impide guardar"""
+        from django.core.files.storage import default_storage
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.image_variants import available_widths
+        with self.assertLogs('core.image_variants', level='WARNING'):
+            lesson = self.create_lesson(SimpleUploadedFile('rota.png', b'no es una imagen'))
+        self.assertTrue(Lesson.objects.filter(pk=lesson.pk).exists())
+        self.assertEqual(available_widths(default_storage, lesson.cover_image.name), [])
+    
+    def test_responsive_image_tag(self):
+        """Test: La etiqueta responsive_image emite srcset y sizes, o la imagen original sin variantes"""
+        from django.core.files.storage import default_storage
+        from django.template import Context, Template
+        from core.image_variants import delete_variants, variant_name
+        lesson = self.create_lesson(self.upload('portada.png', (1000, 500)))
+        template = Template('{% load custom_filters %}{% responsive_image lesson.cover_image lesson.title "50vw" %}')
+        html = template.render(Context({'lesson': lesson}))
+        webp_320 = default_storage.url(variant_name(lesson.cover_image.name, 320, 'webp'))
+        jpeg_640 = default_storage.url(variant_name(lesson.cover_image.name, 640, 'jpg'))
+        self.assertIn(f'<source type="image/webp" srcset="{webp_320} 320w, ', html)
+        self.assertIn(f'{jpeg_640} 640w"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('alt="Jerga cubana"', html)
+        
+        delete_variants(default_storage, lesson.cover_image.name)
+        html = template.render(Context({'lesson': lesson}))
+        self.assertNotIn('srcset', html)
+        self.assertIn(f'src="{lesson.cover_image.url}"', html)
+    
+    def test_backfill_command(self):
+        """Test: generate_image_variants genera las variantes que faltan y regenera con --force"""
+        from io import StringIO
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+        lesson = self.create_lesson(self.upload('portada.png', (700, 700)))
+        names = self.variant_paths(lesson.cover_image)
+        for name in names:
+            default_storage.delete(name)
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertIn('Lesson: 1 imágenes, 4 variantes escritas', out.getvalue())
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        
+        call_command('generate_image_variants', model='lesson', stdout=out)
+        self.assertIn('Lesson: 0 imágenes, 0 variantes escritas', out.getvalue())
+        call_command('generate_image_variants', model='lesson', force=True, stdout=out)
+        self.assertEqual(out.getvalue().count('Lesson: 1 imágenes, 4 variantes escritas'), 2)
+        self.assertEqual(sorted(default_storage.listdir('variants/lesson_covers')[1]), sorted(name.rsplit('/', 1)[1] for name in names))
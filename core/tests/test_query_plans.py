@@ -0,0 +1,160 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase, skipUnlessDBFeature
+from django.utils import timezone
+from core.comment_tree import comment_tree_queryset
+from core.facets import LESSON_FACETS, facet_count_queryset, lesson_facet_queryset
+from core.fuzzy import candidate_queryset
+from core.search import fts_available, lookup_expressions, search_queryset
+from core.models import ForumPost, Comment, BlogPost, Expression, Lesson, Tag
+from core.pagination import encode_cursor, decode_cursor, keyset_queryset
+from core.utils import get_popular_posts
+from core.views.blog_views import BlogListView
+from core.views.forum_views import ForumPostListView
+from core.views.lesson_views import LessonListView
+
+
+class QueryPlanTest(TestCase):
+    """
+    Tests para los planes de ejecución de las consultas más frecuentes:
+    fallan si SQLite recorre una tabla completa o crea un B-tree temporal
+    para ordenar, es decir, si falta el índice adecuado.
+    """
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN es específico de SQLite')
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = ForumPost.objects.create(title='Test Post', content='Contenido', author=self.user)
+    
+    def explain(self, queryset):
+        """Devuelve las líneas de EXPLAIN QUERY PLAN de queryset"""
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    
+    def assertUsesIndexes(self, queryset, label, allow_temp_sort=False):
+        """
+        Falla si el plan recorre una tabla sin índice u ordena con un B-tree temporal.
+        allow_temp_sort admite la ordenación cuando solo se ordenan las filas ya
+        seleccionadas por un índice (p. ej. los resultados de una búsqueda).
+        """
+        plan = self.explain(queryset)
+        for line in plan:
+            # Las tablas virtuales FTS5 resuelven MATCH con su propio índice
+            full_scan = line.startswith('SCAN ') and ' USING ' not in line and 'VIRTUAL TABLE' not in line
+            temp_sort = 'USE TEMP B-TREE' in line and not allow_temp_sort
+            if full_scan or temp_sort:
+                self.fail(f'{label}: plan sin índice adecuado\n' + '\n'.join(plan))
+    
+    def list_view_queryset(self, view_class, path, cursor_values=None):
+        """Consulta de una página de un ListView con paginación por cursor"""
+        request = self.factory.get(path)
+        request.user = self.user
+        view = view_class()
+        view.setup(request)
+        queryset = view.get_queryset()
+        cursor = None
+        if cursor_values is not None:
+            token = encode_cursor('next', cursor_values)
+            cursor = decode_cursor(token, queryset.model, view.cursor_ordering)
+        page = keyset_queryset(queryset, view.cursor_ordering, cursor)
+        return page[:view.paginate_by + 1]
+    
+    def test_forum_index_plans(self):
+        """Test: El índice del foro usa índices con y sin categoría, en cualquier página"""
+        deep = [False, timezone.now(), 100]
+        for path in ['/forum/', '/forum/?category=grammar']:
+            for cursor_values in [None, deep]:
+                with self.subTest(path=path, cursor=cursor_values):
+                    queryset = self.list_view_queryset(ForumPostListView, path, cursor_values)
+                    self.assertUsesIndexes(queryset, path)
+    
+    def test_blog_index_plans(self):
+        """Test: El índice del blog usa índices con y sin categoría, en cualquier página"""
+        deep = [timezone.now(), 100]
+        for path in ['/blog/', '/blog/?category=tips']:
+            for cursor_values in [None, deep]:
+                with self.subTest(path=path, cursor=cursor_values):
+                    queryset = self.list_view_queryset(BlogListView, path, cursor_values)
+                    self.assertUsesIndexes(queryset, path)
+    
+    def test_lesson_sort_plans(self):
+        """Test: Cada modo de orden del listado de lecciones recorre su índice"""
+        paths = [f'/core/lessons/?sort={sort}' for sort in LessonListView.sort_modes]
+        paths += ['/core/lessons/?country=MX', '/core/lessons/?difficulty=beginner',
+                  '/core/lessons/?country=MX&sort=country']
+        for path in paths:
+            with self.subTest(path=path):
+                request = self.factory.get(path)
+                request.user = self.user
+                view = LessonListView()
+                view.setup(request)
+                queryset = view.get_queryset()[:view.paginate_by]
+                self.assertUsesIndexes(queryset, path)
+    
+    def test_comment_tree_plan(self):
+        """Test: El árbol de comentarios usa el índice parcial por publicación"""
+        self.assertUsesIndexes(comment_tree_queryset(self.post, self.user), 'comment_tree')
+    
+    def test_popular_posts_plan(self):
+        """Test: Las publicaciones populares recorren el índice de hot_score"""
+        self.assertUsesIndexes(get_popular_posts(), 'get_popular_posts')
+    
+    def test_related_blog_posts_plan(self):
+        """Test: Los artículos relacionados del detalle del blog usan el índice por categoría"""
+        related = BlogPost.objects.filter(
+            category='tips', is_published=True, is_active=True
+        ).exclude(id=1)[:3]
+        self.assertUsesIndexes(related, 'related_posts')
+    
+    def test_facet_count_plans(self):
+        """Test: La reconstrucción de facetas agrupa por categoría sobre un índice"""
+        for model in [ForumPost, BlogPost]:
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndexes(facet_count_queryset(model), model.__name__)
+    
+    def test_lesson_facet_plans(self):
+        """Test: Los conteos de los filtros de lecciones agrupan sobre un índice"""
+        lessons = Lesson.objects.filter(is_active=True)
+        for _, field, _ in LESSON_FACETS:
+            with self.subTest(field=field):
+                self.assertUsesIndexes(lesson_facet_queryset(field, lessons), field)
+    
+    def test_search_plans(self):
+        """Test: Las búsquedas del foro usan el índice FTS5 en vez de LIKE sobre la tabla"""
+        if not fts_available():
+            self.skipTest('SQLite sin FTS5')
+        from django.core.cache import cache
+        cache.clear()
+        ForumPost.objects.create(title='Canción', content='Contenido', author=self.user, category='grammar')
+        # Consulta que llena la caché de coincidencias
+        self.assertUsesIndexes(search_queryset(ForumPost.objects.all(), 'canción'), 'search', allow_temp_sort=True)
+        for path in ['/forum/?q=canción', '/forum/?q=canción&category=grammar']:
+            with self.subTest(path=path):
+                queryset = self.list_view_queryset(ForumPostListView, path)
+                # Las coincidencias en caché se leen por pk; solo esas se ordenan
+                self.assertUsesIndexes(queryset, path, allow_temp_sort=True)
+    
+    def test_expression_lookup_plan(self):
+        """Test: La búsqueda por prefijo normalizado es un rango sobre el índice"""
+        plan = self.explain(lookup_expressions('que onda'))
+        self.assertTrue(any('text_normalized>? AND text_normalized<?' in line for line in plan), plan)
+        self.assertUsesIndexes(lookup_expressions('que onda'), 'lookup_expressions', allow_temp_sort=True)
+    
+    def test_trigram_candidates_plan(self):
+        """Test: La búsqueda aproximada lee solo los trigramas de la consulta desde el índice"""
+        for model in [Expression, Tag]:
+            with self.subTest(model=model.__name__):
+                queryset = candidate_queryset(model, 'chebere')
+                plan = self.explain(queryset)
+                self.assertTrue(any('(source=? AND trigram=?)' in line for line in plan), plan)
+                # Solo se agrupan y ordenan los trigramas que coinciden
+                self.assertUsesIndexes(queryset, model.__name__, allow_temp_sort=True)
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from core.models import Lesson, Expression, ForumPost, Comment, Practice, UserProfile
@@ -189,6 +189,50 @@ class LessonViewsTest(TestCase):
         response = self.client.get(reverse('core:edit_lesson', kwargs={'pk': self.lesson.pk}))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'core/edit_lesson.html')
+    
+    def test_lesson_list_sort_modes(self):
+        """Test: Los modos de orden con nombre ordenan el listado"""
+        from django.utils import timezone
+        older = Lesson.objects.create(user=self.user, title='A Lesson', content='Contenido', country='AR')
+        Lesson.objects.filter(pk=older.pk).update(created_at=self.lesson.created_at - timezone.timedelta(days=1))
+        self.client.login(username='testuser', password='testpass123')
+        expected = {
+            'newest': [self.lesson, older],
+            'oldest': [older, self.lesson],
+            'title': [older, self.lesson],
+            'title_desc': [self.lesson, older],
+            'country': [older, self.lesson],
+        }
+        for sort, lessons in expected.items():
+            with self.subTest(sort=sort):
+                response = self.client.get(reverse('core:lesson_list'), {'sort': sort})
+                self.assertEqual(list(response.context['lessons']), lessons)
+                self.assertEqual(response.context['sort_by'], sort)
+    
+    def test_lesson_list_sort_by_difficulty(self):
+        """Test: El orden por dificultad va de principiante a avanzado, no alfabético"""
+        advanced = Lesson.objects.create(user=self.user, title='Avanzada', content='Contenido', country='AR', level='advanced')
+        intermediate = Lesson.objects.create(user=self.user, title='Media', content='Contenido', country='AR', level='intermediate')
+        beginner = Lesson.objects.create(user=self.user, title='Básica', content='Contenido', country='AR', level='beginner')
+        Lesson.objects.exclude(pk__in=[advanced.pk, intermediate.pk, beginner.pk]).delete()
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('core:lesson_list'), {'sort': 'level'})
+        self.assertEqual(list(response.context['lessons']), [beginner, intermediate, advanced])
+        
+        # El rango sigue al nivel al editarlo
+        advanced.level = 'beginner'
+        advanced.save(update_fields=['level'])
+        response = self.client.get(reverse('core:lesson_list'), {'sort': 'level', 'difficulty': 'beginner'})
+        self.assertEqual(list(response.context['lessons']), [beginner, advanced])
+    
+    def test_lesson_list_unknown_sort_falls_back(self):
+        """Test: Un orden desconocido usa el orden por defecto en vez de llegar a order_by"""
+        self.client.login(username='testuser', password='testpass123')
+        for sort in ['content', 'cultural_notes', 'user__password', 'no_existe', '-created_at']:
+            with self.subTest(sort=sort):
+                response = self.client.get(reverse('core:lesson_list'), {'sort': sort})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['sort_by'], 'newest')
 
 
 class ForumViewsTest(TestCase):
@@ -301,4 +345,1413 @@ class SecurityTest(TestCase):
         }
         response = self.client.post(reverse('core:create_lesson'), form_data)
         # La aplicación no debería fallar con contenido malicioso
-        self.assertNotEqual(response.status_code, 500) 
\ No newline at end of file
+        self.assertNotEqual(response.status_code, 500) 
+
+class CursorPaginationTest(TestCase):
+    """Tests para la paginación por cursor del foro y del blog"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        for i in range(32):
+            ForumPost.objects.create(
+                title=f'Post {i}',
+                slug=f'post-{i}',
+                content='Contenido',
+                author=self.user,
+                category='grammar' if i % 2 else 'general',
+                is_pinned=(i == 3),
+            )
+    
+    def _walk_forum(self, params=None):
+        """Recorre todas las páginas del foro siguiendo los cursores"""
+        params = dict(params or {})
+        seen = []
+        pages = 0
+        while True:
+            response = self.client.get(reverse('core:forum_index'), params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen.extend(post.pk for post in page)
+            pages += 1
+            if not page.has_next():
+                return seen, pages
+            params['cursor'] = page.next_cursor
+    
+    def test_forum_walks_every_post_once(self):
+        """Test: Recorrer el foro por cursor visita cada post exactamente una vez"""
+        seen, pages = self._walk_forum()
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 32)
+        self.assertEqual(len(set(seen)), 32)
+    
+    def test_forum_pinned_posts_first(self):
+        """Test: Los posts fijados aparecen primero"""
+        response = self.client.get(reverse('core:forum_index'))
+        first = response.context['page_obj'][0]
+        self.assertTrue(first.is_pinned)
+    
+    def test_forum_cursor_with_category_filter(self):
+        """Test: El cursor respeta el filtro de categoría"""
+        seen, _ = self._walk_forum({'category': 'grammar'})
+        self.assertEqual(len(seen), 16)
+        self.assertFalse(ForumPost.objects.filter(pk__in=seen).exclude(category='grammar').exists())
+    
+    def test_forum_previous_cursor_returns_previous_page(self):
+        """Test: El cursor anterior devuelve la página anterior"""
+        first = self.client.get(reverse('core:forum_index')).context['page_obj']
+        second = self.client.get(reverse('core:forum_index'), {'cursor': first.next_cursor}).context['page_obj']
+        self.assertTrue(second.has_previous())
+        back = self.client.get(reverse('core:forum_index'), {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual([p.pk for p in back], [p.pk for p in first])
+    
+    def test_forum_invalid_cursor_shows_first_page(self):
+        """Test: Un cursor inválido muestra la primera página"""
+        response = self.client.get(reverse('core:forum_index'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page_obj'].has_previous())
+    
+    def test_forum_page_does_not_count(self):
+        """Test: Las páginas profundas no ejecutan COUNT(*)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        first = self.client.get(reverse('core:forum_index')).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('core:forum_index'), {'cursor': first.next_cursor})
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in queries.captured_queries))
+    
+    def test_blog_list_cursor_pagination(self):
+        """Test: El blog pagina por cursor solo los artículos publicados"""
+        from core.models import BlogPost
+        for i in range(8):
+            BlogPost.objects.create(
+                title=f'Artículo {i}', slug=f'articulo-{i}', content='Contenido',
+                author=self.user, is_published=(i != 0)
+            )
+        first = self.client.get(reverse('core:blog_list')).context['page_obj']
+        self.assertEqual(len(first), 6)
+        second = self.client.get(reverse('core:blog_list'), {'cursor': first.next_cursor}).context['page_obj']
+        self.assertEqual(len(second), 1)
+        self.assertFalse(second.has_next())
+
+
+class ViewCounterTest(TestCase):
+    """Tests para el contador de visitas con escritura diferida"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        from core.models import BlogPost
+        from core.view_counts import get_cache
+        cache.clear()
+        get_cache().clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.blog_post = BlogPost.objects.create(
+            title='Artículo', slug='articulo', content='Contenido',
+            author=self.user, is_published=True
+        )
+        self.forum_post = ForumPost.objects.create(
+            title='Test Post', content='Contenido', author=self.user
+        )
+    
+    def test_blog_views_are_buffered(self):
+        """Test: Las visitas del blog no escriben en la base de datos hasta el volcado"""
+        from django.core.management import call_command
+        from io import StringIO
+        updated_at = self.blog_post.updated_at
+        url = reverse('core:blog_detail', kwargs={'slug': self.blog_post.slug})
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            for _ in range(3):
+                response = self.client.get(url)
+        self.assertEqual(response.context['post'].views, 3)
+        self.blog_post.refresh_from_db()
+        self.assertEqual(self.blog_post.views, 0)
+        
+        call_command('flush_view_counts', stdout=StringIO())
+        self.blog_post.refresh_from_db()
+        self.assertEqual(self.blog_post.views, 3)
+        self.assertEqual(self.blog_post.updated_at, updated_at)
+    
+    def test_flush_batches_several_objects(self):
+        """Test: Un volcado suma las visitas pendientes de varios objetos"""
+        from core.view_counts import record_view, flush_view_counts, pending_views
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            record_view(self.forum_post)
+            record_view(self.forum_post)
+            record_view(self.blog_post)
+        self.assertEqual(flush_view_counts(), 3)
+        self.assertEqual(pending_views(self.forum_post), 0)
+        self.forum_post.refresh_from_db()
+        self.assertEqual(self.forum_post.views, 2)
+        self.assertEqual(flush_view_counts(), 0)
+    
+    def test_forum_detail_records_view(self):
+        """Test: El detalle del foro registra la visita"""
+        from core.view_counts import pending_views
+        self.client.login(username='testuser', password='testpass123')
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            self.client.get(reverse('core:post_detail', kwargs={'post_id': self.forum_post.pk}))
+        self.assertEqual(pending_views(self.forum_post), 1)
+    
+    def test_periodic_flush_from_request(self):
+        """Test: Con intervalo configurado, la primera visita vuelca lo pendiente"""
+        from core.view_counts import record_view
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=60):
+            record_view(self.forum_post)
+        self.forum_post.refresh_from_db()
+        self.assertEqual(self.forum_post.views, 1)
+    
+    def test_pending_views_survive_default_cache_clear(self):
+        """Test: Las visitas pendientes no comparten la caché por defecto"""
+        from django.core.cache import cache
+        from core.view_counts import record_view, flush_view_counts
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            record_view(self.forum_post)
+        cache.clear()
+        self.assertEqual(flush_view_counts(), 1)
+    
+    def test_view_during_flush_not_lost(self):
+        """Test: Una visita que llega mientras se vuelca su objeto queda para el siguiente volcado"""
+        from unittest import mock
+        from core.view_counts import record_view, flush_view_counts, get_cache, pending_views
+        view_cache = get_cache()
+        decr = view_cache.decr
+        visits = []
+        
+        def decr_then_visit(key, delta):
+            result = decr(key, delta)
+            if not visits:
+                visits.append(record_view(self.forum_post))
+            return result
+        
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            record_view(self.forum_post)
+            with mock.patch.object(view_cache, 'decr', side_effect=decr_then_visit):
+                self.assertEqual(flush_view_counts(), 1)
+        self.assertEqual(pending_views(self.forum_post), 1)
+        self.assertEqual(flush_view_counts(), 1)
+        self.forum_post.refresh_from_db()
+        self.assertEqual(self.forum_post.views, 2)
+    
+    def test_single_flush_at_a_time(self):
+        """Test: Un volcado en curso impide que otro reste las mismas visitas"""
+        from core.view_counts import FLUSHING_KEY, record_view, flush_view_counts, get_cache
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            record_view(self.forum_post)
+        get_cache().add(FLUSHING_KEY, 1)
+        self.assertEqual(flush_view_counts(), 0)
+        get_cache().delete(FLUSHING_KEY)
+        self.assertEqual(flush_view_counts(), 1)
+
+
+class CommentTreeTest(TestCase):
+    """Tests para la carga del árbol de comentarios en una sola consulta"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = ForumPost.objects.create(
+            title='Test Post', content='Contenido', author=self.user
+        )
+    
+    def create_thread(self, roots, replies_per_comment):
+        """Crea comentarios de primer nivel con respuestas anidadas en dos niveles"""
+        for i in range(roots):
+            root = Comment.objects.create(post=self.post, author=self.user, content=f'Raíz {i}')
+            for j in range(replies_per_comment):
+                reply = Comment.objects.create(
+                    post=self.post, author=self.user, content=f'Respuesta {i}.{j}', parent=root
+                )
+                Comment.objects.create(
+                    post=self.post, author=self.user, content=f'Respuesta {i}.{j}.0', parent=reply
+                )
+    
+    def test_builds_nested_tree(self):
+        """Test: El árbol respeta el anidamiento, el orden y sube al primer nivel las respuestas de comentarios inactivos"""
+        from core.comment_tree import load_comment_tree
+        first = Comment.objects.create(post=self.post, author=self.user, content='Primero')
+        second = Comment.objects.create(post=self.post, author=self.user, content='Segundo')
+        reply = Comment.objects.create(post=self.post, author=self.user, content='Respuesta', parent=first)
+        nested = Comment.objects.create(post=self.post, author=self.user, content='Anidada', parent=reply)
+        hidden = Comment.objects.create(post=self.post, author=self.user, content='Oculto', is_active=False)
+        orphan = Comment.objects.create(post=self.post, author=self.user, content='Huérfana', parent=hidden)
+        reply.likes.add(self.user)
+        
+        with self.assertNumQueries(1):
+            roots = load_comment_tree(self.post, self.user)
+        
+        self.assertEqual(roots, [orphan, second, first])
+        self.assertEqual(roots[0].depth, 0)
+        self.assertEqual(roots[2].children, [reply])
+        self.assertEqual(roots[2].children[0].children, [nested])
+        self.assertEqual(roots[2].children[0].children[0].depth, 2)
+        self.assertTrue(roots[2].children[0].user_liked)
+        self.assertFalse(roots[2].user_liked)
+    
+    def test_replies_of_soft_deleted_parent_match_counter(self):
+        """Test: Al borrar un comentario con respuestas activas, el árbol muestra tantos comentarios como comments_count"""
+        from core.comment_tree import load_comment_tree
+        parent = Comment.objects.create(post=self.post, author=self.user, content='Padre')
+        reply = Comment.objects.create(post=self.post, author=self.user, content='Respuesta viva', parent=parent)
+        Comment.objects.create(post=self.post, author=self.user, content='Nieta viva', parent=reply)
+        Comment.objects.get(pk=parent.pk).soft_delete()
+        
+        roots = load_comment_tree(self.post)
+        rendered, stack = 0, list(roots)
+        while stack:
+            comment = stack.pop()
+            rendered += 1
+            stack.extend(comment.children)
+        self.post.refresh_from_db()
+        self.assertEqual(rendered, self.post.comments_count)
+        self.assertEqual(rendered, 2)
+        self.assertEqual(roots, [reply])
+        
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('core:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, 'Respuesta viva')
+        self.assertContains(response, 'Nieta viva')
+        self.assertNotContains(response, 'Padre')
+    
+    def test_constant_queries_regardless_of_size(self):
+        """Test: El detalle del post hace las mismas consultas con 3 o 60 comentarios"""
+        url = reverse('core:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.login(username='testuser', password='testpass123')
+        self.create_thread(roots=1, replies_per_comment=1)
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            self.client.get(url)  # La primera petición también actualiza la sesión
+            with CaptureQueriesContext(connection) as small:
+                self.client.get(url)
+            
+            self.create_thread(roots=10, replies_per_comment=3)
+            with CaptureQueriesContext(connection) as large:
+                response = self.client.get(url)
+        
+        self.assertEqual(len(large), len(small))
+        self.assertContains(response, 'Respuesta 9.2.0')
+
+
+class MentionTest(TestCase):
+    """Tests para la resolución de menciones al publicar comentarios"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.ana = User.objects.create_user(username='ana', password='testpass123')
+        self.juan = User.objects.create_user(username='juan_', password='testpass123')
+        self.post = ForumPost.objects.create(
+            title='Test Post', content='Contenido', author=self.user
+        )
+    
+    def test_extract_mentions(self):
+        """Test: Se ignoran puntuación, emails y duplicados, con un máximo por comentario"""
+        from core.utils import extract_mentions
+        text = 'Hola @ana, ¿viste a @juan_? (@ana) escribe a correo@ejemplo.com @pepe.'
+        self.assertEqual(extract_mentions(text), ['ana', 'juan_', 'pepe'])
+        self.assertEqual(extract_mentions(text, limit=2), ['ana', 'juan_'])
+    
+    def test_mentions_resolved_in_one_query(self):
+        """Test: Todas las menciones se resuelven con una sola consulta"""
+        from core.utils import resolve_mentions
+        text = ' '.join(f'@usuario{i}' for i in range(300)) + ' @ana @juan_'
+        with self.assertNumQueries(1):
+            users = resolve_mentions(text, limit=500)
+        self.assertEqual({user.username for user in users}, {'ana', 'juan_'})
+    
+    def test_comment_notifies_mentioned_users_once(self):
+        """Test: Publicar un comentario notifica una vez a cada usuario mencionado"""
+        from unittest import mock
+        self.client.login(username='testuser', password='testpass123')
+        with mock.patch('core.views.forum_views.notify_mention') as notify:
+            self.client.post(
+                reverse('core:post_detail', kwargs={'post_id': self.post.pk}),
+                {'content': '@ana @ana @juan_! @testuser @nadie'}
+            )
+        notify.assert_called_once()
+        mentioned = notify.call_args.args[1]
+        self.assertEqual({user.username for user in mentioned}, {'ana', 'juan_', 'testuser'})
+
+
+class LikeToggleTest(TestCase):
+    """Tests para los endpoints de "me gusta" de posts, artículos y comentarios"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from core.models import BlogPost
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = ForumPost.objects.create(
+            title='Test Post', content='Contenido', author=self.user
+        )
+        self.comment = Comment.objects.create(post=self.post, author=self.user, content='Comentario')
+        self.blog_post = BlogPost.objects.create(
+            title='Artículo', slug='articulo', content='Contenido',
+            author=self.user, is_published=True
+        )
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_toggle_endpoints(self):
+        """Test: Cada endpoint alterna el like y devuelve el contador almacenado"""
+        targets = [
+            (self.post, reverse('core:like_post', kwargs={'post_id': self.post.pk})),
+            (self.comment, reverse('core:like_comment', kwargs={'comment_id': self.comment.pk})),
+            (self.blog_post, reverse('core:blog_like', kwargs={'slug': self.blog_post.slug})),
+        ]
+        for obj, url in targets:
+            with self.subTest(model=type(obj).__name__):
+                self.assertEqual(self.client.post(url).json(), {'liked': True, 'likes_count': 1})
+                self.assertTrue(obj.likes.filter(pk=self.user.pk).exists())
+                self.assertEqual(self.client.post(url).json(), {'liked': False, 'likes_count': 0})
+                self.assertFalse(obj.likes.filter(pk=self.user.pk).exists())
+                obj.refresh_from_db()
+                self.assertEqual(obj.likes_count, 0)
+    
+    def test_toggle_requires_post(self):
+        """Test: Un GET (enlace o precarga) no alterna el like"""
+        urls = [
+            reverse('core:like_post', kwargs={'post_id': self.post.pk}),
+            reverse('core:like_comment', kwargs={'comment_id': self.comment.pk}),
+            reverse('core:blog_like', kwargs={'slug': self.blog_post.slug}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertFalse(self.post.likes.exists())
+        self.assertFalse(self.comment.likes.exists())
+        self.assertFalse(self.blog_post.likes.exists())
+    
+    def test_toggle_cost_does_not_depend_on_likes(self):
+        """Test: Alternar un like hace las mismas consultas con 1 o 200 likes previos"""
+        from core.likes import toggle_like
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        other = User.objects.create_user(username='otro', password='testpass123')
+        self.post.likes.add(other)
+        with CaptureQueriesContext(connection) as few:
+            toggle_like(self.post, self.user)
+        toggle_like(self.post, self.user)
+        
+        users = User.objects.bulk_create(
+            User(username=f'fan{i}') for i in range(200)
+        )
+        self.post.likes.add(*users)
+        with CaptureQueriesContext(connection) as many:
+            liked, likes_count = toggle_like(self.post, self.user)
+        
+        self.assertEqual(len(many), len(few))
+        self.assertTrue(liked)
+        self.assertEqual(likes_count, 202)
+    
+    def test_list_pages_mark_liked_items(self):
+        """Test: Los listados marcan los likes del usuario con una consulta por modelo"""
+        from core.likes import liked_ids
+        other = ForumPost.objects.create(title='Otro', content='Contenido', author=self.user)
+        self.post.likes.add(self.user)
+        self.blog_post.likes.add(self.user)
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(liked_ids(self.user, ForumPost, [self.post.pk, other.pk]), {self.post.pk})
+        
+        response = self.client.get(reverse('core:forum_index'))
+        liked = {post.pk: post.user_liked for post in response.context['posts']}
+        self.assertEqual(liked, {self.post.pk: True, other.pk: False})
+        
+        response = self.client.get(reverse('core:blog_list'))
+        self.assertTrue(response.context['posts'][0].user_liked)
+
+
+class FacetCountsTest(TestCase):
+    """Tests para los conteos por categoría en caché del foro y el blog"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.post = ForumPost.objects.create(
+            title='Test Post', content='Contenido', author=self.user, category='grammar'
+        )
+    
+    def test_counts_follow_changes_without_queries(self):
+        """Test: Los conteos se ajustan al crear, ocultar y recategorizar sin volver a consultar"""
+        from core.facets import get_facet_counts
+        self.assertEqual(get_facet_counts(ForumPost)['grammar'], 1)
+        
+        other = ForumPost.objects.create(title='Otro', content='Contenido', author=self.user, category='culture')
+        self.post.category = 'culture'
+        self.post.save()
+        other.soft_delete()
+        with self.assertNumQueries(0):
+            counts = get_facet_counts(ForumPost)
+        self.assertEqual(counts['grammar'], 0)
+        self.assertEqual(counts['culture'], 1)
+        
+        other.is_active = True
+        other.save()
+        self.post.delete()
+        self.assertEqual(get_facet_counts(ForumPost)['culture'], 1)
+    
+    def test_blog_counts_only_published(self):
+        """Test: En el blog solo cuentan los artículos publicados"""
+        from core.facets import get_facet_counts
+        from core.models import BlogPost
+        get_facet_counts(BlogPost)
+        draft = BlogPost.objects.create(
+            title='Borrador', slug='borrador', content='Contenido', author=self.user, category='tips'
+        )
+        self.assertEqual(get_facet_counts(BlogPost)['tips'], 0)
+        draft.is_published = True
+        draft.save()
+        self.assertEqual(get_facet_counts(BlogPost)['tips'], 1)
+        
+        response = self.client.get(reverse('core:blog_list'))
+        self.assertIn(('tips', 'Tips de Aprendizaje', 1), [
+            (value, str(name), count) for value, name, count in response.context['category_facets']
+        ])
+    
+    def test_rebuild_when_cache_is_missing(self):
+        """Test: Sin conteos en caché se reconstruyen con una consulta"""
+        from django.core.cache import cache
+        from core.facets import get_facet_counts
+        get_facet_counts(ForumPost)
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_facet_counts(ForumPost)['grammar'], 1)
+
+
+class FullTextSearchTest(TestCase):
+    """Tests para la búsqueda de texto completo con FTS5"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from core.search import fts_available
+        if not fts_available():
+            self.skipTest('SQLite sin FTS5')
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.post = ForumPost.objects.create(
+            title='Canción de Bad Bunny', content='¿Qué significa "bellaqueo" en esta canción?',
+            author=self.user
+        )
+        self.other = ForumPost.objects.create(
+            title='Expresiones chilenas', content='La palabra cachai aparece en una canción',
+            author=self.user
+        )
+    
+    def test_search_is_accent_insensitive_and_ranked(self):
+        """Test: La búsqueda ignora tildes, acepta prefijos y ordena por relevancia"""
+        from core.utils import search_posts
+        results = list(search_posts('cancion'))
+        self.assertEqual(results, [self.post, self.other])
+        self.assertEqual(list(search_posts('bellaq')), [self.post])
+        self.assertEqual(list(search_posts('"*) OR')), [])
+    
+    def test_index_follows_updates_and_deletes(self):
+        """Test: Los triggers mantienen el índice sincronizado"""
+        from core.utils import search_posts
+        self.other.content = 'Ahora hablamos de pololos'
+        self.other.save()
+        self.assertEqual(list(search_posts('cachai')), [])
+        self.assertEqual(list(search_posts('pololos')), [self.other])
+        self.other.delete()
+        self.assertEqual(list(search_posts('pololos')), [])
+    
+    def test_forum_search_highlights_snippet(self):
+        """Test: El índice del foro muestra el fragmento resaltado y escapado"""
+        ForumPost.objects.create(
+            title='Peligro', content='<script>alert(1)</script> bellaqueo', author=self.user
+        )
+        response = self.client.get(reverse('core:forum_index'), {'q': 'bellaqueo'})
+        self.assertEqual(len(response.context['posts']), 2)
+        self.assertContains(response, '<mark>bellaqueo</mark>')
+        self.assertContains(response, '&lt;script&gt;')
+        self.assertNotContains(response, '<script>alert(1)</script>')
+    
+    def test_rebuild_command(self):
+        """Test: rebuild_search_index reindexa filas escritas sin triggers"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from core.utils import search_posts
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO core_forumpost_fts(core_forumpost_fts) VALUES ('delete-all')")
+        self.assertEqual(list(search_posts('cachai')), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(list(search_posts('cachai')), [self.other])
+
+
+class ExpressionAutocompleteTest(TestCase):
+    """Tests para el autocompletado de expresiones en memoria"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        from core.view_counts import get_cache
+        cache.clear()
+        get_cache().clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.lesson = Lesson.objects.create(
+            title='Jerga mexicana', content='Contenido', user=self.user, country='MX'
+        )
+        self.que_onda = Expression.objects.create(
+            lesson=self.lesson, text='¿Qué onda?', meaning='¿Qué tal?', views=5
+        )
+        self.que_pedo = Expression.objects.create(
+            lesson=self.lesson, text='¿Qué pedo?', meaning='¿Qué pasa?', views=20
+        )
+        self.que = Expression.objects.create(lesson=self.lesson, text='Qué', meaning='Qué')
+        self.url = reverse('core:expression_autocomplete')
+    
+    def suggestions(self, query, **params):
+        response = self.client.get(self.url, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+    
+    def test_ranked_by_exact_match_then_popularity(self):
+        """Test: La coincidencia exacta va primero y luego las más populares"""
+        self.assertEqual(self.suggestions('que'), [self.que.pk, self.que_pedo.pk, self.que_onda.pk])
+        self.assertEqual(self.suggestions('QUE O'), [self.que_onda.pk])
+        self.assertEqual(self.suggestions('que', limit=1), [self.que.pk])
+        self.assertEqual(self.suggestions(''), [])
+    
+    def test_served_from_memory(self):
+        """Test: Tras construir el índice las sugerencias no consultan la base de datos"""
+        self.suggestions('que')
+        with self.assertNumQueries(0):
+            from core.autocomplete import autocomplete_expressions
+            self.assertEqual(len(autocomplete_expressions('qu')), 3)
+    
+    def test_rebuilds_after_save_and_delete(self):
+        """Test: Guardar o borrar una expresión invalida el índice"""
+        self.assertEqual(self.suggestions('chido'), [])
+        chido = Expression.objects.create(lesson=self.lesson, text='Chido', meaning='Genial')
+        self.assertEqual(self.suggestions('chi'), [chido.pk])
+        chido.soft_delete()
+        self.assertEqual(self.suggestions('chi'), [])
+        self.que_onda.delete()
+        self.assertEqual(self.suggestions('que o'), [])
+    
+    def test_selection_feeds_popularity(self):
+        """Test: Elegir una sugerencia suma popularidad al volcar las visitas"""
+        from core.autocomplete import build_index
+        from core.view_counts import flush_view_counts
+        selected_url = reverse('core:expression_selected', args=[self.que_onda.pk])
+        for _ in range(20):
+            response = self.client.post(selected_url)
+        self.assertEqual(response.json()['views'], 25)
+        self.assertEqual(self.client.get(selected_url).status_code, 405)
+        flush_view_counts()
+        self.que_onda.refresh_from_db()
+        self.assertEqual(self.que_onda.views, 25)
+        results = build_index().search('que')
+        self.assertEqual([s.id for s in results], [self.que.pk, self.que_onda.pk, self.que_pedo.pk])
+
+
+class FuzzySearchTest(TestCase):
+    """Tests para la búsqueda aproximada por trigramas"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from core.models import Tag
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.lesson = Lesson.objects.create(
+            title='Jerga venezolana', content='Contenido', user=self.user, country='VE'
+        )
+        self.chevere = Expression.objects.create(lesson=self.lesson, text='¡Chévere!', meaning='Genial')
+        self.pana = Expression.objects.create(lesson=self.lesson, text='Pana', meaning='Amigo')
+        self.tag = Tag.objects.create(name='Panitas')
+    
+    def test_similarity(self):
+        """Test: La similitud tolera variantes ortográficas de la jerga"""
+        from core.fuzzy import similarity
+        self.assertEqual(similarity('Chévere', 'chevere'), 1.0)
+        self.assertGreaterEqual(similarity('chebere', 'chévere'), 0.3)
+        self.assertGreaterEqual(similarity('chevre', 'chévere'), 0.3)
+        self.assertLess(similarity('pana', 'chévere'), 0.3)
+        self.assertEqual(similarity('', 'pana'), 0.0)
+    
+    def test_fuzzy_lookup_ranked_by_similarity(self):
+        """Test: La API devuelve expresiones y etiquetas ordenadas por similitud"""
+        response = self.client.get(reverse('core:fuzzy_lookup'), {'q': 'chebere'})
+        data = response.json()
+        self.assertEqual([e['id'] for e in data['expressions']], [self.chevere.pk])
+        self.assertEqual(data['tags'], [])
+        
+        data = self.client.get(reverse('core:fuzzy_lookup'), {'q': 'panita'}).json()
+        self.assertEqual([e['id'] for e in data['expressions']], [self.pana.pk])
+        self.assertEqual([t['id'] for t in data['tags']], [self.tag.pk])
+        self.assertGreater(data['tags'][0]['similarity'], data['expressions'][0]['similarity'])
+    
+    def test_index_follows_changes(self):
+        """Test: Los trigramas se actualizan al editar y se ocultan o borran con la expresión"""
+        from core.fuzzy import fuzzy_search
+        from core.models import SearchTrigram
+        self.chevere.text = 'Bacán'
+        self.chevere.save()
+        self.assertEqual(fuzzy_search(Expression, 'chebere'), [])
+        self.assertEqual(fuzzy_search(Expression, 'bakan'), [self.chevere])
+        self.chevere.soft_delete()
+        self.assertEqual(fuzzy_search(Expression, 'bacan'), [])
+        self.chevere.delete()
+        self.assertFalse(SearchTrigram.objects.filter(source='expression', object_id=self.chevere.pk).exists())
+    
+    def test_rebuild_command(self):
+        """Test: rebuild_trigram_index reconstruye el índice desde las tablas"""
+        from io import StringIO
+        from django.core.management import call_command
+        from core.fuzzy import fuzzy_search
+        from core.models import SearchTrigram
+        SearchTrigram.objects.all().delete()
+        self.assertEqual(fuzzy_search(Expression, 'chevere'), [])
+        call_command('rebuild_trigram_index', stdout=StringIO())
+        self.assertEqual(fuzzy_search(Expression, 'chevere'), [self.chevere])
+    
+    def test_lesson_list_did_you_mean(self):
+        """Test: Sin resultados, el listado de lecciones sugiere la expresión más parecida"""
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'chebere'})
+        self.assertEqual(response.context['did_you_mean'], '¡Chévere!')
+        self.assertContains(response, '¿Quisiste decir')
+        
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'venezolana'})
+        self.assertNotIn('did_you_mean', response.context)
+
+
+class UnifiedSearchTest(TestCase):
+    """Tests para la búsqueda unificada"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from core.models import BlogPost
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.lesson = Lesson.objects.create(
+            title='Jerga chilena', content='Aprende a decir cachai', user=self.user, country='CL'
+        )
+        self.expression = Expression.objects.create(lesson=self.lesson, text='¿Cachai?', meaning='¿Entiendes?')
+        self.post = ForumPost.objects.create(title='Duda', content='¿Qué significa cachai?', author=self.user)
+        self.blog_post = BlogPost.objects.create(
+            title='Cachai y otras muletillas', slug='cachai', content='Contenido',
+            author=self.user, is_published=True
+        )
+        BlogPost.objects.create(
+            title='Borrador sobre cachai', slug='borrador', content='Contenido', author=self.user
+        )
+    
+    def test_results_grouped_by_type(self):
+        """Test: La búsqueda devuelve una sección por tipo de contenido"""
+        response = self.client.get(reverse('core:search'), {'q': 'cachai'})
+        self.assertEqual(response.status_code, 200)
+        sections = {section.name: section.results for section in response.context['sections']}
+        self.assertEqual(sections, {
+            'lessons': [self.lesson],
+            'expressions': [self.expression],
+            'posts': [self.post],
+            'blog_posts': [self.blog_post],
+        })
+        self.assertEqual(response.context['total_results'], 4)
+        self.assertContains(response, '<mark>cachai</mark>')
+    
+    def test_empty_query(self):
+        """Test: Sin término de búsqueda no se consulta ninguna sección"""
+        response = self.client.get(reverse('core:search'))
+        self.assertEqual(response.context['sections'], [])
+        self.assertContains(response, 'Ingresa un término de búsqueda')
+    
+    def test_requires_login(self):
+        """Test: La búsqueda requiere iniciar sesión"""
+        self.client.logout()
+        response = self.client.get(reverse('core:search'), {'q': 'cachai'})
+        self.assertEqual(response.status_code, 302)
+
+
+class ConcurrentSearchTest(TransactionTestCase):
+    """Tests para la ejecución en paralelo de las secciones de búsqueda"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.post = ForumPost.objects.create(title='Duda', content='¿Qué significa cachai?', author=self.user)
+    
+    def slow_section(self, name, delay):
+        import time
+        from core.global_search import SearchSection
+        
+        def queryset():
+            time.sleep(delay)
+            return ForumPost.objects.filter(is_active=True)
+        return SearchSection(name, name, 5, queryset, ['title', 'content'])
+    
+    def test_sections_run_concurrently(self):
+        """Test: La latencia es la de la sección más lenta, no la suma"""
+        import time
+        from core.global_search import search_all
+        sections = [self.slow_section(f'slow{i}', 0.3) for i in range(4)]
+        start = time.monotonic()
+        results = search_all('cachai', sections=sections)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual([result.results for result in results], [[self.post]] * 4)
+    
+    def test_time_budget(self):
+        """Test: Las secciones que superan el presupuesto se marcan timed_out"""
+        from core.global_search import search_all
+        sections = [self.slow_section('fast', 0), self.slow_section('slow', 1.0)]
+        fast, slow = search_all('cachai', sections=sections, budget=0.5)
+        self.assertEqual((fast.results, fast.timed_out), ([self.post], False))
+        self.assertEqual((slow.results, slow.timed_out), ([], True))
+    
+    def test_busy_pool_runs_in_request(self):
+        """Test: Con el pool ocupado por otras búsquedas, las secciones se ejecutan en la petición"""
+        import threading
+        from unittest import mock
+        from core import global_search
+        executor, _ = global_search._get_executor()
+        busy = threading.BoundedSemaphore(1)
+        busy.acquire()
+        sections = [self.slow_section('a', 0), self.slow_section('b', 0)]
+        with mock.patch.object(global_search, '_get_executor', return_value=(executor, busy)), \
+                mock.patch.object(executor, 'submit') as submit:
+            results = global_search.search_all('cachai', sections=sections)
+        submit.assert_not_called()
+        self.assertEqual([(r.results, r.timed_out) for r in results], [([self.post], False)] * 2)
+
+
+class SearchCacheTest(TestCase):
+    """Tests para la caché de resultados de búsqueda"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        from core.search import fts_available
+        if not fts_available():
+            self.skipTest('SQLite sin FTS5')
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.chamba = Lesson.objects.create(
+            title='Chamba', content='Trabajo en México: la chamba', user=self.user, country='MX'
+        )
+        self.pega = Lesson.objects.create(
+            title='Pega', content='En Chile la chamba es la pega', user=self.user, country='CL'
+        )
+    
+    def hits(self, text, **filters):
+        from core.search_cache import get_search_hits
+        queryset = Lesson.objects.filter(is_active=True, **filters)
+        return [hit.pk for hit in get_search_hits(queryset, text, fields=['title', 'content'])]
+    
+    def test_repeated_query_served_from_cache(self):
+        """Test: Una búsqueda repetida (con otra grafía) no consulta la base de datos"""
+        self.assertEqual(self.hits('chamba'), [self.chamba.pk, self.pega.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.hits('¡CHAMBA!'), [self.chamba.pk, self.pega.pk])
+    
+    def test_filters_are_part_of_the_key(self):
+        """Test: Los filtros del queryset forman parte de la clave"""
+        self.assertEqual(self.hits('chamba', country='CL'), [self.pega.pk])
+        self.assertEqual(self.hits('chamba', country='MX'), [self.chamba.pk])
+    
+    def test_content_change_invalidates(self):
+        """Test: Guardar o borrar una lección invalida las búsquedas en caché"""
+        self.assertEqual(self.hits('pololo'), [])
+        pololo = Lesson.objects.create(title='Pololo', content='Novio', user=self.user, country='CL')
+        self.assertEqual(self.hits('pololo'), [pololo.pk])
+        pololo.delete()
+        self.assertEqual(self.hits('pololo'), [])
+    
+    def test_too_many_hits_not_cached(self):
+        """Test: Las búsquedas demasiado amplias se resuelven sin caché"""
+        from core.search_cache import get_search_hits
+        with self.settings(SEARCH_CACHE_MAX_HITS=1):
+            self.assertIsNone(get_search_hits(Lesson.objects.all(), 'chamba'))
+            response = self.client.get(reverse('core:lesson_list'), {'q': 'chamba'})
+        self.assertEqual(list(response.context['lessons']), [self.chamba, self.pega])
+    
+    def test_lesson_list_uses_cached_hits(self):
+        """Test: El listado de lecciones pagina las coincidencias en orden de relevancia"""
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'chamba'})
+        self.assertEqual(list(response.context['lessons']), [self.chamba, self.pega])
+        self.assertEqual(response.context['paginator'].count, 2)
+        self.assertContains(response, '<mark>chamba</mark>')
+        
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'chamba', 'sort': 'title'})
+        self.assertEqual(list(response.context['lessons']), [self.chamba, self.pega])
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'chamba', 'sort': 'title_desc'})
+        self.assertEqual(list(response.context['lessons']), [self.pega, self.chamba])
+        self.assertEqual(response.context['lessons'][0].search_snippet.count('\x02'), 1)
+
+
+class SearchTelemetryTest(TestCase):
+    """Tests para la telemetría de búsquedas"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        from core import search_log
+        cache.clear()
+        # Descartar las búsquedas de otros tests que sigan en el buffer
+        search_log._buffer.clear()
+        self.addCleanup(search_log._buffer.clear)
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        self.post = ForumPost.objects.create(
+            title='¿Qué es la chamba?', content='Trabajo', author=self.user, category='vocabulary'
+        )
+        Lesson.objects.create(title='Chamba', content='Trabajo', user=self.user, country='MX')
+    
+    def test_entry_points_record_searches(self):
+        """Test: Foro, lecciones y search_posts registran la búsqueda en el buffer"""
+        from core.search_log import pending_events
+        from core.utils import search_posts
+        self.client.get(reverse('core:forum_index'), {'q': 'CHAMBA', 'category': 'vocabulary', 'cursor': 'x'})
+        self.client.get(reverse('core:lesson_list'), {'q': 'Chambá', 'country': 'AR'})
+        list(search_posts('pololo'))
+        events = [(e.source, e.query, e.filters, e.hits) for e in pending_events()]
+        self.assertEqual(events, [
+            ('forumpost', 'chamba', 'category=vocabulary', 1),
+            ('lesson', 'chamba', 'country=AR', 0),
+            ('search_posts', 'pololo', '', 0),
+        ])
+        self.assertTrue(all(e.elapsed_ms >= 0 for e in pending_events()))
+    
+    def test_flush_writes_compact_rows(self):
+        """Test: El volcado escribe todas las búsquedas con un bulk_create y vacía el buffer"""
+        from core.models import SearchLog
+        from core.search_log import flush_search_log, pending_events, record_search
+        for query in ['chamba', 'pega', '¿?']:
+            record_search('lesson', query, '', 1, 12.5)
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_search_log(), 2)
+        self.assertEqual(pending_events(), [])
+        self.assertEqual(sorted(SearchLog.objects.values_list('query', flat=True)), ['chamba', 'pega'])
+    
+    def test_flush_after_request(self):
+        """Test: La búsqueda no escribe; el buffer se vuelca al terminar la petición si toca"""
+        from collections import deque
+        from unittest import mock
+        from core import search_log
+        from core.models import SearchLog
+        with self.assertNumQueries(0):
+            search_log.record_search('lesson', 'chamba', '', 1, 5.0)
+        
+        with self.settings(SEARCH_LOG_FLUSH_INTERVAL=0), mock.patch.object(search_log, '_buffer', deque(maxlen=4)):
+            self.client.get(reverse('core:lesson_list'), {'q': 'chamba'})
+            self.assertEqual(SearchLog.objects.count(), 0)
+            self.client.get(reverse('core:lesson_list'), {'q': 'pega'})
+            self.assertEqual(list(SearchLog.objects.values_list('query', flat=True)), ['chamba', 'pega'])
+            self.assertEqual(search_log.pending_events(), [])
+        
+        with self.settings(SEARCH_LOG_FLUSH_INTERVAL=60), mock.patch.object(search_log, '_last_flush', 0):
+            self.client.get(reverse('core:lesson_list'), {'q': 'laburo'})
+        self.assertEqual(SearchLog.objects.count(), 4)
+    
+    def test_report_command(self):
+        """Test: search_report muestra percentiles, búsquedas frecuentes y sin resultados"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from core.models import SearchLog
+        from core.search_log import latency_percentiles, search_log_queryset
+        now = timezone.now()
+        SearchLog.objects.bulk_create(
+            [SearchLog(source='lesson', query='chamba', hits=3, elapsed_ms=ms, created_at=now) for ms in range(1, 98)]
+            + [SearchLog(source='lesson', query='chebere', hits=0, elapsed_ms=ms, created_at=now) for ms in (200, 300, 400)]
+            + [SearchLog(source='lesson', query='viejo', hits=0, elapsed_ms=1, created_at=now - timezone.timedelta(days=30))]
+        )
+        self.assertEqual(latency_percentiles(search_log_queryset()), {50: 50, 95: 95, 99: 300})
+        
+        out = StringIO()
+        call_command('search_report', '--prune', stdout=out)
+        output = out.getvalue()
+        self.assertIn('p99: 300.0 ms', output)
+        self.assertIn('chamba: 97 veces', output)
+        self.assertIn('chebere: 3 veces', output)
+        self.assertNotIn('viejo', output)
+        self.assertFalse(SearchLog.objects.filter(query='viejo').exists())
+
+
+class LessonGridCacheTest(TestCase):
+    """Tests para el fragmento en caché del listado de lecciones"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='alumna', password='testpass123')
+        self.staff = User.objects.create_user(username='profe', password='testpass123', is_staff=True)
+        self.lesson = Lesson.objects.create(
+            title='La chamba', content='Trabajo en México', user=self.staff, country='MX'
+        )
+        self.url = reverse('core:lesson_list')
+    
+    def test_page_chrome_is_per_user(self):
+        """Test: El fragmento se comparte pero la cabecera es de cada usuario"""
+        self.client.login(username='alumna', password='testpass123')
+        response = self.client.get(self.url, {'q': 'chamba'})
+        self.assertIn('lessons', response.context)
+        self.assertContains(response, 'Hola, alumna')
+        
+        User.objects.create_user(username='visitante', password='testpass123')
+        self.client.login(username='visitante', password='testpass123')
+        response = self.client.get(self.url, {'q': 'Chambá'})
+        # Servido desde la caché: no se consultan las lecciones
+        self.assertNotIn('lessons', response.context)
+        self.assertContains(response, '<mark>chamba</mark>')
+        self.assertContains(response, 'Hola, visitante')
+        self.assertNotContains(response, 'Hola, alumna')
+    
+    def test_staff_actions_not_shared(self):
+        """Test: Las acciones de edición del staff no llegan a otros usuarios"""
+        edit_url = reverse('core:edit_lesson', args=[self.lesson.pk])
+        self.client.login(username='profe', password='testpass123')
+        self.assertContains(self.client.get(self.url), edit_url)
+        self.client.login(username='alumna', password='testpass123')
+        self.assertNotContains(self.client.get(self.url), edit_url)
+    
+    def test_filters_and_content_changes(self):
+        """Test: Cada combinación de filtros tiene su fragmento y los cambios lo invalidan"""
+        self.client.login(username='alumna', password='testpass123')
+        self.assertContains(self.client.get(self.url, {'country': 'MX'}), 'La chamba')
+        self.assertNotContains(self.client.get(self.url, {'country': 'CL'}), 'La chamba')
+        Lesson.objects.create(title='La pega', content='Trabajo en Chile', user=self.staff, country='CL')
+        self.assertContains(self.client.get(self.url, {'country': 'CL'}), 'La pega')
+        self.lesson.title = 'La chambita'
+        self.lesson.save()
+        self.assertContains(self.client.get(self.url, {'country': 'MX'}), 'La chambita')
+
+
+class LessonPageCacheTest(TestCase):
+    """Tests para la invalidación por señales de las páginas de lección"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='profe', password='testpass123')
+        self.lesson = Lesson.objects.create(
+            title='Jerga chilena', content='Contenido', user=self.user, country='CL'
+        )
+        self.other_lesson = Lesson.objects.create(
+            title='Jerga mexicana', content='Contenido', user=self.user, country='MX'
+        )
+        self.expression = Expression.objects.create(lesson=self.lesson, text='Cachai', meaning='¿Entiendes?')
+        self.url = reverse('core:lesson_detail', args=[self.lesson.pk])
+    
+    def test_served_from_cache(self):
+        """Test: La segunda visita solo consulta los validadores del GET condicional"""
+        self.assertContains(self.client.get(self.url), 'Cachai')
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get(self.url), 'Cachai')
+    
+    def test_lesson_edit_invalidates(self):
+        """Test: Editar la lección regenera su página y no la de otras"""
+        self.client.get(self.url)
+        other_url = reverse('core:lesson_detail', args=[self.other_lesson.pk])
+        self.client.get(other_url)
+        self.lesson.title = 'Jerga chilena actualizada'
+        self.lesson.save()
+        self.assertContains(self.client.get(self.url), 'Jerga chilena actualizada')
+        with self.assertNumQueries(1):
+            self.client.get(other_url)
+    
+    def test_expression_changes_invalidate(self):
+        """Test: Crear, mover o borrar expresiones regenera las páginas afectadas"""
+        other_url = reverse('core:lesson_detail', args=[self.other_lesson.pk])
+        self.client.get(self.url)
+        self.client.get(other_url)
+        Expression.objects.create(lesson=self.lesson, text='Pololo', meaning='Novio')
+        self.assertContains(self.client.get(self.url), 'Pololo')
+        
+        self.expression.lesson = self.other_lesson
+        self.expression.save()
+        self.assertNotContains(self.client.get(self.url), 'Cachai')
+        self.assertContains(self.client.get(other_url), 'Cachai')
+        
+        self.expression.delete()
+        self.assertNotContains(self.client.get(other_url), 'Cachai')
+    
+    def test_versions_in_own_cache(self):
+        """Test: Las versiones viven en su propia caché y sobreviven a vaciar la caché por defecto"""
+        from django.core.cache import cache
+        from core.content_version import get_cache, get_version
+        version = get_version(Lesson, self.lesson.pk)
+        self.assertIn(f'content_version:core.lesson:{self.lesson.pk}', get_cache())
+        cache.clear()
+        self.assertEqual(get_version(Lesson, self.lesson.pk), version)
+        self.lesson.save()
+        self.assertEqual(get_cache().get(f'content_version:core.lesson:{self.lesson.pk}'), version + 1)
+    
+    def test_header_not_shared_between_users(self):
+        """Test: El fragmento en caché no lleva la cabecera de otro usuario ni sus acciones de staff"""
+        User.objects.create_user(username='alice_user', password='testpass123', is_staff=True)
+        User.objects.create_user(username='bob_user', password='testpass123')
+        alice, bob = Client(), Client()
+        alice.login(username='alice_user', password='testpass123')
+        bob.login(username='bob_user', password='testpass123')
+        edit_url = reverse('core:edit_lesson', args=[self.lesson.pk])
+        
+        response = alice.get(self.url)
+        self.assertContains(response, 'alice_user')
+        self.assertContains(response, edit_url)
+        response = bob.get(self.url)
+        self.assertContains(response, 'bob_user')
+        self.assertContains(response, 'Cachai')
+        self.assertNotContains(response, 'alice_user')
+        self.assertNotContains(response, edit_url)
+    
+    def test_cache_control_private(self):
+        """Test: La página de lección no se guarda en cachés compartidas y el navegador revalida"""
+        from django.utils.cache import get_max_age
+        response = self.client.get(self.url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+        self.assertEqual(get_max_age(response), 0)
+
+
+class LessonFacetsTest(TestCase):
+    """Tests para los conteos de los filtros de lecciones"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        Lesson.objects.create(user=self.user, title='Chamba', content='Trabajo', country='MX', level='beginner')
+        Lesson.objects.create(user=self.user, title='Güey', content='Amigo', country='MX', level='advanced')
+        Lesson.objects.create(user=self.user, title='Pega', content='Trabajo', country='CL', level='beginner')
+        Lesson.objects.create(user=self.user, title='Oculta', content='Trabajo', country='AR', is_active=False)
+        self.client.login(username='testuser', password='testpass123')
+    
+    def counts(self, options):
+        """Conteos distintos de cero de una lista de (valor, nombre, conteo)"""
+        return {value: count for value, _, count in options if count}
+    
+    def test_counts_use_other_filters(self):
+        """Test: Cada dimensión se cuenta con los demás filtros, no con el suyo"""
+        response = self.client.get(reverse('core:lesson_list'), {'country': 'MX', 'difficulty': 'beginner'})
+        self.assertEqual(self.counts(response.context['countries']), {'MX': 1, 'CL': 1})
+        self.assertEqual(self.counts(response.context['difficulties']), {'beginner': 1, 'advanced': 1})
+        self.assertEqual(self.counts(response.context['categories']), {'slang': 1})
+        self.assertContains(response, 'Chile (1)')
+        self.assertContains(response, 'disabled')
+    
+    def test_counts_follow_search(self):
+        """Test: Con búsqueda solo se cuentan las lecciones que coinciden"""
+        response = self.client.get(reverse('core:lesson_list'), {'q': 'trabajo'})
+        self.assertEqual(self.counts(response.context['countries']), {'MX': 1, 'CL': 1})
+    
+    def test_counts_cached_until_lessons_change(self):
+        """Test: Los conteos salen de la caché hasta que cambia una lección"""
+        from core.facets import get_lesson_facets
+        params = {'country': 'MX'}
+        self.assertEqual(self.counts(get_lesson_facets(params)['difficulty']), {'beginner': 1, 'advanced': 1})
+        with self.assertNumQueries(0):
+            get_lesson_facets(params)
+        Lesson.objects.create(user=self.user, title='Chido', content='Bueno', country='MX', level='intermediate')
+        self.assertEqual(
+            self.counts(get_lesson_facets(params)['difficulty']),
+            {'beginner': 1, 'intermediate': 1, 'advanced': 1},
+        )
+
+
+class ConditionalGetTest(TestCase):
+    """Tests para las respuestas 304 de las páginas de detalle"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        from django.core.cache import cache
+        from core.models import BlogPost
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.lesson = Lesson.objects.create(user=self.user, title='Jerga chilena', content='Contenido', country='CL')
+        self.expression = Expression.objects.create(lesson=self.lesson, text='Cachai', meaning='¿Entiendes?')
+        self.blog_post = BlogPost.objects.create(
+            title='Artículo', slug='articulo', content='Contenido', author=self.user, is_published=True
+        )
+        self.forum_post = ForumPost.objects.create(title='Test Post', content='Contenido', author=self.user)
+        self.client.login(username='testuser', password='testpass123')
+    
+    def assertNotModified(self, url, **headers):
+        """Comprueba que la petición condicional recibe 304 sin renderizar plantillas"""
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+    
+    def test_detail_pages_not_modified(self):
+        """Test: Lección, artículo y post responden 304 con If-None-Match o If-Modified-Since"""
+        urls = [
+            reverse('core:lesson_detail', args=[self.lesson.pk]),
+            reverse('core:blog_detail', args=[self.blog_post.slug]),
+            reverse('core:post_detail', args=[self.forum_post.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('W/"'))
+                self.assertEqual(set(response['Cache-Control'].split(', ')), {'private', 'max-age=0'})
+                self.assertNotModified(url, if_none_match=response['ETag'])
+                self.assertNotModified(url, if_modified_since=response['Last-Modified'])
+    
+    def test_validators_use_one_query(self):
+        """Test: La respuesta 304 se decide con una sola consulta"""
+        url = reverse('core:post_detail', args=[self.forum_post.pk])
+        etag = self.client.get(url)['ETag']
+        # Usuario autenticado y la consulta de los validadores
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0), self.assertNumQueries(2):
+            self.assertNotModified(url, if_none_match=etag)
+    
+    def test_not_modified_counts_view(self):
+        """Test: Una visita respondida con 304 también suma al contador de visitas"""
+        from core.view_counts import get_cache, pending_views
+        get_cache().clear()
+        urls = [
+            (self.forum_post, reverse('core:post_detail', args=[self.forum_post.pk])),
+            (self.blog_post, reverse('core:blog_detail', args=[self.blog_post.slug])),
+        ]
+        with self.settings(VIEW_COUNT_FLUSH_INTERVAL=0):
+            for obj, url in urls:
+                with self.subTest(url=url):
+                    etag = self.client.get(url)['ETag']
+                    self.assertEqual(pending_views(obj), 1)
+                    self.assertNotModified(url, if_none_match=etag)
+                    self.assertEqual(pending_views(obj), 2)
+    
+    def test_lesson_changes_invalidate_etag(self):
+        """Test: Cambiar o borrar una expresión devuelve la página completa"""
+        url = reverse('core:lesson_detail', args=[self.lesson.pk])
+        etag = self.client.get(url)['ETag']
+        self.expression.delete()
+        response = self.client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Cachai')
+    
+    def test_forum_changes_invalidate_etag(self):
+        """Test: Un comentario nuevo o otro usuario reciben la página completa"""
+        url = reverse('core:post_detail', args=[self.forum_post.pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.forum_post, author=self.other_user, content='Buen post')
+        response = self.client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Buen post')
+        
+        etag = response['ETag']
+        self.client.login(username='otheruser', password='testpass123')
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag}).status_code, 200)
+    
+    def test_lesson_users_alternate(self):
+        """Test: Dos usuarios que alternan en la misma lección reciben su propia página y su propio ETag"""
+        url = reverse('core:lesson_detail', args=[self.lesson.pk])
+        other_client = Client()
+        other_client.login(username='otheruser', password='testpass123')
+        
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertContains(response, 'testuser')
+        # El contenido sale del fragmento en caché; la cabecera y el ETag son del otro usuario
+        other_response = other_client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(other_response.status_code, 200)
+        self.assertContains(other_response, 'otheruser')
+        self.assertNotContains(other_response, 'testuser')
+        other_etag = other_response['ETag']
+        self.assertNotEqual(other_etag, etag)
+        
+        self.assertNotModified(url, if_none_match=etag)
+        self.assertEqual(other_client.get(url, headers={'if_none_match': other_etag}).status_code, 304)
+        response = self.client.get(url, headers={'if_none_match': other_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'testuser')
+        self.assertEqual(response['ETag'], etag)
+
+
+class MediaServingTest(TestCase):
+    """Tests para el servicio de archivos de medios con Range"""
+    
+    def setUp(self):
+        """Configuración inicial para los tests"""
+        import os
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        os.makedirs(os.path.join(self.tmpdir.name, 'expression_audio'))
+        self.data = bytes(range(256)) * 8
+        with open(os.path.join(self.tmpdir.name, 'expression_audio', 'chevere.wav'), 'wb') as file:
+            file.write(self.data)
+        with open(os.path.join(self.tmpdir.name, 'notas.txt'), 'w') as file:
+            file.write('chévere ' * 200)
+        settings_override = self.settings(MEDIA_ROOT=self.tmpdir.name, MEDIA_SENDFILE=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        self.url = '/media/expression_audio/chevere.wav'
+    
+    def get(self, url=None, **headers):
+        """GET con cabeceras; devuelve la respuesta y su cuerpo completo"""
+        response = self.client.get(url or self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+    
+    def test_full_file(self):
+        """Test: Sin Range se envía el archivo completo con ETag y Accept-Ranges"""
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['Content-Type'].startswith('audio/'))
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertEqual(self.get(if_none_match=response['ETag'])[0].status_code, 304)
+    
+    def test_single_ranges(self):
+        """Test: Un rango, un rango abierto y un sufijo responden 206 con su trozo"""
+        size = len(self.data)
+        cases = {
+            'bytes=0-9': (0, 9),
+            'bytes=2000-': (2000, size - 1),
+            'bytes=-16': (size - 16, size - 1),
+            'bytes=100-999999': (100, size - 1),
+        }
+        for header, (start, end) in cases.items():
+            with self.subTest(range=header):
+                response, body = self.get(range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, self.data[start:end + 1])
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(int(response['Content-Length']), end - start + 1)
+    
+    def test_multiple_ranges(self):
+        """Test: Varios rangos se envían como multipart/byteranges"""
+        response, body = self.get(range='bytes=0-3,10-13')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(int(response['Content-Length']), len(body))
+        self.assertIn(b'Content-Range: bytes 0-3/2048\r\n\r\n' + self.data[0:4], body)
+        self.assertIn(b'Content-Range: bytes 10-13/2048\r\n\r\n' + self.data[10:14], body)
+    
+    def test_invalid_and_stale_ranges(self):
+        """Test: Rangos fuera del archivo dan 416; If-Range desactualizado envía el archivo completo"""
+        response, _ = self.get(range='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */2048')
+        # Cabecera mal formada: se ignora
+        self.assertEqual(self.get(range='bytes=9-1')[0].status_code, 200)
+        response, body = self.get(range='bytes=0-9', if_range='"otra-version"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+    
+    def test_outside_media_root(self):
+        """Test: No se sirven archivos fuera de MEDIA_ROOT ni directorios"""
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/expression_audio/').status_code, 404)
+        self.assertEqual(self.client.get('/media/no-existe.wav').status_code, 404)
+    
+    def test_sendfile_offload(self):
+        """Test: Con X-Accel-Redirect o X-Sendfile la vista delega el envío en nginx o Apache"""
+        import os
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url, headers={'range': 'bytes=0-9'})
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/expression_audio/chevere.wav')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response.content, b'')
+        
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url, headers={'range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.tmpdir.name, 'expression_audio', 'chevere.wav'))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'audio/x-wav')
+        self.assertEqual(response.content, b'')
+    
+    def test_media_route_requires_setting(self):
+        """Test: La ruta de MEDIA_URL solo existe con MEDIA_SERVE"""
+        import importlib
+        from django.urls import clear_url_caches
+        from slangspot import urls
+        
+        def media_routes():
+            return [pattern for pattern in urls.urlpatterns if getattr(pattern, 'name', None) == 'media']
+        
+        try:
+            with self.settings(MEDIA_SERVE=False):
+                importlib.reload(urls)
+                self.assertEqual(media_routes(), [])
+            with self.settings(MEDIA_SERVE=True):
+                importlib.reload(urls)
+                self.assertEqual(len(media_routes()), 1)
+        finally:
+            importlib.reload(urls)
+            clear_url_caches()
+    
+    def test_text_media_not_compressed(self):
+        """Test: La compresión no intenta leer .content de una respuesta en flujo"""
+        response, body = self.get('/media/notas.txt', accept_encoding='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(body.decode(), 'chévere ' * 200)
@@ -0,0 +1,36 @@
+"""
+Normalización de texto para búsquedas de expresiones y jerga.
+
+normalize_text("¿Qué onda?") == "que onda": NFKD, sin diacríticos ni
+puntuación, en minúsculas y con los espacios colapsados. Los modelos guardan
+el resultado en columnas "sombra" indexadas (BaseModel.normalized_fields), de
+modo que las búsquedas exactas o por prefijo son búsquedas en el índice.
+"""
+import re
+import unicodedata
+from django.db.models import Q
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+# Mayor que cualquier carácter que pueda seguir al prefijo en el índice
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def normalize_text(value):
+    """Texto en minúsculas, sin tildes, diéresis ni puntuación"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD_PATTERN.sub(' ', stripped.casefold()).strip()
+
+
+def normalized_prefix_q(field_name, query):
+    """
+    Q de prefijo sobre una columna normalizada. Se expresa como rango
+    (>= prefijo y < prefijo + U+10FFFF) porque el LIKE 'x%' que genera
+    startswith no usa el índice en SQLite (LIKE ignora mayúsculas).
+    """
+    prefix = normalize_text(query)
+    if not prefix:
+        return Q(pk__in=[])
+    return Q(**{f'{field_name}__gte': prefix, f'{field_name}__lt': prefix + PREFIX_UPPER_BOUND})
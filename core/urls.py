@@ -9,13 +9,17 @@ from .views import (
     ForumPostListView, ForumPostDetailView,
     ForumPostCreateView, ForumPostUpdateView,
     ForumPostDeleteView, post_detail_view,
-    like_post,
+    like_post, like_comment,
     
     # Lesson views
     LessonListView, LessonDetailView,
     LessonCreateView, LessonUpdateView,
     LessonDeleteView, ExpressionCreateView,
     ExpressionUpdateView, ExpressionDeleteView,
+    expression_autocomplete, expression_selected, fuzzy_lookup,
+    
+    # Search views
+    search_view,
     
     # Chat views
     chat, get_chat_history, send_message, get_ai_response,
@@ -52,6 +56,10 @@ urlpatterns = [
     path('forum/post/<int:post_id>/edit/', ForumPostUpdateView.as_view(), name='edit_post'),
     path('forum/post/<int:post_id>/delete/', ForumPostDeleteView.as_view(), name='delete_post'),
     path('forum/post/<int:post_id>/like/', like_post, name='like_post'),
+    path('forum/comment/<int:comment_id>/like/', like_comment, name='like_comment'),
+    
+    # Search URLs
+    path('search/', search_view, name='search'),
     
     # Lesson URLs
     path('lessons/', LessonListView.as_view(), name='lesson_list'),
@@ -62,6 +70,9 @@ urlpatterns = [
     path('lessons/<int:lesson_id>/expressions/create/', ExpressionCreateView.as_view(), name='create_expression'),
     path('expressions/<int:pk>/edit/', ExpressionUpdateView.as_view(), name='edit_expression'),
     path('expressions/<int:pk>/delete/', ExpressionDeleteView.as_view(), name='delete_expression'),
+    path('expressions/autocomplete/', expression_autocomplete, name='expression_autocomplete'),
+    path('expressions/<int:expression_id>/selected/', expression_selected, name='expression_selected'),
+    path('expressions/fuzzy/', fuzzy_lookup, name='fuzzy_lookup'),
     
     # Chat URLs
     path('chat/', chat, name='chat'),
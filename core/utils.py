@@ -1,10 +1,20 @@
 import os
+import re
 from django.conf import settings
 import tempfile
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.contrib.auth.models import User
 from .models import ForumPost, Comment, UserProfile
+from .search import search_queryset
+from .search_cache import SearchResultList, count_hits, get_search_hits
+from .search_log import track_search
+
+# Menciones: @usuario con los caracteres válidos de un username de Django.
+# No debe ir precedida de otro carácter de username (evita emails como a@b.com)
+# y termina en un carácter de palabra para no arrastrar la puntuación final ("@ana.").
+MENTION_PATTERN = re.compile(r'(?<![\w.@+-])@([\w.@+-]{0,149}\w)')
+MAX_MENTIONS_PER_COMMENT = 10
 
 # Importaciones condicionales para ElevenLabs - Comentado ya que no se usa
 # try:
@@ -136,21 +146,45 @@ def notify_reply(comment, reply, user):
             related_user=user
         )
 
-def notify_mention(user, mentioned_user, post=None, comment=None):
+def extract_mentions(text, limit=MAX_MENTIONS_PER_COMMENT):
     """
-    Notifica a un usuario cuando es mencionado
+    Devuelve los usernames mencionados en text, sin duplicados y en orden de
+    aparición, hasta un máximo de limit.
     """
-    if user != mentioned_user:  # No notificar si el usuario se menciona a sí mismo
-        context = "en un comentario" if comment else "en una publicación"
-        message = f"{user.username} te mencionó {context}"
-        create_notification(
-            user=mentioned_user,
-            notification_type='mention',
-            message=message,
-            related_post=post,
-            related_comment=comment,
-            related_user=user
-        )
+    usernames = []
+    for match in MENTION_PATTERN.finditer(text):
+        username = match.group(1)
+        if username not in usernames:
+            usernames.append(username)
+            if len(usernames) >= limit:
+                break
+    return usernames
+
+def resolve_mentions(text, limit=MAX_MENTIONS_PER_COMMENT):
+    """Resuelve las menciones de text a usuarios con una sola consulta"""
+    usernames = extract_mentions(text, limit)
+    if not usernames:
+        return []
+    return list(User.objects.filter(username__in=usernames, is_active=True))
+
+def notify_mention(user, mentioned_users, post=None, comment=None):
+    """
+    Notifica a los usuarios mencionados (uno o varios)
+    """
+    if isinstance(mentioned_users, User):
+        mentioned_users = [mentioned_users]
+    context = "en un comentario" if comment else "en una publicación"
+    message = f"{user.username} te mencionó {context}"
+    for mentioned_user in mentioned_users:
+        if mentioned_user != user:  # No notificar si el usuario se menciona a sí mismo
+            create_notification(
+                user=mentioned_user,
+                notification_type='mention',
+                message=message,
+                related_post=post,
+                related_comment=comment,
+                related_user=user
+            )
 
 def notify_moderation(user, action, post=None, comment=None):
     """
@@ -195,19 +229,28 @@ def get_user_stats(user):
     }
 
 def search_posts(query):
-    """Busca posts por título o contenido"""
-    return ForumPost.objects.filter(
-        Q(title__icontains=query) | Q(content__icontains=query)
-    ).order_by('-created_at')
+    """
+    Busca posts por título o contenido, ordenados por relevancia (bm25).
+    Las coincidencias salen de la caché de búsquedas cuando es posible.
+    """
+    queryset = ForumPost.objects.all()
+    with track_search('search_posts', query) as search:
+        hits = get_search_hits(queryset, query, fields=['title', 'content'])
+        search.hits = count_hits(hits)
+    if hits is None:
+        return search_queryset(queryset, query, fields=['title', 'content'])
+    return SearchResultList(queryset, hits)
 
-def get_popular_posts(days=30):
-    """Obtiene los posts más populares"""
+def get_popular_posts(days=30, limit=10):
+    """
+    Obtiene los posts más populares según la puntuación hot almacenada
+    (recorrido del índice forumpost_active_hot_idx, sin joins ni agregados)
+    """
     start_date = timezone.now() - timezone.timedelta(days=days)
     return ForumPost.objects.filter(
+        is_active=True,
         created_at__gte=start_date
-    ).annotate(
-        popularity=Count('likes') + Count('comments')
-    ).order_by('-popularity')[:10]
+    ).order_by('-hot_score')[:limit]
 
 def get_user_reputation(user):
     """Calcula la reputación del usuario"""
@@ -0,0 +1,171 @@
+"""
+Contador de visitas con escritura diferida (write-behind).
+
+Cada visita solo incrementa un contador en caché; las visitas acumuladas se
+vuelcan a la base de datos en lote con UPDATE ... SET views = views + n, ya sea
+desde una petición (como máximo una vez cada VIEW_COUNT_FLUSH_INTERVAL segundos)
+o con el comando flush_view_counts.
+
+Los contadores viven en su propia caché (alias VIEW_COUNT_CACHE, sin desalojo):
+en la caché por defecto competían con búsquedas, fragmentos y páginas, y un
+desalojo perdía visitas sin volcar.
+
+Solo se usan operaciones atómicas de la caché (add, incr, decr), así que varios
+procesos pueden registrar visitas a la vez sin perder ninguna:
+  - La primera visita pendiente de un objeto crea su marca (add) y anota su id
+    en la siguiente posición de un registro por modelo (incr del contador de
+    posiciones). Las demás visitas solo incrementan su contador.
+  - El volcado lee las posiciones nuevas del registro, borra la marca de cada
+    objeto antes de leer su contador y resta (decr) lo que vuelca: una visita que
+    llegue mientras tanto se conserva y vuelve a anotar el objeto.
+  - La marca expira tras VIEW_COUNT_PENDING_TTL segundos; si una anotación se
+    perdiera (proceso interrumpido), la siguiente visita la repite.
+
+Con una caché compartida (Memcached, Redis) el comando puede ejecutarse desde
+cron; con LocMemCache cada proceso vuelca sus propias visitas.
+"""
+import logging
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY = 'view_counts:{label}:{pk}'
+PENDING_KEY = 'view_counts:pending:{label}:{pk}'
+SLOT_KEY = 'view_counts:slot:{label}:{slot}'
+LAST_SLOT_KEY = 'view_counts:last_slot:{label}'
+CURSOR_KEY = 'view_counts:cursor:{label}'
+FLUSH_LOCK_KEY = 'view_counts:flush_lock'
+FLUSHING_KEY = 'view_counts:flushing'
+
+
+def get_cache():
+    """Caché de los contadores (VIEW_COUNT_CACHE)"""
+    return caches[getattr(settings, 'VIEW_COUNT_CACHE', 'view_counts')]
+
+
+def _tracked_models():
+    from .models import BlogPost, Expression, ForumPost
+    return [ForumPost, BlogPost, Expression]
+
+
+def _key(template, model, **kwargs):
+    return template.format(label=model._meta.label_lower, **kwargs)
+
+
+def _incr(key, delta):
+    """Incrementa un contador en caché, creándolo si no existe"""
+    cache = get_cache()
+    if cache.add(key, delta, timeout=None):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # La clave expiró o se borró entre add() e incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def _mark_pending(model, pk):
+    """Anota pk en el registro de pendientes de model si aún no tiene marca"""
+    cache = get_cache()
+    ttl = getattr(settings, 'VIEW_COUNT_PENDING_TTL', 60 * 60)
+    if cache.add(_key(PENDING_KEY, model, pk=pk), 1, timeout=ttl):
+        slot = _incr(_key(LAST_SLOT_KEY, model), 1)
+        cache.set(_key(SLOT_KEY, model, slot=slot), pk, timeout=None)
+
+
+def record_view(obj):
+    """
+    Registra una visita de obj y devuelve las visitas pendientes de volcar
+    (incluida esta), para poder mostrar obj.views + pendientes sin escribir.
+    """
+    pending = _incr(_key(COUNT_KEY, type(obj), pk=obj.pk), 1)
+    _mark_pending(type(obj), obj.pk)
+    maybe_flush()
+    return pending
+
+
+def pending_views(obj):
+    """Visitas de obj que todavía no se han volcado a la base de datos"""
+    return get_cache().get(_key(COUNT_KEY, type(obj), pk=obj.pk)) or 0
+
+
+def maybe_flush():
+    """Vuelca las visitas si pasó el intervalo configurado desde el último volcado"""
+    interval = getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 60)
+    if not interval:
+        return
+    # add() solo tiene éxito si la clave expiró: sirve de temporizador
+    if get_cache().add(FLUSH_LOCK_KEY, 1, timeout=interval):
+        try:
+            flush_view_counts()
+        except Exception:
+            logger.exception('Error al volcar los contadores de visitas')
+
+
+def _take_pending_ids(model):
+    """Ids anotados desde el último volcado; avanza el cursor del registro"""
+    cache = get_cache()
+    last_slot = cache.get(_key(LAST_SLOT_KEY, model)) or 0
+    cursor = cache.get(_key(CURSOR_KEY, model)) or 0
+    if last_slot <= cursor:
+        return set()
+    slot_keys = [_key(SLOT_KEY, model, slot=slot) for slot in range(cursor + 1, last_slot + 1)]
+    pending_ids = set(cache.get_many(slot_keys).values())
+    cache.set(_key(CURSOR_KEY, model), last_slot, timeout=None)
+    cache.delete_many(slot_keys)
+    # Sin marca, la próxima visita de cada objeto lo vuelve a anotar
+    cache.delete_many([_key(PENDING_KEY, model, pk=pk) for pk in pending_ids])
+    return pending_ids
+
+
+def flush_view_counts():
+    """
+    Vuelca las visitas pendientes con un único UPDATE por modelo.
+    Devuelve el número total de visitas escritas (0 si otro volcado está en curso).
+    """
+    cache = get_cache()
+    # Un solo volcado a la vez: dos volcados restarían dos veces las mismas visitas
+    if not cache.add(FLUSHING_KEY, 1, timeout=300):
+        return 0
+    try:
+        return sum(_flush_model(model) for model in _tracked_models())
+    finally:
+        cache.delete(FLUSHING_KEY)
+
+
+def _flush_model(model):
+    cache = get_cache()
+    pending_ids = _take_pending_ids(model)
+    if not pending_ids:
+        return 0
+
+    keys = {_key(COUNT_KEY, model, pk=pk): pk for pk in pending_ids}
+    counts = {}
+    for key, value in cache.get_many(keys).items():
+        if value:
+            # decr() es atómico: las visitas que lleguen mientras tanto se conservan
+            cache.decr(key, value)
+            counts[keys[key]] = value
+    if not counts:
+        return 0
+
+    try:
+        with transaction.atomic():
+            model.objects.filter(pk__in=counts).update(
+                views=F('views') + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in counts.items()],
+                    default=Value(0),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+    except Exception:
+        # Devolver las visitas a la caché para el próximo volcado
+        for pk, n in counts.items():
+            _incr(_key(COUNT_KEY, model, pk=pk), n)
+            _mark_pending(model, pk)
+        raise
+    return sum(counts.values())
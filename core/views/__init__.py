@@ -8,16 +8,19 @@ from .forum_views import (
     ForumPostListView, ForumPostDetailView,
     ForumPostCreateView, ForumPostUpdateView,
     ForumPostDeleteView, post_detail_view,
-    like_post
+    like_post, like_comment
 )
 
 from .lesson_views import (
     LessonListView, LessonDetailView,
     LessonCreateView, LessonUpdateView,
     LessonDeleteView, ExpressionCreateView,
-    ExpressionUpdateView, ExpressionDeleteView
+    ExpressionUpdateView, ExpressionDeleteView,
+    expression_autocomplete, expression_selected, fuzzy_lookup
 )
 
+from .search_views import search_view
+from .media_views import serve_media
 from .chat_views import chat, get_chat_history, send_message, get_ai_response
 from .profile_views import ProfileView, ProfileUpdateView
 from .practice_views import (
@@ -5,14 +5,23 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.db.models import Q
+from django.utils.decorators import method_decorator
 from ..models import BlogPost
+from ..view_counts import record_view
+from ..likes import toggle_like, user_has_liked
+from ..facets import get_category_facets
+from ..content_version import get_version
+from ..decorators import conditional_page
+from .mixins import CursorPaginationMixin, LikedByUserMixin
 
-class BlogListView(ListView):
+class BlogListView(CursorPaginationMixin, LikedByUserMixin, ListView):
     model = BlogPost
     template_name = 'core/blog/blog_list.html'
     context_object_name = 'posts'
     paginate_by = 6
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         queryset = BlogPost.objects.filter(is_published=True, is_active=True)
@@ -24,8 +33,26 @@ class BlogListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = BlogPost.CATEGORY_CHOICES
+        # Conteos por categoría desde caché, sin GROUP BY por petición
+        context['category_facets'] = facets = get_category_facets(BlogPost)
+        context['category_total'] = sum(count for _, _, count in facets)
         return context
 
+def blog_page_validators(request, slug):
+    """ETag y Last-Modified del artículo, en una consulta; la versión del blog cubre los relacionados"""
+    try:
+        row = BlogPost.objects.filter(slug=slug, is_published=True, is_active=True).values_list(
+            'pk', 'updated_at', 'likes_count'
+        ).get()
+    except BlogPost.DoesNotExist:
+        return None
+    return [*row, get_version(BlogPost)], row[1]
+
+def record_blog_view(request, parts, slug):
+    """Visita de un artículo respondida con 304: se cuenta igual que las demás"""
+    record_view(BlogPost(pk=parts[0]))
+
+@method_decorator(conditional_page(blog_page_validators, on_not_modified=record_blog_view), name='dispatch')
 class BlogDetailView(DetailView):
     model = BlogPost
     template_name = 'core/blog/blog_detail.html'
@@ -36,9 +63,8 @@ class BlogDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Incrementar vistas
-        self.object.views += 1
-        self.object.save()
+        # Registrar la visita en caché; se vuelca en lote sin reescribir la fila
+        self.object.views += record_view(self.object)
         
         # Posts relacionados
         related_posts = BlogPost.objects.filter(
@@ -48,6 +74,7 @@ class BlogDetailView(DetailView):
         ).exclude(id=self.object.id)[:3]
         
         context['related_posts'] = related_posts
+        context['user_liked_post'] = user_has_liked(self.object, self.request.user)
         return context
 
 class BlogCreateView(LoginRequiredMixin, CreateView):
@@ -86,18 +113,12 @@ class BlogDeleteView(LoginRequiredMixin, DeleteView):
         return super().delete(request, *args, **kwargs)
 
 @login_required
+@require_POST
 def blog_like(request, slug):
     """Vista para dar like a un post del blog"""
     post = get_object_or_404(BlogPost, slug=slug, is_published=True)
-    
-    if request.user in post.likes.all():
-        post.likes.remove(request.user)
-        liked = False
-    else:
-        post.likes.add(request.user)
-        liked = True
-    
+    liked, likes_count = toggle_like(post, request.user)
     return JsonResponse({
         'liked': liked,
-        'likes_count': post.likes.count()
-    }) 
\ No newline at end of file
+        'likes_count': likes_count
+    })
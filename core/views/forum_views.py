@@ -4,32 +4,43 @@ from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.auth.models import User
 from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.db.models import Count, Max, Sum
 from ..models import ForumPost, Comment
 from ..forms import ForumPostForm, CommentForm
-from .mixins import OwnerRequiredMixin, SuccessMessageMixin, SoftDeleteMixin, SearchMixin
-from ..utils import notify_new_comment, notify_mention, notify_reply, notify_post_like
+from .mixins import OwnerRequiredMixin, SuccessMessageMixin, SoftDeleteMixin, SearchMixin, CursorPaginationMixin, LikedByUserMixin
+from ..utils import notify_new_comment, notify_mention, notify_reply, notify_post_like, notify_comment_like, resolve_mentions
+from ..view_counts import record_view
+from ..comment_tree import load_comment_tree
+from ..likes import toggle_like, user_has_liked
+from ..facets import get_category_facets
+from ..decorators import conditional_page
 
-class ForumPostListView(LoginRequiredMixin, SearchMixin, ListView):
+class ForumPostListView(LoginRequiredMixin, SearchMixin, CursorPaginationMixin, LikedByUserMixin, ListView):
     model = ForumPost
     template_name = 'core/forum_index.html'
     context_object_name = 'posts'
     search_fields = ['title', 'content']
     paginate_by = 15  # Aumentar paginación para mejor rendimiento
+    cursor_ordering = ('-is_pinned', '-created_at', '-id')  # Fijados primero
     login_url = '/core/login/'
     
     def get_queryset(self):
-        # Optimizar consulta con select_related para el autor y prefetch_related para likes
-        queryset = ForumPost.objects.select_related('author').prefetch_related('likes').filter(is_active=True)
+        # Los contadores de comentarios y likes están desnormalizados: una sola consulta por página
+        queryset = ForumPost.objects.select_related('author').filter(is_active=True)
         category = self.request.GET.get('category', '')
         if category:
             queryset = queryset.filter(category=category)
-        return queryset
+        # Búsqueda de SearchMixin (?q=) sobre las publicaciones ya filtradas
+        return self.search(queryset)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['categories'] = ForumPost.CATEGORY_CHOICES
+        # Conteos por categoría desde caché, sin GROUP BY por petición
+        context['category_facets'] = facets = get_category_facets(ForumPost)
+        context['category_total'] = sum(count for _, _, count in facets)
         context['current_category'] = self.request.GET.get('category', '')
         context['search_query'] = self.request.GET.get('q', '')
         return context
@@ -41,15 +52,14 @@ class ForumPostDetailView(LoginRequiredMixin, DetailView):
     login_url = '/core/login/'
     
     def get_queryset(self):
-        # Optimizar consulta con select_related para el autor y prefetch_related para likes
-        return ForumPost.objects.select_related('author').prefetch_related('likes')
+        return ForumPost.objects.select_related('author')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Optimizar consulta de comentarios con select_related para el autor
-        context['comments'] = self.object.comments.select_related('author', 'parent').filter(
-            parent=None, is_active=True
-        ).order_by('-created_at')
+        self.object.views += record_view(self.object)
+        # Árbol completo de comentarios en una sola consulta
+        context['comments'] = load_comment_tree(self.object, self.request.user)
+        context['user_liked_post'] = user_has_liked(self.object, self.request.user)
         context['comment_form'] = CommentForm()
         return context
 
@@ -81,14 +91,30 @@ class ForumPostDeleteView(LoginRequiredMixin, OwnerRequiredMixin, SoftDeleteMixi
     success_url = reverse_lazy('core:forum_index')
     login_url = '/core/login/'
 
+def post_page_validators(request, post_id):
+    """ETag y Last-Modified del post: su updated_at y el de sus comentarios, en una consulta"""
+    try:
+        row = ForumPost.objects.filter(id=post_id).values('pk', 'updated_at', 'likes_count').annotate(
+            comments_updated=Max('comments__updated_at'),
+            # El total detecta comentarios borrados; la suma, los "me gusta" de comentarios
+            comments_total=Count('comments'),
+            comment_likes=Sum('comments__likes_count'),
+        ).values_list(
+            'updated_at', 'likes_count', 'comments_updated', 'comments_total', 'comment_likes'
+        ).order_by().get()
+    except ForumPost.DoesNotExist:
+        return None
+    return row, max(row[0], row[2] or row[0])
+
+def record_post_view(request, parts, post_id):
+    """Visita de un post respondida con 304: se cuenta igual que las demás"""
+    record_view(ForumPost(pk=post_id))
+
 @login_required
+@conditional_page(post_page_validators, on_not_modified=record_post_view)
 def post_detail_view(request, post_id):
     # Optimizar consulta con select_related para el autor
     post = get_object_or_404(ForumPost.objects.select_related('author'), id=post_id)
-    # Optimizar consulta de comentarios
-    comments = post.comments.select_related('author', 'parent').filter(
-        parent=None, is_active=True
-    ).order_by('-created_at')
     comment_form = CommentForm()
     
     if request.method == 'POST':
@@ -103,40 +129,49 @@ def post_detail_view(request, post_id):
             if hasattr(post, 'author') and post.author != request.user:
                 notify_new_comment(post, comment, request.user)
             
-            # Procesar menciones
-            content = comment.content
-            for word in content.split():
-                if word.startswith('@'):
-                    username = word[1:]
-                    try:
-                        mentioned_user = User.objects.get(username=username)
-                        notify_mention(request.user, mentioned_user, post=post, comment=comment)
-                    except User.DoesNotExist:
-                        pass
+            # Procesar menciones: una sola consulta para todos los usuarios mencionados
+            mentioned_users = resolve_mentions(comment.content)
+            if mentioned_users:
+                notify_mention(request.user, mentioned_users, post=post, comment=comment)
             
             messages.success(request, 'Comentario publicado exitosamente.')
             return redirect('core:post_detail', post_id=post.id)
+    else:
+        # Registrar la visita en caché; se vuelca en lote sin reescribir la fila
+        post.views += record_view(post)
     
     return render(request, 'core/post_detail.html', {
         'post': post,
-        'comments': comments,
+        # Árbol completo de comentarios en una sola consulta
+        'comments': load_comment_tree(post, request.user),
+        'user_liked_post': user_has_liked(post, request.user),
         'comment_form': comment_form
     })
 
 @login_required
+@require_POST
 def like_post(request, post_id):
     post = get_object_or_404(ForumPost, id=post_id)
-    if request.user in post.likes.all():
-        post.likes.remove(request.user)
-        liked = False
-    else:
-        post.likes.add(request.user)
-        liked = True
-        # Notificar al autor del post sobre el like
-        if hasattr(post, 'author') and post.author != request.user:
-            notify_post_like(post, request.user)
+    liked, likes_count = toggle_like(post, request.user)
+    # Notificar al autor del post sobre el like
+    if liked and post.author_id != request.user.pk:
+        notify_post_like(post, request.user)
     
     return JsonResponse({
-        'likes_count': post.likes.count(),
+        'likes_count': likes_count,
         'liked': liked
-    }) 
\ No newline at end of file
+    })
+
+@login_required
+@require_POST
+def like_comment(request, comment_id):
+    comment = get_object_or_404(Comment, id=comment_id, is_active=True)
+    liked, likes_count = toggle_like(comment, request.user)
+    # Notificar al autor del comentario sobre el like
+    if liked and comment.author_id != request.user.pk:
+        notify_comment_like(comment, request.user)
+    
+    return JsonResponse({
+        'likes_count': likes_count,
+        'liked': liked
+    })
@@ -4,73 +4,212 @@ from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
-from django.views.decorators.cache import cache_page
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
 from django.utils.decorators import method_decorator
-from ..models import Lesson, Expression
+from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.conf import settings
+from django.db.models import Count, Max
+import hashlib
+import time
+from ..models import Lesson, Expression, Tag
 from ..forms import LessonForm, ExpressionForm
+from ..search import search_queryset, lookup_expressions
+from ..search_cache import SearchResultList, annotate_hits, count_hits, filter_by_hits, get_search_hits
+from ..search_log import format_filters, record_search, track_search
+from ..content_version import get_version
+from ..text import normalize_text
+from ..autocomplete import DEFAULT_LIMIT, autocomplete_expressions
+from ..fuzzy import did_you_mean, fuzzy_search
+from ..facets import get_lesson_facets
+from ..view_counts import record_view
+from ..decorators import conditional_page
 from .mixins import OwnerRequiredMixin, SuccessMessageMixin, SoftDeleteMixin, SearchMixin
 
-@method_decorator(cache_page(60 * 15), name='dispatch')  # Cache por 15 minutos
 class LessonListView(LoginRequiredMixin, ListView):
+    """
+    Listado de lecciones con filtros y búsqueda. Los resultados (grilla,
+    expresiones que coinciden y sugerencias) se guardan en caché como fragmento
+    HTML (core/lesson_grid.html); el resto de la página (cabecera, usuario,
+    mensajes, formulario de filtros) se renderiza en cada petición.
+    """
     model = Lesson
     template_name = 'core/lessons_index.html'
+    grid_template_name = 'core/lesson_grid.html'
     context_object_name = 'lessons'
     login_url = '/core/login/'
     paginate_by = 12  # Mostrar 12 lecciones por página
+    search_hits = None
+    # Modos de orden de ?sort=, cada uno respaldado por un índice parcial de Lesson.
+    # Los valores desconocidos usan default_sort (order_by no recibe nada del usuario)
+    sort_modes = {
+        'newest': ('-created_at', '-id'),
+        'oldest': ('created_at', 'id'),
+        'title': ('title', 'id'),
+        'title_desc': ('-title', '-id'),
+        'country': ('country', '-created_at', '-id'),
+        'level': ('level_rank', '-created_at', '-id'),
+    }
+    default_sort = 'newest'
+    
+    def get_sort_mode(self):
+        """Modo de orden pedido en ?sort=; None si no se pidió uno válido"""
+        sort = self.request.GET.get('sort')
+        return sort if sort in self.sort_modes else None
+    
+    def get_grid_cache_key(self):
+        """
+        Clave del fragmento: filtros normalizados, página, si el usuario es staff
+        (acciones de edición) y versiones de contenido de lecciones y expresiones
+        """
+        params = self.request.GET
+        parts = [
+            normalize_text(params.get('q', '')),
+            params.get('country', ''),
+            params.get('difficulty', ''),
+            params.get('category', ''),
+            # Sin sort válido, una búsqueda se ordena por relevancia
+            self.get_sort_mode(),
+            params.get('page', '1'),
+            self.request.user.is_staff,
+            get_version(Lesson),
+            get_version(Expression),
+        ]
+        return 'lesson_grid:' + hashlib.md5(repr(parts).encode()).hexdigest()
+    
+    def get(self, request, *args, **kwargs):
+        self.grid_cache_key = self.get_grid_cache_key()
+        start = time.perf_counter()
+        cached = cache.get(self.grid_cache_key)
+        if cached is None:
+            return super().get(request, *args, **kwargs)
+        
+        # Fragmento en caché: sin consultas de lecciones, solo el marco de la página
+        lesson_grid, hits = cached
+        search_query = request.GET.get('q', '')
+        if search_query:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            record_search('lesson', search_query, format_filters(request.GET), hits, elapsed_ms)
+        self.object_list = Lesson.objects.none()
+        context = self.get_filter_context()
+        context.update(view=self, lesson_grid=lesson_grid)
+        return self.render_to_response(context)
     
     def get_queryset(self):
         # Optimizar consulta con select_related para evitar N+1 queries
         queryset = Lesson.objects.select_related('user').filter(is_active=True)
         
-        # Búsqueda
-        search_query = self.request.GET.get('q')
-        if search_query:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(title__icontains=search_query) | 
-                Q(content__icontains=search_query)
-            )
-        
         # Filtros
         country_filter = self.request.GET.get('country')
         difficulty_filter = self.request.GET.get('difficulty')
         category_filter = self.request.GET.get('category')
-        sort_by = self.request.GET.get('sort', '-created_at')
+        sort_mode = self.get_sort_mode()
         
         if country_filter:
             queryset = queryset.filter(country=country_filter)
         if difficulty_filter:
-            queryset = queryset.filter(level=difficulty_filter)
+            # Por level_rank, la columna del índice; un nivel desconocido no tiene lecciones
+            rank = Lesson.LEVEL_RANKS.get(difficulty_filter)
+            queryset = queryset.filter(level_rank=rank) if rank is not None else queryset.none()
         if category_filter:
             queryset = queryset.filter(category=category_filter)
         
-        return queryset.order_by(sort_by)
+        # Búsqueda de texto completo (FTS5), ordenada por relevancia si no se pide otro orden.
+        # Las coincidencias se guardan en caché hasta que cambian las lecciones
+        search_query = self.request.GET.get('q')
+        if search_query:
+            with track_search('lesson', search_query, format_filters(self.request.GET)) as search:
+                self.search_hits = get_search_hits(queryset, search_query, fields=['title', 'content'])
+                search.hits = count_hits(self.search_hits)
+            if self.search_hits is None:
+                queryset = search_queryset(queryset, search_query, fields=['title', 'content'])
+                if sort_mode is None:
+                    return queryset.order_by('search_rank', '-created_at')
+            elif sort_mode is None:
+                return SearchResultList(queryset, self.search_hits)
+            else:
+                queryset = filter_by_hits(queryset, self.search_hits)
+        return queryset.order_by(*self.sort_modes[sort_mode or self.default_sort])
+    
+    def get_filter_context(self):
+        """Opciones y valores actuales de los filtros (parte no cacheada de la página)"""
+        # (valor, nombre, lecciones con los demás filtros), en caché por versión de Lesson
+        facets = get_lesson_facets(self.request.GET)
+        return {
+            # Agregar datos para filtros
+            'countries': facets['country'],
+            'difficulties': facets['difficulty'],
+            'categories': facets['category'],
+            # Valores actuales de filtros
+            'country_filter': self.request.GET.get('country'),
+            'difficulty_filter': self.request.GET.get('difficulty'),
+            'category_filter': self.request.GET.get('category'),
+            'sort_by': self.get_sort_mode() or self.default_sort,
+            'search_query': self.request.GET.get('q', ''),
+        }
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_filter_context())
+        if context['search_query']:
+            if self.search_hits:
+                annotate_hits(context['lessons'], self.search_hits)
+            # Expresiones que coinciden sin importar tildes ni signos ("que onda" → "¿Qué onda?")
+            context['matching_expressions'] = lookup_expressions(context['search_query'], limit=6)
+            if not context['lessons'] and not context['matching_expressions']:
+                # Sin resultados: sugerir la expresión o etiqueta más parecida ("chebere" → "Chévere")
+                context['did_you_mean'] = did_you_mean(context['search_query'])
         
-        # Agregar datos para filtros
-        context['countries'] = Lesson.COUNTRY_CHOICES
-        context['difficulties'] = Lesson.LEVEL_CHOICES
-        context['categories'] = Lesson.CATEGORY_CHOICES
-        
-        # Valores actuales de filtros
-        context['country_filter'] = self.request.GET.get('country')
-        context['difficulty_filter'] = self.request.GET.get('difficulty')
-        context['category_filter'] = self.request.GET.get('category')
-        context['sort_by'] = self.request.GET.get('sort', '-created_at')
-        context['search_query'] = self.request.GET.get('q', '')
-        
+        # Renderizar y guardar el fragmento de resultados con el total de coincidencias
+        context['lesson_grid'] = render_to_string(self.grid_template_name, context, self.request)
+        hits = context['paginator'].count if context['paginator'] else len(context['lessons'])
+        cache.set(
+            self.grid_cache_key, (context['lesson_grid'], hits),
+            getattr(settings, 'LESSON_GRID_CACHE_TIMEOUT', 60 * 60),
+        )
         return context
 
-# Vista temporal simple para debug - devuelve texto plano
-@method_decorator(cache_page(60 * 30), name='dispatch')  # Cache por 30 minutos
+def lesson_page_validators(request, pk):
+    """ETag y Last-Modified de la lección: su updated_at y el de sus expresiones, en una consulta"""
+    try:
+        row = Lesson.objects.filter(pk=pk).values('pk', 'updated_at').annotate(
+            expressions_updated=Max('expressions__updated_at'),
+            # El total detecta expresiones borradas que no eran las más recientes
+            expressions_total=Count('expressions'),
+        ).values_list('updated_at', 'expressions_updated', 'expressions_total').order_by().get()
+    except Lesson.DoesNotExist:
+        return None
+    updated_at, expressions_updated, _ = row
+    return row, max(updated_at, expressions_updated or updated_at)
+
+# 304 si el cliente tiene la versión actual (respuesta privada: la cabecera es por usuario)
+@method_decorator(conditional_page(lesson_page_validators), name='dispatch')
 class LessonDetailView(DetailView):
+    """
+    Detalle de una lección. El contenido de la lección y sus expresiones se
+    guarda en caché como fragmento HTML (core/lesson_body.html) hasta que cambia
+    la versión de la lección (señales en core/signals.py); la cabecera, el
+    usuario y los mensajes se renderizan en cada petición.
+    """
     model = Lesson
     template_name = 'core/lesson_detail.html'
+    body_template_name = 'core/lesson_body.html'
     context_object_name = 'lesson'
     
+    def get_body_cache_key(self):
+        """Clave del fragmento: lección, si el usuario es staff (acciones de edición) y versión de la lección"""
+        pk = self.kwargs['pk']
+        return f'lesson_body:{pk}:{int(self.request.user.is_staff)}:{get_version(Lesson, pk)}'
+    
+    def get(self, request, *args, **kwargs):
+        self.body_cache_key = self.get_body_cache_key()
+        lesson_body = cache.get(self.body_cache_key)
+        if lesson_body is None:
+            return super().get(request, *args, **kwargs)
+        # Fragmento en caché: sin consultas de la lección, solo el marco de la página
+        return self.render_to_response({'view': self, 'lesson_body': lesson_body})
+    
     def get_queryset(self):
         # Optimizar consulta con select_related para el usuario
         return Lesson.objects.select_related('user')
@@ -80,8 +219,56 @@ class LessonDetailView(DetailView):
         # Optimizar consulta de expresiones
         expressions = self.object.expressions.select_related('lesson').filter(is_active=True)
         context['expressions'] = expressions
+        
+        # Renderizar y guardar el fragmento con el contenido de la lección
+        context['lesson_body'] = render_to_string(self.body_template_name, context, self.request)
+        cache.set(self.body_cache_key, context['lesson_body'], settings.LESSON_PAGE_CACHE_TIMEOUT)
         return context
 
+@require_GET
+def expression_autocomplete(request):
+    """Sugerencias de expresiones para ?q=, servidas desde el índice en memoria"""
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {'id': suggestion.id, 'text': suggestion.text, 'lesson_id': suggestion.lesson_id}
+            for suggestion in autocomplete_expressions(query, limit)
+        ],
+    })
+
+@require_GET
+def fuzzy_lookup(request):
+    """Expresiones y etiquetas parecidas a ?q= (tolera tildes y errores), por similitud"""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(0, min(int(request.GET.get('limit', DEFAULT_LIMIT)), 20))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return JsonResponse({
+        'query': query,
+        'expressions': [
+            {'id': expression.id, 'text': expression.text, 'lesson_id': expression.lesson_id,
+             'similarity': round(expression.similarity, 3)}
+            for expression in fuzzy_search(Expression, query, limit)
+        ],
+        'tags': [
+            {'id': tag.id, 'name': tag.name, 'slug': tag.slug, 'similarity': round(tag.similarity, 3)}
+            for tag in fuzzy_search(Tag, query, limit)
+        ],
+    })
+
+@require_POST
+def expression_selected(request, expression_id):
+    """Registra que se eligió una sugerencia; alimenta la popularidad del autocompletado"""
+    expression = get_object_or_404(Expression, id=expression_id, is_active=True)
+    pending = record_view(expression)
+    return JsonResponse({'views': expression.views + pending})
+
 class LessonCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     model = Lesson
     form_class = LessonForm
@@ -0,0 +1,97 @@
+import mimetypes
+import os
+import stat as stat_module
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from ..media import (
+    RangeFile, RangeNotSatisfiable, accel_redirect_location, byteranges_length,
+    file_etag, iter_byteranges, multipart_boundary, parse_range_header, sendfile_mode,
+)
+
+
+def _if_range_matches(request, etag, last_modified):
+    """If-Range: los rangos solo valen si el archivo no cambió desde que el cliente lo vio"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Comparación fuerte: un ETag débil nunca coincide
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _file_response(request, full_path, path, stat, etag, last_modified, content_type):
+    size = stat.st_size
+    ranges = None
+    if _if_range_matches(request, etag, last_modified):
+        try:
+            ranges = parse_range_header(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    mode = sendfile_mode()
+    if mode:
+        # Apache (mod_xsendfile) o nginx envían el archivo y resuelven los rangos
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = accel_redirect_location(path)
+        else:
+            response['X-Sendfile'] = full_path
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    file = open(full_path, 'rb')
+    if ranges is None:
+        response = FileResponse(file, content_type=content_type)
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        boundary = multipart_boundary()
+        response = StreamingHttpResponse(
+            iter_byteranges(file, ranges, size, content_type, boundary),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}',
+        )
+        response['Content-Length'] = byteranges_length(ranges, size, content_type, boundary)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Archivo de MEDIA_ROOT con Range (uno o varios rangos), ETag, Last-Modified
+    y caché del navegador (MEDIA_CACHE_MAX_AGE). Ver core/media.py
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Archivo no encontrado')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Archivo no encontrado')
+    if not stat_module.S_ISREG(stat.st_mode):
+        raise Http404('Archivo no encontrado')
+
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _file_response(request, full_path, path, stat, etag, last_modified, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600))
+    return response
@@ -1,6 +1,11 @@
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.core.exceptions import PermissionDenied
+from ..pagination import decode_cursor, paginate_by_cursor
+from ..likes import mark_liked
+from ..search import search_queryset
+from ..search_cache import annotate_hits, count_hits, filter_by_hits, get_search_hits
+from ..search_log import format_filters, track_search
 
 class OwnerRequiredMixin:
     """Mixin para verificar que el usuario es el propietario del objeto."""
@@ -42,17 +47,66 @@ class SoftDeleteMixin:
         return redirect(self.get_success_url())
 
 class SearchMixin:
-    """Mixin para manejar búsquedas en listas."""
+    """
+    Mixin para manejar búsquedas en listas. Usa el índice FTS5 del modelo
+    (core.search) y search_fields con icontains cuando no está disponible.
+    Las coincidencias se guardan en caché hasta que cambia el contenido
+    (core.search_cache); la página las recibe con search_rank y search_snippet.
+    Las vistas con filtros propios llaman a search() después de aplicarlos.
+    """
     
     search_fields = []
+    search_hits = None
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        return self.search(super().get_queryset())
+    
+    def search(self, queryset):
+        """Aplica la búsqueda de ?q= a queryset y la registra en la telemetría"""
         search_query = self.request.GET.get('q', '')
-        if search_query:
-            from django.db.models import Q
-            query = Q()
-            for field in self.search_fields:
-                query |= Q(**{f"{field}__icontains": search_query})
-            queryset = queryset.filter(query)
-        return queryset 
\ No newline at end of file
+        if not search_query:
+            return queryset
+        source = queryset.model._meta.model_name
+        with track_search(source, search_query, format_filters(self.request.GET)) as search:
+            self.search_hits = get_search_hits(queryset, search_query, fields=self.search_fields)
+            search.hits = count_hits(self.search_hits)
+        if self.search_hits is None:
+            return search_queryset(queryset, search_query, fields=self.search_fields)
+        return filter_by_hits(queryset, self.search_hits)
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.search_hits:
+            annotate_hits(context['object_list'], self.search_hits)
+        return context
+
+class CursorPaginationMixin:
+    """
+    Mixin para ListView que reemplaza la paginación OFFSET/LIMIT por paginación
+    por cursor (keyset) sobre cursor_ordering. No calcula el total de resultados,
+    así que cualquier página cuesta lo mismo que la primera.
+    """
+    
+    cursor_ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    
+    def paginate_queryset(self, queryset, page_size):
+        cursor = decode_cursor(
+            self.request.GET.get(self.cursor_query_param),
+            queryset.model,
+            self.cursor_ordering,
+        )
+        page = paginate_by_cursor(queryset, self.cursor_ordering, page_size, cursor)
+        return None, page, page.object_list, page.has_other_pages()
+
+class LikedByUserMixin:
+    """
+    Mixin para ListView que marca con user_liked los objetos de la página
+    usando una sola consulta, en lugar de comprobar la relación de likes
+    por cada objeto en la plantilla.
+    """
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        mark_liked(self.request.user, context['object_list'])
+        return context
@@ -0,0 +1,20 @@
+from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from ..global_search import search_all
+from ..search_log import track_search
+
+@login_required(login_url='/core/login/')
+def search_view(request):
+    """Búsqueda unificada: lecciones, expresiones, foro y blog en paralelo"""
+    query = request.GET.get('q', '').strip()
+    sections = []
+    if query:
+        with track_search('search', query) as search:
+            sections = search_all(query)
+            search.hits = sum(len(section.results) for section in sections)
+    return render(request, 'core/search.html', {
+        'query': query,
+        'sections': sections,
+        'total_results': sum(len(section.results) for section in sections),
+        'timed_out': [section.label for section in sections if section.timed_out],
+    })
@@ -163,6 +163,20 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.CachedStaticFilesStora
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Servir MEDIA_URL desde Django (serve_media); por defecto solo en desarrollo,
+# en producción los archivos los sirve el servidor web o un CDN
+MEDIA_SERVE = config('MEDIA_SERVE', default=DEBUG, cast=bool)
+# Envío de archivos de medios (core/media.py): vacío para enviarlos desde Django
+# (con Range y sendfile del servidor WSGI), 'x-sendfile' para Apache o
+# 'x-accel-redirect' para nginx (location internal en MEDIA_ACCEL_REDIRECT_PREFIX)
+MEDIA_SENDFILE = config('MEDIA_SENDFILE', default='') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# Anchos (px) de las variantes JPEG y WebP de portadas, imágenes del blog y avatares (core.image_variants)
+IMAGE_VARIANT_WIDTHS = [320, 640, 960]
+# Generar las variantes tras el commit en un hilo aparte, fuera de la petición que sube la imagen
+IMAGE_VARIANTS_ASYNC = True
+
 # Configuración de archivos subidos
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
@@ -250,9 +264,73 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'staticfiles',
         'TIMEOUT': 86400,  # 24 horas
-    }
+    },
+    # Visitas pendientes de volcar (core/view_counts.py): separada de la caché por
+    # defecto y sin desalojo en la práctica, para no perder visitas. En producción,
+    # una base de Redis propia con maxmemory-policy noeviction
+    'view_counts': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'view-counts',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000_000,
+        }
+    },
+    # Versiones de contenido (core/content_version.py): una edición solo invalida
+    # las cachés de los procesos que ven su versión. Con varios workers debe ser
+    # una caché compartida (Redis, Memcached); LocMemCache sirve para un solo proceso
+    'content_versions': {
+        'BACKEND': config('CONTENT_VERSION_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CONTENT_VERSION_CACHE_LOCATION', default='content-versions'),
+        'TIMEOUT': None,
+    },
 }
 
+# Con versiones por proceso, una edición no se ve en los demás workers hasta que
+# expiran las cachés que dependen de ellas: se limitan a minutos
+CONTENT_VERSION_SHARED = not CACHES['content_versions']['BACKEND'].endswith('LocMemCache')
+
+# Contador de visitas con escritura diferida (core/view_counts.py):
+# segundos entre volcados desde las peticiones; 0 para volcar solo con flush_view_counts
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=60, cast=int)
+# Alias de la caché de los contadores y segundos tras los que una visita vuelve a
+# anotar su objeto como pendiente si la anotación anterior se perdió
+VIEW_COUNT_CACHE = 'view_counts'
+VIEW_COUNT_PENDING_TTL = 60 * 60
+
+CONTENT_VERSION_CACHE = 'content_versions'
+
+# Conteos por categoría en caché (core/facets.py): segundos hasta la reconstrucción completa
+FACET_COUNTS_TIMEOUT = 6 * 60 * 60 if CONTENT_VERSION_SHARED else 5 * 60
+
+# Índice de autocompletado de expresiones (core/autocomplete.py): segundos hasta
+# reconstruirlo aunque no cambie la versión de contenido (refresca la popularidad)
+AUTOCOMPLETE_INDEX_TTL = 300
+
+# Búsqueda unificada (core/global_search.py): segundos máximos para todas las secciones
+SEARCH_TIME_BUDGET = 2.0
+
+# Caché de búsquedas (core/search_cache.py): las claves incluyen la versión de
+# contenido; el tiempo solo elimina las entradas de versiones anteriores.
+# Las búsquedas más amplias no se guardan
+SEARCH_CACHE_TIMEOUT = 6 * 60 * 60 if CONTENT_VERSION_SHARED else 5 * 60
+SEARCH_CACHE_MAX_HITS = 500
+
+# Telemetría de búsquedas (core/search_log.py): eventos en memoria por proceso
+# y segundos entre volcados a la tabla SearchLog al terminar las peticiones. Con
+# 0 el buffer se vuelca solo al llegar a la mitad
+SEARCH_LOG_ENABLED = True
+SEARCH_LOG_BUFFER_SIZE = 1000
+SEARCH_LOG_FLUSH_INTERVAL = config('SEARCH_LOG_FLUSH_INTERVAL', default=60, cast=int)
+
+# Fragmento de resultados del listado de lecciones: la clave incluye la versión de
+# contenido, el tiempo solo acota sugerencias que dependen de etiquetas
+LESSON_GRID_CACHE_TIMEOUT = 60 * 60 if CONTENT_VERSION_SHARED else 5 * 60
+
+# Fragmento de contenido de las lecciones (core/lesson_body.html): la clave incluye la
+# versión de la lección, que cambia al editarla o al cambiar sus expresiones
+LESSON_PAGE_CACHE_TIMEOUT = 6 * 60 * 60 if CONTENT_VERSION_SHARED else 5 * 60
+
 # Configuración de Channels - Comentado ya que no se usa
 # ASGI_APPLICATION = 'slangspot.asgi.application'
 # CHANNEL_LAYERS = {
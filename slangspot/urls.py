@@ -14,15 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
-from core.views import home
+from core.views import home, serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', home, name='home'),
     path('accounts/', include('allauth.urls')),
     path('core/', include('core.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+# Archivos subidos con soporte de Range (audio de expresiones), solo con MEDIA_SERVE
+# (por defecto, en desarrollo); con MEDIA_SENDFILE el envío lo hace Apache o nginx.
+# Un MEDIA_URL absoluto (CDN) no pasa por Django
+if settings.MEDIA_SERVE and settings.MEDIA_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]